@@ -1,10 +1,12 @@
 """
 Aplicação Flask principal do sistema de análise da QUINA
 """
+import os
+import click
 from flask import Flask
 import config
 from routes.main_routes import main_bp
-from routes.api_routes import api_bp
+from routes.api_routes import api_bp, sincronizacao
 
 # Cria a aplicação Flask
 app = Flask(__name__)
@@ -14,6 +16,90 @@ app.config['SECRET_KEY'] = config.SECRET_KEY
 app.register_blueprint(main_bp)
 app.register_blueprint(api_bp)
 
+# Agendador de sincronização (no modo debug, apenas no processo do reloader
+# que atende as requisições; nunca nos processos do backtest, que reimportam
+# este módulo como __mp_main__)
+if __name__ != '__mp_main__' and (not config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    sincronizacao.iniciar_agendador()
+
+
+@app.cli.command('importar')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--tamanho-lote', type=int, default=None,
+              help='Quantidade de resultados por transação')
+def importar(arquivo, tamanho_lote):
+    """
+    Importa o histórico de um arquivo local (JSON, NDJSON ou .gz)
+    
+    Uso: flask --app app importar historico.json.gz
+    """
+    from services.importacao_service import ImportacaoService
+    
+    resultado = ImportacaoService().importar_arquivo(arquivo, tamanho_lote=tamanho_lote)
+    
+    click.echo(f"📥 {resultado['mensagem']}")
+    click.echo(f"   Processados: {resultado['total_processados']}")
+    click.echo(f"   Inseridos: {resultado['total_inseridos']}")
+    click.echo(f"   Erros: {resultado['total_erros']}")
+    click.echo(f"   Último concurso: {resultado['ultimo_concurso']}")
+
+
+@app.cli.command('recalcular-agregados')
+def recalcular_agregados():
+    """
+    Reconstrói as tabelas de agregados a partir das dezenas e verifica divergências
+    
+    Uso: flask --app app recalcular-agregados
+    """
+    from models.resultado_model import ResultadoModel
+    
+    resultado = ResultadoModel().recalcular_agregados()
+    if resultado is None:
+        raise click.ClickException('Erro ao recalcular agregados')
+    
+    click.echo("🧮 Agregados recalculados")
+    click.echo(f"   Dezenas divergentes: {resultado['dezenas_divergentes']}")
+    click.echo(f"   Posições divergentes: {resultado['posicoes_divergentes']}")
+
+
+@app.cli.command('backtest')
+@click.option('--estrategia', 'estrategias', multiple=True,
+              help='Estratégia avaliada (repetível; padrão: todas)')
+@click.option('--quantidade-numeros', type=int, default=5,
+              help='Quantidade de números por jogo')
+@click.option('--jogos-por-concurso', type=int, default=1,
+              help='Jogos gerados por estratégia em cada concurso')
+@click.option('--semente', 'sementes', type=int, multiple=True,
+              help='Semente do gerador aleatório (repetível)')
+@click.option('--concursos', type=int, default=None,
+              help='Quantidade de concursos avaliados, os mais recentes')
+def backtest(estrategias, quantidade_numeros, jogos_por_concurso, sementes, concursos):
+    """
+    Avalia as estratégias de palpites sobre o histórico (walk-forward)
+    
+    Uso: flask --app app backtest --estrategia atrasados --semente 1 --semente 2
+    """
+    from services.backtest_service import BacktestService
+    from services.quina_service import QuinaService
+    
+    resultado = BacktestService().executar(
+        estrategias=list(estrategias or QuinaService.estrategias()),
+        quantidade_numeros=quantidade_numeros,
+        jogos_por_concurso=jogos_por_concurso,
+        sementes=list(sementes) or None,
+        concursos=concursos
+    )
+    if 'erro' in resultado:
+        raise click.ClickException(resultado['erro'])
+    
+    click.echo(f"🎯 Backtest de {resultado['concursos_avaliados']} concursos "
+               f"({resultado['primeiro_concurso']} a {resultado['ultimo_concurso']})")
+    click.echo(f"   Média esperada ao acaso: {resultado['media_aleatoria']}")
+    for item in resultado['resultados']:
+        premios = ', '.join(f'{nome}: {qtd}' for nome, qtd in item['premios'].items())
+        click.echo(f"   {item['estrategia']} (semente {item['semente']}): "
+                   f"média {item['media_acertos']} | {premios}")
+
 if __name__ == '__main__':
     print(f"🎯 Sistema de Análise QUINA")
     print(f"🌐 Servidor rodando em http://{config.HOST}:{config.PORT}")
@@ -17,9 +17,54 @@ PORT = int(os.getenv('PORT', 5055))
 
 # Configurações do banco de dados
 DATABASE_PATH = os.getenv('DATABASE_PATH', 'database.db')
+DATABASE_TAMANHO_LOTE = int(os.getenv('DATABASE_TAMANHO_LOTE', 500))
+DATABASE_WAL = os.getenv('DATABASE_WAL', 'True').lower() == 'true'
+DATABASE_SYNCHRONOUS = os.getenv('DATABASE_SYNCHRONOUS', '')
+DATABASE_TIMEOUT = float(os.getenv('DATABASE_TIMEOUT', 30))
+DATABASE_CACHE_KB = int(os.getenv('DATABASE_CACHE_KB', 16384))
+DATABASE_MMAP_BYTES = int(os.getenv('DATABASE_MMAP_BYTES', 268435456))
+
+# Snapshot binário do histórico (<DATABASE_PATH>.snapshot) para partida rápida
+DRAW_SNAPSHOT = os.getenv('DRAW_SNAPSHOT', 'True').lower() == 'true'
+
+# Estatísticas lidas das tabelas de agregados materializados (False percorre o histórico)
+ESTATISTICA_AGREGADOS = os.getenv('ESTATISTICA_AGREGADOS', 'True').lower() == 'true'
+
+# Agregados vetorizados com NumPy, quando instalado (False força Python puro)
+ESTATISTICA_NUMPY = os.getenv('ESTATISTICA_NUMPY', 'True').lower() == 'true'
+
+# Quantidade máxima de respostas guardadas no cache em memória
+CACHE_MAX_ENTRADAS = int(os.getenv('CACHE_MAX_ENTRADAS', 128))
+
+# Quantidade máxima de jogos por chamada da geração em lote
+LOTE_MAX_JOGOS = int(os.getenv('LOTE_MAX_JOGOS', 1000000))
+
+# Amostragem com restrições: máximo de jogos por chamada e de estados da contagem exata
+COMBINATORIA_MAX_JOGOS = int(os.getenv('COMBINATORIA_MAX_JOGOS', 10000))
+COMBINATORIA_MAX_ESTADOS = int(os.getenv('COMBINATORIA_MAX_ESTADOS', 2000000))
+
+# Soma dos estados das contagens mantidas em memória (cerca de 140 bytes por estado)
+COMBINATORIA_MAX_ESTADOS_CACHE = int(os.getenv('COMBINATORIA_MAX_ESTADOS_CACHE', 2000000))
+
+# Processos do backtest de estratégias (0 usa um por CPU)
+BACKTEST_PROCESSOS = int(os.getenv('BACKTEST_PROCESSOS', 0))
+
+# Máximo de combinações (estratégia, semente) por backtest
+BACKTEST_MAX_TAREFAS = int(os.getenv('BACKTEST_MAX_TAREFAS', 64))
 
 # Configurações da API da Caixa
 API_QUINA_URL = os.getenv('API_QUINA_URL', 'https://servicebus2.caixa.gov.br/portaldeloterias/api/quina')
+API_TAMANHO_LOTE = int(os.getenv('API_TAMANHO_LOTE', 100))
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', 10))
+API_CONCORRENCIA = int(os.getenv('API_CONCORRENCIA', 8))
+API_POOL_CONEXOES = int(os.getenv('API_POOL_CONEXOES', 4))
+API_POOL_TAMANHO = int(os.getenv('API_POOL_TAMANHO', 8))
+API_TENTATIVAS = int(os.getenv('API_TENTATIVAS', 4))
+API_BACKOFF_BASE = float(os.getenv('API_BACKOFF_BASE', 0.5))
+API_BACKOFF_MAX = float(os.getenv('API_BACKOFF_MAX', 30))
+
+# Sincronização em segundo plano (0 desabilita o agendador)
+SYNC_INTERVALO_MINUTOS = float(os.getenv('SYNC_INTERVALO_MINUTOS', 0))
 
 # Constantes da QUINA
 MIN_NUMEROS = 1
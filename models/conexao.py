@@ -0,0 +1,106 @@
+"""
+Gerenciador de conexões SQLite compartilhadas entre os models
+"""
+import os
+import sqlite3
+import threading
+from typing import Callable
+import config
+
+
+class GerenciadorConexoes:
+    """
+    Mantém uma conexão SQLite por thread e por banco de dados, compartilhada
+    por todas as instâncias dos models, e garante que o esquema seja criado
+    uma única vez por processo
+    """
+    
+    _local = threading.local()
+    _lock = threading.Lock()
+    _inicializados = set()
+    
+    @classmethod
+    def obter(cls, db_path: str) -> sqlite3.Connection:
+        """
+        Retorna a conexão da thread atual para o banco informado, abrindo-a
+        e configurando os PRAGMAs na primeira utilização
+        
+        Args:
+            db_path: Caminho do banco de dados SQLite
+            
+        Returns:
+            Conexão SQLite com row_factory = sqlite3.Row
+        """
+        conexoes = cls._conexoes_da_thread()
+        chave = os.path.abspath(db_path)
+        
+        conn = conexoes.get(chave)
+        if conn is None:
+            conn = cls._abrir(db_path)
+            conexoes[chave] = conn
+        return conn
+    
+    @classmethod
+    def executar_uma_vez(cls, db_path: str, funcao: Callable[[], None]):
+        """
+        Executa funcao apenas na primeira chamada para o banco neste processo
+        
+        Args:
+            db_path: Caminho do banco de dados SQLite
+            funcao: Função de inicialização (ex.: criação do esquema)
+        """
+        chave = (os.getpid(), os.path.abspath(db_path))
+        if chave in cls._inicializados:
+            return
+        
+        with cls._lock:
+            if chave not in cls._inicializados:
+                funcao()
+                cls._inicializados.add(chave)
+    
+    @classmethod
+    def fechar(cls):
+        """
+        Fecha as conexões abertas pela thread atual
+        """
+        conexoes = cls._conexoes_da_thread()
+        for conn in conexoes.values():
+            conn.close()
+        conexoes.clear()
+    
+    @classmethod
+    def _conexoes_da_thread(cls) -> dict:
+        """
+        Retorna o dicionário de conexões da thread atual, descartando
+        conexões herdadas de outro processo após um fork
+        """
+        pid = os.getpid()
+        if getattr(cls._local, 'pid', None) != pid:
+            cls._local.pid = pid
+            cls._local.conexoes = {}
+        return cls._local.conexoes
+    
+    @staticmethod
+    def _abrir(db_path: str) -> sqlite3.Connection:
+        """
+        Abre uma nova conexão aplicando as configurações de desempenho
+        
+        Args:
+            db_path: Caminho do banco de dados SQLite
+            
+        Returns:
+            Conexão SQLite configurada
+        """
+        conn = sqlite3.connect(db_path, timeout=config.DATABASE_TIMEOUT)
+        conn.row_factory = sqlite3.Row
+        
+        if config.DATABASE_WAL:
+            conn.execute("PRAGMA journal_mode = WAL")
+        if config.DATABASE_SYNCHRONOUS:
+            conn.execute(f"PRAGMA synchronous = {config.DATABASE_SYNCHRONOUS.upper()}")
+        
+        # Valor negativo de cache_size é em KiB
+        conn.execute(f"PRAGMA cache_size = -{int(config.DATABASE_CACHE_KB)}")
+        conn.execute(f"PRAGMA mmap_size = {int(config.DATABASE_MMAP_BYTES)}")
+        
+        return conn
@@ -0,0 +1,417 @@
+"""
+Armazenamento compacto em memória do histórico de sorteios da QUINA
+"""
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+import config
+from models.resultado_model import DezenasConcurso, ResultadoModel
+from models.snapshot import abrir_snapshot, salvar_snapshot
+
+
+# Bytes por concurso em cada bloco
+BYTES_NUMERO = 4
+DEZENAS_POR_CONCURSO = 5
+BYTES_MASCARA = 10
+
+
+class HistoricoCompacto:
+    """
+    Visão imutável do histórico, do concurso mais antigo ao mais recente
+    
+    Os blocos podem ser bytes ou memoryviews sobre um snapshot mapeado
+    com mmap (ver models/snapshot.py).
+    
+    Attributes:
+        numeros: array('I') com o número de cada concurso (crescente)
+        ordem: Bloco N×5 (uint8) com as dezenas na ordem do sorteio,
+               preenchido com zeros quando a ordem não está disponível
+        ordenadas: Bloco N×5 (uint8) com as dezenas em ordem crescente
+        mascaras: Bloco N×10 com a máscara de 80 bits de cada concurso
+                  (bit d-1 ligado para a dezena d, little endian)
+    """
+    
+    __slots__ = ('numeros', 'ordem', 'ordenadas', 'mascaras')
+    
+    def __init__(self, numeros=None, ordem=b'', ordenadas=b'', mascaras=b''):
+        self.numeros = numeros if numeros is not None else array('I')
+        self.ordem = ordem
+        self.ordenadas = ordenadas
+        self.mascaras = mascaras
+    
+    def __len__(self) -> int:
+        return len(self.numeros)
+    
+    @property
+    def ultimo(self) -> Optional[int]:
+        """
+        Número do concurso mais recente ou None se o histórico estiver vazio
+        """
+        return self.numeros[-1] if len(self.numeros) else None
+    
+    def dezenas(self, idx: int) -> bytes:
+        """
+        Dezenas em ordem crescente do concurso no índice idx (zeros = ausentes)
+        """
+        inicio = idx * DEZENAS_POR_CONCURSO
+        return bytes(self.ordenadas[inicio:inicio + DEZENAS_POR_CONCURSO])
+    
+    def ordem_sorteio(self, idx: int) -> bytes:
+        """
+        Dezenas na ordem do sorteio do concurso no índice idx (vazio se indisponível)
+        """
+        inicio = idx * DEZENAS_POR_CONCURSO
+        ordem = bytes(self.ordem[inicio:inicio + DEZENAS_POR_CONCURSO])
+        return ordem if ordem[0] else b''
+    
+    def mascara(self, idx: int) -> int:
+        """
+        Máscara de 80 bits do concurso no índice idx
+        """
+        inicio = idx * BYTES_MASCARA
+        return int.from_bytes(self.mascaras[inicio:inicio + BYTES_MASCARA], 'little')
+    
+    def indice(self, numero: int) -> Optional[int]:
+        """
+        Índice do concurso informado ou None se ele não estiver no histórico
+        """
+        idx = bisect_left(self.numeros, numero)
+        if idx < len(self.numeros) and self.numeros[idx] == numero:
+            return idx
+        return None
+    
+    def contem_prefixo(self, outro: 'HistoricoCompacto') -> bool:
+        """
+        Verifica se os primeiros concursos desta visão são exatamente os de outro
+        
+        Usado por estruturas derivadas para decidir entre estender-se com os
+        concursos novos ou reconstruir do zero.
+        
+        Args:
+            outro: Visão anterior do histórico
+            
+        Returns:
+            True se esta visão apenas acrescenta concursos ao final de outro
+        """
+        total = len(outro)
+        if total > len(self):
+            return False
+        if not total:
+            return True
+        
+        tamanho = total * DEZENAS_POR_CONCURSO
+        return (
+            self.numeros[total - 1] == outro.numeros[total - 1]
+            and self.ordenadas[:tamanho] == outro.ordenadas[:tamanho]
+            and self.ordem[:tamanho] == outro.ordem[:tamanho]
+        )
+    
+    def registros(self) -> List[DezenasConcurso]:
+        """
+        Converte o histórico de volta para registros, do mais antigo ao mais recente
+        """
+        return [
+            DezenasConcurso(
+                numero,
+                tuple(d for d in self.dezenas(idx) if d),
+                tuple(self.ordem_sorteio(idx))
+            )
+            for idx, numero in enumerate(self.numeros)
+        ]
+    
+    @classmethod
+    def de_registros(cls, registros: Iterable[DezenasConcurso]) -> 'HistoricoCompacto':
+        """
+        Monta o histórico a partir de registros em ordem crescente de concurso
+        
+        Args:
+            registros: Registros do mais antigo ao mais recente
+            
+        Returns:
+            Nova visão compacta
+        """
+        numeros = array('I')
+        ordem = bytearray()
+        ordenadas = bytearray()
+        mascaras = bytearray()
+        
+        for registro in registros:
+            numeros.append(registro.numero)
+            ordem += cls._completar(registro.ordem_sorteio)
+            ordenadas += cls._completar(registro.dezenas)
+            
+            mascara = 0
+            for dezena in registro.dezenas:
+                mascara |= 1 << (dezena - 1)
+            mascaras += mascara.to_bytes(BYTES_MASCARA, 'little')
+        
+        return cls(numeros, bytes(ordem), bytes(ordenadas), bytes(mascaras))
+    
+    @staticmethod
+    def _completar(dezenas: Iterable[int]) -> bytes:
+        """
+        Ajusta uma sequência de dezenas para exatamente 5 bytes
+        """
+        valores = bytes(dezenas)[:DEZENAS_POR_CONCURSO]
+        return valores + bytes(DEZENAS_POR_CONCURSO - len(valores))
+    
+    def anexar(self, outro: 'HistoricoCompacto') -> 'HistoricoCompacto':
+        """
+        Retorna uma nova visão com os concursos de outro ao final desta
+        
+        Args:
+            outro: Histórico com concursos posteriores ao último desta visão
+            
+        Returns:
+            Nova visão compacta
+        """
+        numeros = array('I', self.numeros)
+        numeros.extend(outro.numeros)
+        return HistoricoCompacto(
+            numeros,
+            bytes(self.ordem) + bytes(outro.ordem),
+            bytes(self.ordenadas) + bytes(outro.ordenadas),
+            bytes(self.mascaras) + bytes(outro.mascaras)
+        )
+
+
+class DrawStore:
+    """
+    Mantém o histórico completo em memória, compartilhado pelo processo,
+    carregado uma vez do banco e estendido incrementalmente
+    """
+    
+    _instancias = {}
+    _lock_instancias = threading.Lock()
+    
+    def __init__(self, db_path: str = None):
+        """
+        Inicializa o armazenamento (o histórico é carregado sob demanda)
+        
+        Args:
+            db_path: Caminho do banco de dados SQLite
+        """
+        self.db_path = db_path or config.DATABASE_PATH
+        self.resultado_model = ResultadoModel(self.db_path)
+        self.caminho_snapshot = f'{self.db_path}.snapshot' if config.DRAW_SNAPSHOT else None
+        self._lock = threading.Lock()
+        
+        # Histórico e versão dos dados do banco (buscar_versao_dados) a que
+        # ele corresponde, sempre trocados juntos
+        self._estado = (None, None)
+    
+    @classmethod
+    def instancia(cls, db_path: str = None) -> 'DrawStore':
+        """
+        Retorna a instância compartilhada para o banco informado
+        
+        Args:
+            db_path: Caminho do banco de dados SQLite
+            
+        Returns:
+            DrawStore do processo para o banco
+        """
+        chave = os.path.abspath(db_path or config.DATABASE_PATH)
+        instancia = cls._instancias.get(chave)
+        if instancia is None:
+            with cls._lock_instancias:
+                instancia = cls._instancias.get(chave)
+                if instancia is None:
+                    instancia = cls(chave)
+                    cls._instancias[chave] = instancia
+        return instancia
+    
+    def obter(self) -> HistoricoCompacto:
+        """
+        Retorna o histórico atualizado em relação ao banco de dados
+        
+        A verificação usa a versão dos dados mantida pelos gatilhos do banco
+        (uma leitura de metadados, sem percorrer a tabela), que muda a cada
+        inserção, substituição ou remoção, inclusive feitas por outros
+        processos. Se as escritas desde a versão em memória foram apenas
+        concursos novos ao final, só eles são lidos e anexados; qualquer
+        outra mudança recarrega tudo.
+        
+        Returns:
+            Visão imutável do histórico
+        """
+        versao = self.resultado_model.buscar_versao_dados()
+        dados, versao_atual = self._estado
+        if dados is not None and (versao is None or versao == versao_atual):
+            return dados
+        
+        with self._lock:
+            dados, versao_atual = self._estado
+            if dados is not None and (versao is None or versao == versao_atual):
+                return dados
+            
+            if dados is not None and versao_atual is not None:
+                ultimo, contador = versao
+                escritas = contador - versao_atual[1]
+                
+                if escritas > 0 and len(dados) and ultimo is not None and ultimo > dados.ultimo:
+                    novos = self.resultado_model.buscar_dezenas(apos=dados.ultimo)
+                    if len(novos) == escritas:
+                        self._definir(dados.anexar(HistoricoCompacto.de_registros(reversed(novos))), versao)
+                        return self._estado[0]
+            
+            self._definir(self._carregar(versao), versao)
+            return self._estado[0]
+    
+    def adicionar(self, resultados: Iterable[Dict]):
+        """
+        Incorpora resultados recém-gravados no banco sem recarregar o histórico
+        
+        Deve ser chamado depois do commit da gravação. A versão dos dados é
+        lida sob o lock: se ela avançou exatamente as escritas informadas
+        desde a versão em memória, os resultados são incorporados e a nova
+        versão é adotada; se a versão em memória já é a atual (outra thread
+        recarregou depois do commit), não há nada a fazer; qualquer outra
+        escrita intercalada descarta o histórico para recarga.
+        
+        Args:
+            resultados: Dicionários com os dados dos resultados da API, cada
+                um gravado uma vez no banco, na mesma transação
+        """
+        novos = {}
+        escritas = 0
+        for resultado in resultados:
+            registro = ResultadoModel.extrair_dezenas(resultado)
+            novos[registro.numero] = registro
+            escritas += 1
+        
+        if not novos:
+            return
+        
+        with self._lock:
+            dados, versao_atual = self._estado
+            if dados is None:
+                # Ainda não carregado: a primeira leitura trará tudo do banco
+                return
+            
+            versao = self.resultado_model.buscar_versao_dados()
+            if versao is not None and versao == versao_atual:
+                # Recarregado por outra thread já com estas escritas
+                return
+            
+            # Cada resultado gravado incrementou a versão dos dados uma vez
+            if versao is not None and (versao_atual is None or versao[1] - versao_atual[1] != escritas):
+                self._definir(None, None)
+                return
+            
+            if not len(dados) or min(novos) > dados.ultimo:
+                registros = [novos[numero] for numero in sorted(novos)]
+                self._definir(dados.anexar(HistoricoCompacto.de_registros(registros)), versao)
+                return
+            
+            # Substituições ou lacunas preenchidas: mescla em memória
+            registros = {registro.numero: registro for registro in dados.registros()}
+            registros.update(novos)
+            self._definir(
+                HistoricoCompacto.de_registros(registros[numero] for numero in sorted(registros)),
+                versao
+            )
+    
+    def invalidar(self):
+        """
+        Descarta o histórico em memória; a próxima leitura recarrega do banco
+        """
+        with self._lock:
+            self._definir(None, None)
+    
+    def _definir(self, dados: Optional[HistoricoCompacto], versao):
+        """
+        Troca o histórico e a versão a que ele corresponde (com o lock)
+        """
+        self._estado = (dados, versao)
+    
+    def salvar_snapshot(self):
+        """
+        Grava o histórico atual no arquivo de snapshot, se habilitado
+        """
+        if self.caminho_snapshot:
+            self.obter()
+            dados, versao = self._estado
+            if dados is not None and versao is not None:
+                self._gravar_snapshot(dados, versao)
+    
+    def _gravar_snapshot(self, dados: HistoricoCompacto, versao):
+        """
+        Grava a visão informada no arquivo de snapshot
+        
+        Args:
+            dados: Histórico a gravar
+            versao: Versão dos dados do banco a que o histórico corresponde
+        """
+        try:
+            salvar_snapshot(
+                self.caminho_snapshot,
+                (
+                    struct.pack(f'<{len(dados)}I', *dados.numeros),
+                    bytes(dados.ordem),
+                    bytes(dados.ordenadas),
+                    bytes(dados.mascaras)
+                ),
+                len(dados),
+                dados.ultimo or 0,
+                versao[1]
+            )
+        except OSError as e:
+            print(f"Erro ao gravar snapshot {self.caminho_snapshot}: {e}")
+    
+    def _carregar(self, versao) -> HistoricoCompacto:
+        """
+        Carrega o histórico completo, preferindo o snapshot mapeado em memória
+        
+        O snapshot só é usado se tiver sido gravado na mesma versão dos
+        dados do banco; caso contrário (inclusive quando um concurso foi
+        substituído sem mudar a quantidade nem o último), o histórico é lido
+        do banco e o snapshot é regravado.
+        
+        Args:
+            versao: Versão dos dados lida antes da carga (None se indisponível)
+            
+        Returns:
+            Nova visão compacta
+        """
+        if self.caminho_snapshot and versao is not None:
+            snapshot = self._abrir_snapshot()
+            if snapshot is not None:
+                dados, versao_snapshot = snapshot
+                if versao_snapshot == versao[1] and dados.ultimo == versao[0]:
+                    return dados
+        
+        dados = HistoricoCompacto.de_registros(reversed(self.resultado_model.buscar_dezenas()))
+        
+        if self.caminho_snapshot and versao is not None:
+            self._gravar_snapshot(dados, versao)
+        
+        return dados
+    
+    def _abrir_snapshot(self) -> Optional[Tuple[HistoricoCompacto, int]]:
+        """
+        Abre o snapshot via mmap, sem copiar os blocos
+        
+        Returns:
+            Tupla (visão apoiada no mapeamento, versão dos dados gravada no
+            snapshot) ou None se o snapshot for inválido
+        """
+        snapshot = abrir_snapshot(
+            self.caminho_snapshot,
+            (BYTES_NUMERO, DEZENAS_POR_CONCURSO, DEZENAS_POR_CONCURSO, BYTES_MASCARA)
+        )
+        if snapshot is None:
+            return None
+        
+        total, _, versao, (numeros, ordem, ordenadas, mascaras) = snapshot
+        
+        if sys.byteorder == 'little' and array('I').itemsize == BYTES_NUMERO:
+            numeros = numeros.cast('I')
+        else:
+            numeros = array('I', struct.unpack(f'<{total}I', numeros))
+        
+        return HistoricoCompacto(numeros, ordem, ordenadas, mascaras), versao
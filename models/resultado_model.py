@@ -3,8 +3,66 @@ Model para gerenciar os resultados da QUINA no banco de dados SQLite
 """
 import sqlite3
 import json
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 import config
+from models.conexao import GerenciadorConexoes
+
+
+# Versão do esquema gravada em PRAGMA user_version
+VERSAO_ESQUEMA = 2
+
+SQL_INSERIR_RESULTADO = """
+    INSERT OR REPLACE INTO resultados (
+        numero, acumulado, dataApuracao, dataProximoConcurso,
+        dezenasSorteadasOrdemSorteio, exibirDetalhamentoPorCidade,
+        indicadorConcursoEspecial, listaDezenas, listaDezenasSegundoSorteio,
+        listaMunicipioUFGanhadores, listaRateioPremio, localSorteio,
+        nomeMunicipioUFSorteio, numeroConcursoAnterior, numeroConcursoFinal_0_5,
+        numeroConcursoProximo, numeroJogo, tipoJogo, valorArrecadado,
+        valorAcumuladoConcurso_0_5, valorAcumuladoConcursoEspecial,
+        valorAcumuladoProximoConcurso, valorEstimadoProximoConcurso
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_INSERIR_DEZENA = """
+    INSERT INTO dezenas (concurso, posicao_sorteio, posicao_ordenada, dezena)
+    VALUES (?, ?, ?, ?)
+"""
+
+# Versão dos dados, incrementada a cada escrita em resultados ou nos agregados
+CHAVE_VERSAO_DADOS = 'versao_dados'
+
+SQL_INCREMENTAR_VERSAO = f"""
+    INSERT INTO metadados (chave, valor) VALUES ('{CHAVE_VERSAO_DADOS}', 1)
+    ON CONFLICT (chave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1
+"""
+
+# Colunas da tabela resultados, na ordem de criação
+COLUNAS_RESULTADO = (
+    'numero', 'acumulado', 'dataApuracao', 'dataProximoConcurso',
+    'dezenasSorteadasOrdemSorteio', 'exibirDetalhamentoPorCidade',
+    'indicadorConcursoEspecial', 'listaDezenas', 'listaDezenasSegundoSorteio',
+    'listaMunicipioUFGanhadores', 'listaRateioPremio', 'localSorteio',
+    'nomeMunicipioUFSorteio', 'numeroConcursoAnterior', 'numeroConcursoFinal_0_5',
+    'numeroConcursoProximo', 'numeroJogo', 'tipoJogo', 'valorArrecadado',
+    'valorAcumuladoConcurso_0_5', 'valorAcumuladoConcursoEspecial',
+    'valorAcumuladoProximoConcurso', 'valorEstimadoProximoConcurso'
+)
+
+
+class DezenasConcurso(NamedTuple):
+    """
+    Registro leve com as dezenas de um concurso
+    
+    Attributes:
+        numero: Número do concurso
+        dezenas: Dezenas sorteadas em ordem crescente
+        ordem_sorteio: Dezenas na ordem do sorteio (vazia se indisponível)
+    """
+    numero: int
+    dezenas: Tuple[int, ...]
+    ordem_sorteio: Tuple[int, ...]
 
 
 class ResultadoModel:
@@ -20,13 +78,22 @@ class ResultadoModel:
             db_path: Caminho do banco de dados SQLite
         """
         self.db_path = db_path or config.DATABASE_PATH
-        self._criar_tabela()
+        GerenciadorConexoes.executar_uma_vez(self.db_path, self._criar_tabela)
+    
+    def _conexao(self) -> sqlite3.Connection:
+        """
+        Retorna a conexão compartilhada da thread atual
+        
+        Returns:
+            Conexão SQLite gerenciada por GerenciadorConexoes
+        """
+        return GerenciadorConexoes.obter(self.db_path)
     
     def _criar_tabela(self):
         """
         Cria a tabela de resultados se não existir
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._conexao() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS resultados (
@@ -55,8 +122,231 @@ class ResultadoModel:
                     valorEstimadoProximoConcurso REAL
                 )
             """)
+            
+            # Tabela normalizada com uma linha por dezena sorteada.
+            # posicao_sorteio fica NULL quando a ordem do sorteio não está disponível.
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS dezenas (
+                    concurso INTEGER NOT NULL,
+                    posicao_sorteio INTEGER,
+                    posicao_ordenada INTEGER NOT NULL,
+                    dezena INTEGER NOT NULL,
+                    PRIMARY KEY (concurso, posicao_ordenada)
+                ) WITHOUT ROWID
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_dezenas_dezena
+                ON dezenas (dezena, concurso)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_dezenas_posicao_sorteio
+                ON dezenas (posicao_sorteio, dezena)
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_dezenas_posicao_ordenada
+                ON dezenas (posicao_ordenada, dezena)
+            """)
+            
+            # Agregados materializados, mantidos pelos gatilhos da tabela dezenas
+            # na mesma transação de cada inserção/substituição de concurso
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS agregado_dezenas (
+                    dezena INTEGER PRIMARY KEY,
+                    frequencia INTEGER NOT NULL,
+                    ultimo_concurso INTEGER
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS agregado_posicoes (
+                    posicao INTEGER NOT NULL,
+                    dezena INTEGER NOT NULL,
+                    frequencia INTEGER NOT NULL,
+                    ultimo_concurso INTEGER,
+                    PRIMARY KEY (posicao, dezena)
+                ) WITHOUT ROWID
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_dezenas_inserir
+                AFTER INSERT ON dezenas
+                BEGIN
+                    INSERT INTO agregado_dezenas (dezena, frequencia, ultimo_concurso)
+                    VALUES (NEW.dezena, 1, NEW.concurso)
+                    ON CONFLICT (dezena) DO UPDATE SET
+                        frequencia = frequencia + 1,
+                        ultimo_concurso = MAX(IFNULL(ultimo_concurso, 0), excluded.ultimo_concurso);
+                        
+                    INSERT INTO agregado_posicoes (posicao, dezena, frequencia, ultimo_concurso)
+                    SELECT NEW.posicao_sorteio, NEW.dezena, 1, NEW.concurso
+                    WHERE NEW.posicao_sorteio IS NOT NULL
+                    ON CONFLICT (posicao, dezena) DO UPDATE SET
+                        frequencia = frequencia + 1,
+                        ultimo_concurso = MAX(IFNULL(ultimo_concurso, 0), excluded.ultimo_concurso);
+                END
+            """)
+            # Na remoção, o último concurso só é recalculado (via índice) se
+            # o concurso removido era o mais recente da dezena
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_dezenas_remover
+                AFTER DELETE ON dezenas
+                BEGIN
+                    UPDATE agregado_dezenas SET
+                        frequencia = frequencia - 1,
+                        ultimo_concurso = CASE
+                            WHEN ultimo_concurso = OLD.concurso THEN (
+                                SELECT MAX(concurso) FROM dezenas WHERE dezena = OLD.dezena
+                            )
+                            ELSE ultimo_concurso
+                        END
+                    WHERE dezena = OLD.dezena;
+                    
+                    UPDATE agregado_posicoes SET
+                        frequencia = frequencia - 1,
+                        ultimo_concurso = CASE
+                            WHEN ultimo_concurso = OLD.concurso THEN (
+                                SELECT MAX(concurso) FROM dezenas
+                                WHERE posicao_sorteio = OLD.posicao_sorteio AND dezena = OLD.dezena
+                            )
+                            ELSE ultimo_concurso
+                        END
+                    WHERE posicao = OLD.posicao_sorteio AND dezena = OLD.dezena;
+                END
+            """)
+            
+            # Pares chave/valor de controle (ex.: checkpoint da sincronização)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS metadados (
+                    chave TEXT PRIMARY KEY,
+                    valor TEXT
+                )
+            """)
+            
+            # Qualquer escrita em resultados invalida as respostas em cache,
+            # inclusive as feitas por outros processos
+            for evento in ('INSERT', 'UPDATE', 'DELETE'):
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS trg_resultados_versao_{evento.lower()}
+                    AFTER {evento} ON resultados
+                    BEGIN
+                        {SQL_INCREMENTAR_VERSAO};
+                    END
+                """)
+            
+            self._migrar(cursor)
             conn.commit()
     
+    def _migrar(self, cursor: sqlite3.Cursor):
+        """
+        Aplica as migrações pendentes em bancos criados por versões anteriores
+        
+        Args:
+            cursor: Cursor da conexão em que o esquema está sendo criado
+        """
+        versao = cursor.execute("PRAGMA user_version").fetchone()[0]
+        
+        if versao < 1:
+            # Popula a tabela dezenas a partir das colunas JSON existentes
+            cursor.execute("DELETE FROM dezenas")
+            cursor.execute(
+                "SELECT numero, listaDezenas, dezenasSorteadasOrdemSorteio FROM resultados"
+            )
+            linhas = []
+            for numero, lista_dezenas, dezenas_ordem in cursor.fetchall():
+                linhas.extend(self._linhas_dezenas({
+                    'numero': numero,
+                    'listaDezenas': json.loads(lista_dezenas) if lista_dezenas else [],
+                    'dezenasSorteadasOrdemSorteio': json.loads(dezenas_ordem) if dezenas_ordem else []
+                }))
+            cursor.executemany(SQL_INSERIR_DEZENA, linhas)
+        
+        if versao < 2:
+            # Agregados materializados a partir das dezenas já gravadas
+            self._reconstruir_agregados(cursor)
+        
+        cursor.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+    
+    @staticmethod
+    def _reconstruir_agregados(cursor: sqlite3.Cursor):
+        """
+        Recalcula as tabelas de agregados a partir da tabela dezenas
+        
+        Args:
+            cursor: Cursor dentro da transação em que a reconstrução ocorre
+        """
+        cursor.execute("DELETE FROM agregado_dezenas")
+        cursor.execute("""
+            INSERT INTO agregado_dezenas (dezena, frequencia, ultimo_concurso)
+            SELECT dezena, COUNT(*), MAX(concurso)
+            FROM dezenas
+            GROUP BY dezena
+        """)
+        cursor.execute("DELETE FROM agregado_posicoes")
+        cursor.execute("""
+            INSERT INTO agregado_posicoes (posicao, dezena, frequencia, ultimo_concurso)
+            SELECT posicao_sorteio, dezena, COUNT(*), MAX(concurso)
+            FROM dezenas
+            WHERE posicao_sorteio IS NOT NULL
+            GROUP BY posicao_sorteio, dezena
+        """)
+        cursor.execute(SQL_INCREMENTAR_VERSAO)
+    
+    @staticmethod
+    def validar_resultado(resultado) -> Optional[str]:
+        """
+        Valida os campos de um resultado da API usados na gravação
+        
+        Args:
+            resultado: Objeto decodificado do JSON da API
+            
+        Returns:
+            Mensagem de erro ou None se o resultado pode ser gravado
+        """
+        if not isinstance(resultado, dict):
+            return 'Resultado deve ser um objeto'
+        
+        numero = resultado.get('numero')
+        if not isinstance(numero, int) or isinstance(numero, bool) or numero < 1:
+            return f'Número de concurso inválido: {numero!r}'
+        
+        for campo, obrigatorio in (('listaDezenas', True), ('dezenasSorteadasOrdemSorteio', False)):
+            dezenas = resultado.get(campo)
+            if not dezenas and not obrigatorio:
+                continue
+            if not isinstance(dezenas, list) or len(dezenas) != 5:
+                return f'Concurso {numero}: {campo} deve ter 5 dezenas'
+            try:
+                valores = {int(d) for d in dezenas}
+            except (TypeError, ValueError):
+                return f'Concurso {numero}: {campo} com dezena inválida: {dezenas!r}'
+            if len(valores) != 5 or not all(config.MIN_NUMEROS <= d <= config.MAX_NUMEROS for d in valores):
+                return f'Concurso {numero}: {campo} deve ter 5 dezenas distintas entre 1 e 80'
+        
+        return None
+    
+    @staticmethod
+    def _linhas_dezenas(resultado: Dict) -> List[Tuple]:
+        """
+        Monta as linhas da tabela dezenas para um resultado da API
+        
+        Args:
+            resultado: Dicionário com os dados do resultado da API
+            
+        Returns:
+            Lista de tuplas (concurso, posicao_sorteio, posicao_ordenada, dezena)
+        """
+        numero = resultado.get('numero')
+        dezenas = sorted(int(d) for d in resultado.get('listaDezenas') or [])
+        ordem = [int(d) for d in resultado.get('dezenasSorteadasOrdemSorteio') or []]
+        
+        # Só considera a ordem do sorteio quando ela está completa
+        posicao_sorteio = {}
+        if len(ordem) == 5:
+            posicao_sorteio = {dezena: idx for idx, dezena in enumerate(ordem, start=1)}
+        
+        return [
+            (numero, posicao_sorteio.get(dezena), idx, dezena)
+            for idx, dezena in enumerate(dezenas, start=1)
+        ]
+    
     def inserir(self, resultado: Dict) -> bool:
         """
         Insere ou atualiza um resultado no banco de dados
@@ -67,59 +357,200 @@ class ResultadoModel:
         Returns:
             True se inseriu/atualizou com sucesso, False caso contrário
         """
+        erro = self.validar_resultado(resultado)
+        if erro:
+            print(f"Resultado ignorado: {erro}")
+            return False
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._conexao() as conn:
                 cursor = conn.cursor()
+                cursor.execute(SQL_INSERIR_RESULTADO, self._parametros_resultado(resultado))
                 
-                # Converte listas e dicts para JSON
-                dezenas_ordem = json.dumps(resultado.get('dezenasSorteadasOrdemSorteio', []))
-                lista_dezenas = json.dumps(resultado.get('listaDezenas', []))
-                lista_dezenas_segundo = json.dumps(resultado.get('listaDezenasSegundoSorteio'))
-                lista_municipios = json.dumps(resultado.get('listaMunicipioUFGanhadores', []))
-                lista_rateio = json.dumps(resultado.get('listaRateioPremio', []))
-                
-                cursor.execute("""
-                    INSERT OR REPLACE INTO resultados (
-                        numero, acumulado, dataApuracao, dataProximoConcurso,
-                        dezenasSorteadasOrdemSorteio, exibirDetalhamentoPorCidade,
-                        indicadorConcursoEspecial, listaDezenas, listaDezenasSegundoSorteio,
-                        listaMunicipioUFGanhadores, listaRateioPremio, localSorteio,
-                        nomeMunicipioUFSorteio, numeroConcursoAnterior, numeroConcursoFinal_0_5,
-                        numeroConcursoProximo, numeroJogo, tipoJogo, valorArrecadado,
-                        valorAcumuladoConcurso_0_5, valorAcumuladoConcursoEspecial,
-                        valorAcumuladoProximoConcurso, valorEstimadoProximoConcurso
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    resultado.get('numero'),
-                    resultado.get('acumulado'),
-                    resultado.get('dataApuracao'),
-                    resultado.get('dataProximoConcurso'),
-                    dezenas_ordem,
-                    resultado.get('exibirDetalhamentoPorCidade'),
-                    resultado.get('indicadorConcursoEspecial'),
-                    lista_dezenas,
-                    lista_dezenas_segundo,
-                    lista_municipios,
-                    lista_rateio,
-                    resultado.get('localSorteio'),
-                    resultado.get('nomeMunicipioUFSorteio'),
-                    resultado.get('numeroConcursoAnterior'),
-                    resultado.get('numeroConcursoFinal_0_5'),
-                    resultado.get('numeroConcursoProximo'),
-                    resultado.get('numeroJogo'),
-                    resultado.get('tipoJogo'),
-                    resultado.get('valorArrecadado'),
-                    resultado.get('valorAcumuladoConcurso_0_5'),
-                    resultado.get('valorAcumuladoConcursoEspecial'),
-                    resultado.get('valorAcumuladoProximoConcurso'),
-                    resultado.get('valorEstimadoProximoConcurso')
-                ))
+                # Mantém a tabela normalizada em sincronia
+                cursor.execute(
+                    "DELETE FROM dezenas WHERE concurso = ?",
+                    (resultado.get('numero'),)
+                )
+                cursor.executemany(SQL_INSERIR_DEZENA, self._linhas_dezenas(resultado))
                 conn.commit()
                 return True
         except Exception as e:
             print(f"Erro ao inserir resultado: {e}")
             return False
     
+    def inserir_lote(
+        self,
+        resultados: Iterable[Dict],
+        tamanho_lote: int = None,
+        wal: bool = False,
+        synchronous: str = None,
+        gravados: Optional[List[Dict]] = None
+    ) -> int:
+        """
+        Insere ou atualiza vários resultados em uma única transação
+        
+        Os resultados são consumidos em blocos de tamanho_lote e gravados
+        com executemany, de modo que o iterável pode ser um gerador. Cada
+        resultado é validado e convertido antes da gravação (os inválidos
+        são ignorados); se um bloco ainda assim falhar, ele é desfeito até
+        o savepoint e regravado linha a linha, perdendo só as linhas com erro.
+        
+        Args:
+            resultados: Iterável de dicionários com os dados dos resultados da API
+            tamanho_lote: Quantidade de resultados por executemany
+            wal: Se True, coloca o banco em journal_mode=WAL
+            synchronous: Valor de PRAGMA synchronous durante o lote
+                         (OFF, NORMAL, FULL ou EXTRA)
+            gravados: Lista opcional que recebe os resultados efetivamente gravados
+            
+        Returns:
+            Quantidade de resultados gravados (0 em caso de erro, com rollback)
+        """
+        tamanho_lote = tamanho_lote or config.DATABASE_TAMANHO_LOTE
+        
+        if synchronous and synchronous.upper() not in ('OFF', 'NORMAL', 'FULL', 'EXTRA'):
+            print(f"Valor inválido para PRAGMA synchronous: {synchronous}")
+            return 0
+        
+        conn = self._conexao()
+        synchronous_anterior = None
+        
+        if wal:
+            conn.execute("PRAGMA journal_mode = WAL")
+        if synchronous:
+            # A conexão é compartilhada: o valor anterior é restaurado no final
+            synchronous_anterior = conn.execute("PRAGMA synchronous").fetchone()[0]
+            conn.execute(f"PRAGMA synchronous = {synchronous.upper()}")
+        
+        total = 0
+        gravados_transacao = []
+        try:
+            with conn:
+                cursor = conn.cursor()
+                iterador = iter(resultados)
+                
+                # Transação explícita: sem ela, o RELEASE do savepoint externo
+                # equivaleria a um COMMIT por bloco
+                if not conn.in_transaction:
+                    cursor.execute("BEGIN")
+                
+                while True:
+                    lote = list(islice(iterador, tamanho_lote))
+                    if not lote:
+                        break
+                    
+                    preparados = [
+                        linha for linha in (self._preparar(resultado) for resultado in lote)
+                        if linha is not None
+                    ]
+                    if not preparados:
+                        continue
+                    
+                    cursor.execute("SAVEPOINT lote")
+                    try:
+                        self._gravar_preparados(cursor, preparados)
+                    except sqlite3.Error as e:
+                        print(f"Erro ao gravar lote, gravando linha a linha: {e}")
+                        cursor.execute("ROLLBACK TO lote")
+                        gravados_lote = []
+                        for preparado in preparados:
+                            cursor.execute("SAVEPOINT linha")
+                            try:
+                                self._gravar_preparados(cursor, [preparado])
+                            except sqlite3.Error as e:
+                                print(f"Erro ao inserir concurso {preparado[0].get('numero')}: {e}")
+                                cursor.execute("ROLLBACK TO linha")
+                            else:
+                                gravados_lote.append(preparado)
+                            cursor.execute("RELEASE linha")
+                    else:
+                        gravados_lote = preparados
+                    cursor.execute("RELEASE lote")
+                    
+                    total += len(gravados_lote)
+                    gravados_transacao.extend(resultado for resultado, _, _ in gravados_lote)
+                
+                conn.commit()
+        except Exception as e:
+            print(f"Erro ao inserir lote de resultados: {e}")
+            return 0
+        finally:
+            if synchronous_anterior is not None:
+                conn.execute(f"PRAGMA synchronous = {synchronous_anterior}")
+        
+        if gravados is not None:
+            gravados.extend(gravados_transacao)
+        return total
+    
+    def _preparar(self, resultado) -> Optional[Tuple[Dict, Tuple, List[Tuple]]]:
+        """
+        Valida e converte um resultado para gravação
+        
+        Args:
+            resultado: Objeto decodificado do JSON da API
+            
+        Returns:
+            Tupla (resultado, parâmetros de resultados, linhas de dezenas) ou
+            None se o resultado for inválido
+        """
+        erro = self.validar_resultado(resultado)
+        if erro:
+            print(f"Resultado ignorado: {erro}")
+            return None
+        return resultado, self._parametros_resultado(resultado), self._linhas_dezenas(resultado)
+    
+    @staticmethod
+    def _gravar_preparados(cursor: sqlite3.Cursor, preparados: List[Tuple]):
+        """
+        Grava resultados já convertidos por _preparar (dentro da transação
+        do chamador)
+        """
+        cursor.executemany(SQL_INSERIR_RESULTADO, [parametros for _, parametros, _ in preparados])
+        cursor.executemany(
+            "DELETE FROM dezenas WHERE concurso = ?",
+            [(resultado['numero'],) for resultado, _, _ in preparados]
+        )
+        cursor.executemany(SQL_INSERIR_DEZENA, [linha for _, _, linhas in preparados for linha in linhas])
+    
+    @staticmethod
+    def _parametros_resultado(resultado: Dict) -> Tuple:
+        """
+        Monta os parâmetros do INSERT na tabela resultados
+        
+        Args:
+            resultado: Dicionário com os dados do resultado da API
+            
+        Returns:
+            Tupla na ordem das colunas de SQL_INSERIR_RESULTADO
+        """
+        # Converte listas e dicts para JSON
+        return (
+            resultado.get('numero'),
+            resultado.get('acumulado'),
+            resultado.get('dataApuracao'),
+            resultado.get('dataProximoConcurso'),
+            json.dumps(resultado.get('dezenasSorteadasOrdemSorteio', [])),
+            resultado.get('exibirDetalhamentoPorCidade'),
+            resultado.get('indicadorConcursoEspecial'),
+            json.dumps(resultado.get('listaDezenas', [])),
+            json.dumps(resultado.get('listaDezenasSegundoSorteio')),
+            json.dumps(resultado.get('listaMunicipioUFGanhadores', [])),
+            json.dumps(resultado.get('listaRateioPremio', [])),
+            resultado.get('localSorteio'),
+            resultado.get('nomeMunicipioUFSorteio'),
+            resultado.get('numeroConcursoAnterior'),
+            resultado.get('numeroConcursoFinal_0_5'),
+            resultado.get('numeroConcursoProximo'),
+            resultado.get('numeroJogo'),
+            resultado.get('tipoJogo'),
+            resultado.get('valorArrecadado'),
+            resultado.get('valorAcumuladoConcurso_0_5'),
+            resultado.get('valorAcumuladoConcursoEspecial'),
+            resultado.get('valorAcumuladoProximoConcurso'),
+            resultado.get('valorEstimadoProximoConcurso')
+        )
+    
     def buscar_ultimo(self) -> Optional[Dict]:
         """
         Busca o último resultado cadastrado
@@ -128,8 +559,7 @@ class ResultadoModel:
             Dicionário com o último resultado ou None se não houver resultados
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._conexao() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM resultados ORDER BY numero DESC LIMIT 1")
                 row = cursor.fetchone()
@@ -141,28 +571,38 @@ class ResultadoModel:
             print(f"Erro ao buscar último resultado: {e}")
             return None
     
-    def buscar_todos(self, limite: Optional[int] = None) -> List[Dict]:
+    def buscar_todos(
+        self,
+        limite: Optional[int] = None,
+        campos: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
         """
         Busca todos os resultados, opcionalmente limitando a quantidade
         
         Args:
             limite: Número máximo de resultados a retornar
-            
+            campos: Colunas a selecionar. Se None, seleciona todas.
+                    Somente as colunas JSON selecionadas são decodificadas.
+                    
         Returns:
             Lista de dicionários com os resultados
+            
+        Raises:
+            ValueError: Se algum campo não for uma coluna da tabela resultados
         """
+        projecao = self._projecao(campos)
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._conexao() as conn:
                 cursor = conn.cursor()
                 
                 if limite:
                     cursor.execute(
-                        "SELECT * FROM resultados ORDER BY numero DESC LIMIT ?",
+                        f"SELECT {projecao} FROM resultados ORDER BY numero DESC LIMIT ?",
                         (limite,)
                     )
                 else:
-                    cursor.execute("SELECT * FROM resultados ORDER BY numero DESC")
+                    cursor.execute(f"SELECT {projecao} FROM resultados ORDER BY numero DESC")
                 
                 rows = cursor.fetchall()
                 return [self._row_to_dict(row) for row in rows]
@@ -170,6 +610,397 @@ class ResultadoModel:
             print(f"Erro ao buscar todos os resultados: {e}")
             return []
     
+    def buscar_pagina(
+        self,
+        limite: Optional[int] = None,
+        antes_de: Optional[int] = None,
+        campos: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        """
+        Busca uma página de resultados por paginação de chave (keyset)
+        
+        Usa a chave primária como cursor: a próxima página é obtida passando
+        o número do último concurso recebido em antes_de.
+        
+        Args:
+            limite: Número máximo de resultados da página (None para todos)
+            antes_de: Retorna apenas concursos com número menor que este
+            campos: Colunas a selecionar. Se None, seleciona todas.
+            
+        Returns:
+            Lista de dicionários com os resultados, do mais recente ao mais antigo
+            
+        Raises:
+            ValueError: Se algum campo não for uma coluna da tabela resultados
+        """
+        projecao = self._projecao(campos)
+        
+        try:
+            with self._conexao() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"SELECT {projecao} FROM resultados WHERE numero < ? "
+                    "ORDER BY numero DESC LIMIT ?",
+                    (
+                        antes_de if antes_de is not None else 2 ** 62,
+                        limite if limite else -1
+                    )
+                )
+                return [self._row_to_dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Erro ao buscar página de resultados: {e}")
+            return []
+    
+    def iterar_todos(
+        self,
+        antes_de: Optional[int] = None,
+        campos: Optional[Sequence[str]] = None,
+        tamanho_bloco: int = 200
+    ) -> Iterator[Dict]:
+        """
+        Percorre os resultados à medida que o SQLite os entrega, sem
+        materializar o histórico inteiro em memória
+        
+        Args:
+            antes_de: Começa pelos concursos com número menor que este
+            campos: Colunas a selecionar. Se None, seleciona todas.
+            tamanho_bloco: Quantidade de linhas lidas por fetchmany
+            
+        Yields:
+            Dicionários com os resultados, do mais recente ao mais antigo
+            
+        Raises:
+            ValueError: Se algum campo não for uma coluna da tabela resultados
+        """
+        projecao = self._projecao(campos)
+        
+        cursor = self._conexao().cursor()
+        try:
+            cursor.execute(
+                f"SELECT {projecao} FROM resultados WHERE numero < ? ORDER BY numero DESC",
+                (antes_de if antes_de is not None else 2 ** 62,)
+            )
+            while True:
+                rows = cursor.fetchmany(tamanho_bloco)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._row_to_dict(row)
+        finally:
+            cursor.close()
+    
+    def buscar_dezenas(self, apos: Optional[int] = None) -> List[DezenasConcurso]:
+        """
+        Busca apenas as dezenas de todos os concursos, a partir da tabela
+        normalizada, sem decodificar nenhuma coluna JSON
+        
+        Args:
+            apos: Se informado, busca apenas concursos com número maior
+            
+        Returns:
+            Lista de DezenasConcurso do mais recente ao mais antigo
+        """
+        try:
+            with self._conexao() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT r.numero, d.posicao_sorteio, d.dezena
+                    FROM resultados r
+                    LEFT JOIN dezenas d ON d.concurso = r.numero
+                    WHERE r.numero > ?
+                    ORDER BY r.numero DESC, d.posicao_ordenada
+                """, (apos if apos is not None else -1,))
+                
+                registros = []
+                numero_atual = None
+                dezenas = []
+                ordem = []
+                
+                for numero, posicao_sorteio, dezena in cursor:
+                    if numero != numero_atual:
+                        if numero_atual is not None:
+                            registros.append(self._registro_dezenas(numero_atual, dezenas, ordem))
+                        numero_atual = numero
+                        dezenas = []
+                        ordem = []
+                    
+                    if dezena is not None:
+                        dezenas.append(dezena)
+                        if posicao_sorteio is not None:
+                            ordem.append((posicao_sorteio, dezena))
+                
+                if numero_atual is not None:
+                    registros.append(self._registro_dezenas(numero_atual, dezenas, ordem))
+                
+                return registros
+        except Exception as e:
+            print(f"Erro ao buscar dezenas: {e}")
+            return []
+    
+    def buscar_concursos_faltantes(self, ate: int) -> List[int]:
+        """
+        Busca os números de concurso entre 1 e ate que não estão no banco
+        
+        Args:
+            ate: Último número de concurso considerado
+            
+        Returns:
+            Lista crescente com os números ausentes
+        """
+        try:
+            with self._conexao() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    WITH RECURSIVE sequencia(n) AS (
+                        SELECT 1 WHERE ? >= 1
+                        UNION ALL
+                        SELECT n + 1 FROM sequencia WHERE n < ?
+                    )
+                    SELECT n FROM sequencia
+                    WHERE NOT EXISTS (SELECT 1 FROM resultados WHERE numero = n)
+                """, (ate, ate))
+                return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Erro ao buscar concursos faltantes: {e}")
+            return []
+    
+    def buscar_versao_dados(self) -> Optional[Tuple[Optional[int], int]]:
+        """
+        Busca a identificação da versão atual dos dados
+        
+        Returns:
+            Tupla (número do último concurso, contador de escritas), que muda
+            sempre que um concurso é inserido, substituído ou removido,
+            ou None em caso de erro
+        """
+        try:
+            with self._conexao() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT (SELECT MAX(numero) FROM resultados), "
+                    "(SELECT valor FROM metadados WHERE chave = ?)",
+                    (CHAVE_VERSAO_DADOS,)
+                )
+                ultimo, versao = cursor.fetchone()
+                return ultimo, int(versao or 0)
+        except Exception as e:
+            print(f"Erro ao buscar versão dos dados: {e}")
+            return None
+    
+    def obter_metadado(self, chave: str) -> Optional[str]:
+        """
+        Busca um valor da tabela de metadados
+        
+        Args:
+            chave: Nome do metadado
+            
+        Returns:
+            Valor armazenado ou None se não existir
+        """
+        try:
+            with self._conexao() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT valor FROM metadados WHERE chave = ?", (chave,))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            print(f"Erro ao buscar metadado {chave}: {e}")
+            return None
+    
+    def salvar_metadado(self, chave: str, valor: Optional[str]) -> bool:
+        """
+        Grava um valor na tabela de metadados (None remove a chave)
+        
+        Args:
+            chave: Nome do metadado
+            valor: Valor a gravar
+            
+        Returns:
+            True se gravou com sucesso, False caso contrário
+        """
+        try:
+            with self._conexao() as conn:
+                cursor = conn.cursor()
+                if valor is None:
+                    cursor.execute("DELETE FROM metadados WHERE chave = ?", (chave,))
+                else:
+                    cursor.execute(
+                        "INSERT OR REPLACE INTO metadados (chave, valor) VALUES (?, ?)",
+                        (chave, valor)
+                    )
+                conn.commit()
+                return True
+        except Exception as e:
+            print(f"Erro ao gravar metadado {chave}: {e}")
+            return False
+    
+    def buscar_agregados(self) -> Optional[Dict]:
+        """
+        Lê os agregados materializados em uma única transação de leitura
+        
+        O atraso de cada dezena é a quantidade de concursos posteriores ao
+        último em que ela saiu, contada pela chave primária de resultados.
+        
+        Returns:
+            Dicionário com:
+            - total_concursos: Quantidade de concursos
+            - dezenas: Tuplas (dezena, frequencia, atraso) das dezenas já sorteadas
+            - posicoes: Tuplas (posicao, dezena, frequencia), por posição e da
+              dezena vista mais recentemente na posição para a mais antiga
+            ou None em caso de erro
+        """
+        conn = self._conexao()
+        try:
+            # Transação explícita para que as três leituras vejam o mesmo estado
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            try:
+                total = conn.execute("SELECT COUNT(*) FROM resultados").fetchone()[0]
+                dezenas = conn.execute("""
+                    SELECT a.dezena, a.frequencia, (
+                        SELECT COUNT(*) FROM resultados r WHERE r.numero > a.ultimo_concurso
+                    )
+                    FROM agregado_dezenas a
+                    WHERE a.frequencia > 0
+                    ORDER BY a.dezena
+                """).fetchall()
+                posicoes = conn.execute("""
+                    SELECT posicao, dezena, frequencia
+                    FROM agregado_posicoes
+                    WHERE frequencia > 0
+                    ORDER BY posicao, ultimo_concurso DESC
+                """).fetchall()
+            finally:
+                conn.commit()
+            
+            return {
+                'total_concursos': total,
+                'dezenas': [tuple(linha) for linha in dezenas],
+                'posicoes': [tuple(linha) for linha in posicoes]
+            }
+        except Exception as e:
+            print(f"Erro ao buscar agregados: {e}")
+            return None
+    
+    def recalcular_agregados(self) -> Optional[Dict]:
+        """
+        Reconstrói as tabelas de agregados a partir da tabela dezenas e
+        informa quantas linhas divergiam do que estava gravado
+        
+        Returns:
+            Dicionário com dezenas_divergentes e posicoes_divergentes,
+            ou None em caso de erro
+        """
+        consulta_dezenas = """
+            SELECT dezena, frequencia, ultimo_concurso
+            FROM agregado_dezenas WHERE frequencia > 0
+        """
+        consulta_posicoes = """
+            SELECT posicao, dezena, frequencia, ultimo_concurso
+            FROM agregado_posicoes WHERE frequencia > 0
+        """
+        
+        try:
+            with self._conexao() as conn:
+                cursor = conn.cursor()
+                anteriores_dezenas = {tuple(linha[:1]): tuple(linha[1:]) for linha in cursor.execute(consulta_dezenas)}
+                anteriores_posicoes = {tuple(linha[:2]): tuple(linha[2:]) for linha in cursor.execute(consulta_posicoes)}
+                
+                self._reconstruir_agregados(cursor)
+                
+                novos_dezenas = {tuple(linha[:1]): tuple(linha[1:]) for linha in cursor.execute(consulta_dezenas)}
+                novos_posicoes = {tuple(linha[:2]): tuple(linha[2:]) for linha in cursor.execute(consulta_posicoes)}
+                conn.commit()
+                
+                return {
+                    'dezenas_divergentes': sum(
+                        1 for chave in anteriores_dezenas.keys() | novos_dezenas.keys()
+                        if anteriores_dezenas.get(chave) != novos_dezenas.get(chave)
+                    ),
+                    'posicoes_divergentes': sum(
+                        1 for chave in anteriores_posicoes.keys() | novos_posicoes.keys()
+                        if anteriores_posicoes.get(chave) != novos_posicoes.get(chave)
+                    )
+                }
+        except Exception as e:
+            print(f"Erro ao recalcular agregados: {e}")
+            return None
+    
+    def buscar_resumo(self) -> Tuple[int, Optional[int]]:
+        """
+        Busca a quantidade de concursos e o número do último concurso
+        
+        Returns:
+            Tupla (total de concursos, número do último concurso ou None)
+        """
+        try:
+            with self._conexao() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*), MAX(numero) FROM resultados")
+                total, ultimo = cursor.fetchone()
+                return total, ultimo
+        except Exception as e:
+            print(f"Erro ao buscar resumo dos resultados: {e}")
+            return 0, None
+    
+    @classmethod
+    def extrair_dezenas(cls, resultado: Dict) -> DezenasConcurso:
+        """
+        Extrai as dezenas de um resultado da API no mesmo formato de buscar_dezenas
+        
+        Args:
+            resultado: Dicionário com os dados do resultado da API
+            
+        Returns:
+            Registro com as dezenas do concurso
+        """
+        linhas = cls._linhas_dezenas(resultado)
+        return cls._registro_dezenas(
+            resultado.get('numero'),
+            [dezena for _, _, _, dezena in linhas],
+            [(posicao, dezena) for _, posicao, _, dezena in linhas if posicao is not None]
+        )
+    
+    @staticmethod
+    def _registro_dezenas(numero: int, dezenas: List[int], ordem: List[Tuple]) -> DezenasConcurso:
+        """
+        Monta um DezenasConcurso a partir das linhas da tabela dezenas
+        
+        Args:
+            numero: Número do concurso
+            dezenas: Dezenas em ordem crescente
+            ordem: Pares (posicao_sorteio, dezena)
+            
+        Returns:
+            Registro com as dezenas do concurso
+        """
+        ordem.sort()
+        return DezenasConcurso(
+            numero,
+            tuple(dezenas),
+            tuple(dezena for _, dezena in ordem)
+        )
+    
+    @staticmethod
+    def _projecao(campos: Optional[Sequence[str]]) -> str:
+        """
+        Monta a lista de colunas do SELECT validando os nomes informados
+        
+        Args:
+            campos: Colunas desejadas ou None para todas
+            
+        Returns:
+            Trecho SQL com as colunas
+        """
+        if not campos:
+            return '*'
+        
+        invalidos = [campo for campo in campos if campo not in COLUNAS_RESULTADO]
+        if invalidos:
+            raise ValueError(f"Campos inválidos: {', '.join(invalidos)}")
+        
+        return ', '.join(campos)
+    
     def buscar_por_numero(self, numero: int) -> Optional[Dict]:
         """
         Busca um resultado específico por número do concurso
@@ -181,8 +1012,7 @@ class ResultadoModel:
             Dicionário com o resultado ou None se não encontrado
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._conexao() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM resultados WHERE numero = ?", (numero,))
                 row = cursor.fetchone()
@@ -194,6 +1024,54 @@ class ResultadoModel:
             print(f"Erro ao buscar resultado por número: {e}")
             return None
     
+    def buscar_concursos_com_dezena(self, dezena: int) -> List[int]:
+        """
+        Busca os concursos em que uma dezena foi sorteada
+        
+        Args:
+            dezena: Dezena procurada (1-80)
+            
+        Returns:
+            Lista com os números dos concursos, do mais recente ao mais antigo
+        """
+        try:
+            with self._conexao() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT concurso FROM dezenas WHERE dezena = ? ORDER BY concurso DESC",
+                    (dezena,)
+                )
+                return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Erro ao buscar concursos com a dezena {dezena}: {e}")
+            return []
+    
+    def contar_dezena_na_posicao(self, dezena: int, posicao: int, ordenada: bool = False) -> int:
+        """
+        Conta quantas vezes uma dezena saiu em determinada posição
+        
+        Args:
+            dezena: Dezena procurada (1-80)
+            posicao: Posição de 1 a 5
+            ordenada: Se True, usa a posição na lista ordenada (k-ésima menor dezena).
+                      Se False, usa a posição na ordem do sorteio.
+                      
+        Returns:
+            Quantidade de concursos em que a dezena saiu na posição
+        """
+        coluna = 'posicao_ordenada' if ordenada else 'posicao_sorteio'
+        try:
+            with self._conexao() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM dezenas WHERE {coluna} = ? AND dezena = ?",
+                    (posicao, dezena)
+                )
+                return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"Erro ao contar dezena {dezena} na posição {posicao}: {e}")
+            return 0
+    
     def _row_to_dict(self, row: sqlite3.Row) -> Dict:
         """
         Converte uma linha do banco de dados para dicionário
@@ -0,0 +1,119 @@
+"""
+Snapshot binário de blocos de largura fixa, lido via mmap
+"""
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+
+# Cabeçalho: assinatura, versão do formato, tamanho do cabeçalho,
+# total de registros, último concurso, CRC32 dos blocos de dados e versão
+# dos dados do banco de que o snapshot foi gerado
+ASSINATURA = b'QNSN'
+VERSAO_FORMATO = 2
+CABECALHO = struct.Struct('<4sHHIIIQ')
+TAMANHO_CABECALHO = 32
+
+
+def salvar_snapshot(caminho: str, blocos: Sequence[bytes], total: int, ultimo: int, versao_dados: int):
+    """
+    Grava os blocos em um arquivo binário versionado
+    
+    O arquivo é escrito em um temporário e renomeado atomicamente, de modo
+    que processos com o snapshot anterior mapeado continuam lendo as
+    páginas antigas sem corrupção.
+    
+    Args:
+        caminho: Caminho do arquivo de snapshot
+        blocos: Blocos de dados, cada um com total registros de largura fixa
+        total: Quantidade de registros
+        ultimo: Número do último concurso contido no snapshot
+        versao_dados: Versão dos dados do banco correspondente aos blocos
+    """
+    crc = 0
+    for bloco in blocos:
+        crc = zlib.crc32(bloco, crc)
+    
+    cabecalho = CABECALHO.pack(
+        ASSINATURA,
+        VERSAO_FORMATO,
+        TAMANHO_CABECALHO,
+        total,
+        ultimo,
+        crc,
+        versao_dados
+    )
+    
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(prefix='.snapshot-', dir=diretorio)
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(cabecalho.ljust(TAMANHO_CABECALHO, b'\0'))
+            for bloco in blocos:
+                arquivo.write(bloco)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def abrir_snapshot(
+    caminho: str,
+    larguras: Sequence[int]
+) -> Optional[Tuple[int, int, int, List[memoryview]]]:
+    """
+    Abre um snapshot via mmap, sem copiar os dados
+    
+    Os blocos retornados são memoryviews sobre o mapeamento, compartilhado
+    entre todos os processos que abrirem o mesmo arquivo.
+    
+    Args:
+        caminho: Caminho do arquivo de snapshot
+        larguras: Largura em bytes de um registro em cada bloco
+        
+    Returns:
+        Tupla (total, último concurso, versão dos dados, blocos) ou None
+        se o arquivo não existir, for de outra versão ou estiver corrompido
+    """
+    if not os.path.exists(caminho):
+        return None
+    
+    try:
+        with open(caminho, 'rb') as arquivo:
+            if os.fstat(arquivo.fileno()).st_size < TAMANHO_CABECALHO:
+                return None
+            mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao abrir snapshot {caminho}: {e}")
+        return None
+    
+    assinatura, versao, tamanho_cabecalho, total, ultimo, crc, versao_dados = CABECALHO.unpack_from(mapa)
+    if assinatura != ASSINATURA or versao != VERSAO_FORMATO:
+        return None
+    
+    if tamanho_cabecalho + total * sum(larguras) != len(mapa):
+        print(f"Snapshot {caminho} com tamanho inconsistente")
+        return None
+    
+    visao = memoryview(mapa)
+    blocos = []
+    inicio = tamanho_cabecalho
+    for largura in larguras:
+        blocos.append(visao[inicio:inicio + total * largura])
+        inicio += total * largura
+    
+    verificacao = 0
+    for bloco in blocos:
+        verificacao = zlib.crc32(bloco, verificacao)
+    if verificacao != crc:
+        print(f"Snapshot {caminho} com checksum inválido")
+        return None
+    
+    return total, ultimo, versao_dados, blocos
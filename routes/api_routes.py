@@ -1,29 +1,83 @@
 """
 Rotas da API REST para o sistema de análise da QUINA
 """
-from flask import Blueprint, jsonify, request
-from services.api_caixa_service import ApiCaixaService
+import random
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from services.backtest_service import BacktestService
+from services.cache_service import CacheRespostas
+from services.combinatoria_service import CombinatoriaService
+from services.coocorrencia_service import MAX_COMBINACOES, MAX_PARCEIROS, CoocorrenciaService
 from services.estatistica_service import EstatisticaService
+from services.geracao_lote_service import FORMATOS, GeracaoLoteService
+from services.matrizes_posicionais import ORDENS
 from services.quina_service import QuinaService
+from services.sincronizacao_service import SincronizacaoService
 from models.resultado_model import ResultadoModel
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 # Inicializa serviços
-api_caixa = ApiCaixaService()
+sincronizacao = SincronizacaoService.instancia()
+api_caixa = sincronizacao.api_caixa
 estatistica = EstatisticaService()
+coocorrencia = CoocorrenciaService()
 quina = QuinaService()
+geracao_lote = GeracaoLoteService(quina)
+combinatoria = CombinatoriaService()
+backtest = BacktestService(quina)
 resultado_model = ResultadoModel()
+cache_respostas = CacheRespostas()
 
 
 @api_bp.route('/atualizar', methods=['POST'])
 def atualizar():
     """
-    Atualiza a base de dados com novos concursos da API da Caixa
+    Enfileira a atualização da base com novos concursos da API da Caixa
+    
+    A sincronização roda em segundo plano; a resposta traz o job (novo ou o
+    que já estava em andamento) e o cabeçalho Location aponta para o status.
     """
     try:
-        resultado = api_caixa.atualizar_base_completa()
-        return jsonify(resultado), 200
+        job = sincronizacao.enfileirar()
+        return jsonify(job), 202, {'Location': f"/api/atualizar/{job['id']}"}
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/atualizar/<job_id>', methods=['GET'])
+def status_atualizacao(job_id):
+    """
+    Retorna o progresso de um job de atualização
+    (status, total_processados, total_inseridos, total_erros, taxa, eta_segundos)
+    """
+    try:
+        job = sincronizacao.obter_job(job_id)
+        if job:
+            return jsonify(job), 200
+        else:
+            return jsonify({'mensagem': 'Job não encontrado'}), 404
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/cache', methods=['GET'])
+def estatisticas_cache():
+    """
+    Retorna os contadores do cache de respostas
+    """
+    try:
+        return jsonify(cache_respostas.estatisticas()), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/api-caixa/conexoes', methods=['GET'])
+def conexoes_api_caixa():
+    """
+    Retorna os contadores do pool de conexões com a API da Caixa
+    """
+    try:
+        return jsonify(api_caixa.estatisticas_conexoes()), 200
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -46,17 +100,75 @@ def ultimo_resultado():
 @api_bp.route('/resultados', methods=['GET'])
 def listar_resultados():
     """
-    Lista resultados com limite opcional
-    Query params: limite (int)
+    Lista resultados com limite opcional e paginação por cursor
+    Query params:
+        limite (int): tamanho da página
+        antes_de (int): retorna concursos anteriores a este número (cursor)
+        stream (str): 'ndjson' ou 'json' para transmitir o histórico linha a
+                      linha, em memória constante no servidor
+                      
+    Quando a página vem cheia, o cabeçalho X-Proximo-Antes-De traz o cursor
+    da próxima página.
     """
     try:
         limite = request.args.get('limite', type=int)
-        resultados = resultado_model.buscar_todos(limite=limite)
-        return jsonify(resultados), 200
+        antes_de = request.args.get('antes_de', type=int)
+        stream = request.args.get('stream')
+        
+        if stream:
+            if stream not in ('ndjson', 'json'):
+                return jsonify({'erro': "Parâmetro stream deve ser 'ndjson' ou 'json'"}), 400
+            return _transmitir_resultados(antes_de, ndjson=(stream == 'ndjson'))
+        
+        if antes_de is None:
+            resultados = resultado_model.buscar_todos(limite=limite)
+        else:
+            resultados = resultado_model.buscar_pagina(limite=limite, antes_de=antes_de)
+        
+        resposta = jsonify(resultados)
+        if limite and len(resultados) == limite:
+            resposta.headers['X-Proximo-Antes-De'] = str(resultados[-1]['numero'])
+        return resposta, 200
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
 
+def _transmitir_resultados(antes_de, ndjson: bool) -> Response:
+    """
+    Monta uma resposta em streaming que escreve os resultados à medida que
+    o SQLite os entrega
+    
+    Args:
+        antes_de: Cursor inicial (None para começar do último concurso)
+        ndjson: Se True, um JSON por linha; se False, um array JSON em blocos
+        
+    Returns:
+        Resposta Flask com corpo gerado sob demanda
+    """
+    def gerar():
+        primeiro = True
+        if not ndjson:
+            yield '['
+        
+        try:
+            for resultado in resultado_model.iterar_todos(antes_de=antes_de):
+                linha = current_app.json.dumps(resultado)
+                if ndjson:
+                    yield linha + '\n'
+                else:
+                    yield linha if primeiro else ',' + linha
+                primeiro = False
+        except Exception as e:
+            # Os cabeçalhos já foram enviados: apenas interrompe a transmissão
+            print(f"Erro ao transmitir resultados: {e}")
+        
+        if not ndjson:
+            yield ']'
+    
+    mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+    return Response(stream_with_context(gerar()), mimetype=mimetype)
+
+
 @api_bp.route('/resultado/<int:numero>', methods=['GET'])
 def buscar_resultado(numero):
     """
@@ -75,11 +187,232 @@ def buscar_resultado(numero):
 @api_bp.route('/estatisticas', methods=['GET'])
 def obter_estatisticas():
     """
-    Retorna estatísticas completas
+    Retorna estatísticas completas ou de uma janela de concursos
+    Query params:
+        de (int): primeiro concurso da janela
+        ate (int): último concurso da janela
+        ultimos (int): quantidade de concursos mais recentes
+        
+    A resposta é guardada em cache até o próximo concurso gravado e traz um
+    ETag; requisições com If-None-Match correspondente recebem 304.
     """
     try:
-        stats = estatistica.calcular_estatisticas_completas()
-        return jsonify(stats), 200
+        de = request.args.get('de', type=int)
+        ate = request.args.get('ate', type=int)
+        ultimos = request.args.get('ultimos', type=int)
+        
+        if de is None and ate is None and ultimos is None:
+            return _resposta_em_cache(
+                'estatisticas',
+                lambda: jsonify(estatistica.calcular_estatisticas_completas()).get_data()
+            )
+        
+        erro = estatistica.validar_janela(de=de, ate=ate, ultimos=ultimos)
+        if erro:
+            return jsonify({'erro': erro}), 400
+        
+        return _resposta_em_cache(
+            f'estatisticas?de={de}&ate={ate}&ultimos={ultimos}',
+            lambda: jsonify(
+                estatistica.calcular_estatisticas_janela(de=de, ate=ate, ultimos=ultimos)
+            ).get_data()
+        )
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/estatisticas/posicoes', methods=['GET'])
+def matrizes_posicionais():
+    """
+    Retorna a distribuição completa 5×80 das dezenas por posição, na ordem
+    do sorteio e na ordem crescente
+    """
+    try:
+        return _resposta_em_cache(
+            'estatisticas/posicoes',
+            lambda: jsonify(estatistica.calcular_matrizes_posicionais()).get_data()
+        )
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/estatisticas/posicao-ordenada', methods=['GET'])
+def posicao_ordenada():
+    """
+    Retorna a análise posicional pela ordem crescente (k-ésima menor dezena)
+    Query params:
+        janela (int): concursos de cada média móvel (padrão 20)
+        ultimos (int): pontos da média móvel, os mais recentes (padrão 100)
+        dado_posicao (int): posição conhecida (1-5) para a distribuição condicional
+        dado_valor (int): dezena na posição conhecida
+    """
+    try:
+        janela = request.args.get('janela', 20, type=int)
+        ultimos = request.args.get('ultimos', 100, type=int)
+        dado_posicao = request.args.get('dado_posicao', type=int)
+        dado_valor = request.args.get('dado_valor', type=int)
+        
+        erro = estatistica.validar_posicao_ordenada(
+            janela=janela,
+            ultimos=ultimos,
+            dado_posicao=dado_posicao,
+            dado_valor=dado_valor
+        )
+        if erro:
+            return jsonify({'erro': erro}), 400
+        
+        return _resposta_em_cache(
+            f'estatisticas/posicao-ordenada?janela={janela}&ultimos={ultimos}'
+            f'&dado_posicao={dado_posicao}&dado_valor={dado_valor}',
+            lambda: jsonify(estatistica.calcular_posicao_ordenada(
+                janela=janela,
+                ultimos=ultimos,
+                dado_posicao=dado_posicao,
+                dado_valor=dado_valor
+            )).get_data()
+        )
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/estatisticas/intervalos', methods=['GET'])
+def intervalos_dezenas():
+    """
+    Retorna, para cada dezena, o atraso atual, o atraso máximo histórico e
+    a média e os percentis dos intervalos entre aparições
+    """
+    try:
+        return _resposta_em_cache(
+            'estatisticas/intervalos',
+            lambda: jsonify(estatistica.calcular_intervalos()).get_data()
+        )
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/estatisticas/transicoes', methods=['GET'])
+def transicoes_posicionais():
+    """
+    Retorna as matrizes 80×80 de transição de cada posição entre concursos
+    consecutivos
+    Query params:
+        ordem (str): 'sorteio' (padrão) ou 'ordenada'
+    """
+    try:
+        ordem = request.args.get('ordem', 'sorteio')
+        if ordem not in ORDENS:
+            return jsonify({'erro': f'Ordem inválida. Opções: {", ".join(ORDENS)}'}), 400
+        
+        return _resposta_em_cache(
+            f'estatisticas/transicoes?ordem={ordem}',
+            lambda: jsonify(estatistica.calcular_transicoes_posicionais(ordem)).get_data()
+        )
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+def _resposta_em_cache(nome: str, calcular) -> Response:
+    """
+    Monta uma resposta JSON a partir do cache versionado pelos dados do banco
+    
+    Args:
+        nome: Identificação da resposta no cache
+        calcular: Função que gera o corpo JSON serializado
+        
+    Returns:
+        Resposta 200 com ETag, ou 304 se o cliente já tem a versão atual
+    """
+    versao = resultado_model.buscar_versao_dados()
+    if versao is None:
+        corpo = calcular()
+        return Response(corpo, mimetype='application/json')
+    
+    corpo, etag = cache_respostas.obter(nome, versao, calcular)
+    
+    resposta = Response(corpo, mimetype='application/json')
+    resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta.make_conditional(request)
+
+
+@api_bp.route('/coocorrencia/parceiros/<int:dezena>', methods=['GET'])
+def parceiros_dezena(dezena):
+    """
+    Retorna as dezenas que mais saíram junto com a dezena informada
+    Query params:
+        limite (int): quantidade de parceiros (padrão 10, máximo 79)
+    """
+    try:
+        if not 1 <= dezena <= 80:
+            return jsonify({'erro': 'Dezena deve estar entre 1 e 80'}), 400
+        
+        limite = request.args.get('limite', 10, type=int)
+        if not 1 <= limite <= MAX_PARCEIROS:
+            return jsonify({'erro': f'Limite deve ser entre 1 e {MAX_PARCEIROS}'}), 400
+        
+        return jsonify({
+            'dezena': dezena,
+            'parceiros': coocorrencia.parceiros(dezena, limite=limite)
+        }), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/coocorrencia/contar', methods=['GET'])
+def contar_coocorrencia():
+    """
+    Conta em quantos concursos as dezenas informadas saíram juntas
+    Query params:
+        dezenas (str): de 1 a 5 dezenas separadas por vírgula (ex.: 5,17,44)
+    """
+    try:
+        try:
+            dezenas = sorted({int(d) for d in request.args.get('dezenas', '').split(',') if d.strip()})
+        except ValueError:
+            return jsonify({'erro': 'Dezenas devem ser números separados por vírgula'}), 400
+        
+        if not 1 <= len(dezenas) <= 5 or not all(1 <= d <= 80 for d in dezenas):
+            return jsonify({'erro': 'Informe de 1 a 5 dezenas distintas entre 1 e 80'}), 400
+        
+        return jsonify({
+            'dezenas': dezenas,
+            'frequencia': coocorrencia.contar_juntos(dezenas)
+        }), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/coocorrencia/pares', methods=['GET'])
+def matriz_pares():
+    """
+    Retorna a matriz 80×80 de pares (linha i, coluna j = dezenas i+1 e j+1)
+    """
+    try:
+        return _resposta_em_cache(
+            'coocorrencia/pares',
+            lambda: jsonify(coocorrencia.matriz_pares()).get_data()
+        )
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/coocorrencia/<any(trincas, quadras):tipo>', methods=['GET'])
+def top_combinacoes(tipo):
+    """
+    Retorna as trincas ou quadras que mais saíram juntas
+    Query params:
+        limite (int): quantidade de combinações (padrão 20, máximo 1000)
+    """
+    try:
+        limite = request.args.get('limite', 20, type=int)
+        if not 1 <= limite <= MAX_COMBINACOES:
+            return jsonify({'erro': f'Limite deve ser entre 1 e {MAX_COMBINACOES}'}), 400
+        
+        if tipo == 'trincas':
+            combinacoes = coocorrencia.top_trincas(limite=limite)
+        else:
+            combinacoes = coocorrencia.top_quadras(limite=limite)
+        return jsonify(combinacoes), 200
     except Exception as e:
         return jsonify({'erro': str(e)}), 500
 
@@ -91,8 +424,11 @@ def gerar_palpite():
     Body: {
         "estrategia": "equilibrada",
         "quantidade_numeros": 5,
-        "quantidade_jogos": 1
+        "quantidade_jogos": 1,
+        "semente": 42
     }
+    
+    'semente' é opcional e torna os jogos reproduzíveis.
     """
     try:
         dados = request.get_json()
@@ -104,7 +440,135 @@ def gerar_palpite():
         resultado = quina.gerar_palpite(
             estrategia=estrategia,
             quantidade_numeros=quantidade_numeros,
-            quantidade_jogos=quantidade_jogos
+            quantidade_jogos=quantidade_jogos,
+            semente=dados.get('semente')
+        )
+        
+        if 'erro' in resultado:
+            return jsonify(resultado), 400
+        
+        return jsonify(resultado), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/gerar-palpite/lote', methods=['POST'])
+def gerar_palpites_lote():
+    """
+    Gera um lote grande de palpites, transmitido à medida que é gerado
+    Body: {
+        "estrategia": "equilibrada",
+        "quantidade_numeros": 5,
+        "quantidade_jogos": 100000,
+        "semente": 42,
+        "formato": "ndjson"
+    }
+    
+    'formato' aceita 'ndjson' (um array JSON por linha) ou 'csv'. Sem
+    'semente', uma é sorteada; ela volta no cabeçalho X-Semente para que
+    o lote possa ser reproduzido.
+    """
+    try:
+        dados = request.get_json() or {}
+        
+        estrategia = dados.get('estrategia', 'equilibrada')
+        quantidade_numeros = dados.get('quantidade_numeros', 5)
+        quantidade_jogos = dados.get('quantidade_jogos', 1)
+        semente = dados.get('semente')
+        formato = dados.get('formato', 'ndjson')
+        
+        erro = geracao_lote.validar(estrategia, quantidade_numeros, quantidade_jogos)
+        if erro:
+            return jsonify({'erro': erro}), 400
+        if formato not in FORMATOS:
+            return jsonify({'erro': f'Formato inválido. Opções: {", ".join(FORMATOS)}'}), 400
+        if semente is None:
+            semente = random.getrandbits(63)
+        elif not isinstance(semente, int) or semente < 0:
+            return jsonify({'erro': 'Semente deve ser um inteiro não negativo'}), 400
+        
+        def gerar():
+            try:
+                yield from geracao_lote.transmitir(
+                    estrategia,
+                    quantidade_numeros,
+                    quantidade_jogos,
+                    semente,
+                    formato=formato
+                )
+            except Exception as e:
+                # Os cabeçalhos já foram enviados: apenas interrompe a transmissão
+                print(f"Erro ao transmitir lote de palpites: {e}")
+        
+        mimetype = 'text/csv' if formato == 'csv' else 'application/x-ndjson'
+        resposta = Response(stream_with_context(gerar()), mimetype=mimetype)
+        resposta.headers['X-Semente'] = str(semente)
+        return resposta
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/combinatoria/contar', methods=['POST'])
+def contar_combinacoes():
+    """
+    Conta os jogos que atendem às restrições informadas
+    Body: {
+        "quantidade_numeros": 5,
+        "restricoes": {
+            "soma_min": 150,
+            "soma_max": 250,
+            "pares_min": 2,
+            "pares_max": 3,
+            "faixas": [1, [1, 2], null, 1],
+            "max_consecutivos": 2
+        }
+    }
+    
+    Todas as restrições são opcionais; 'faixas' traz um item por faixa
+    (01-20, 21-40, 41-60, 61-80): null, quantidade exata ou [mínimo, máximo].
+    """
+    try:
+        dados = request.get_json() or {}
+        
+        resultado = combinatoria.contar(
+            dados.get('quantidade_numeros', 5),
+            dados.get('restricoes')
+        )
+        
+        if 'erro' in resultado:
+            return jsonify(resultado), 400
+        
+        return jsonify(resultado), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/combinatoria/amostrar', methods=['POST'])
+def amostrar_combinacoes():
+    """
+    Sorteia jogos uniformemente entre os que atendem às restrições
+    Body: {
+        "quantidade_numeros": 5,
+        "quantidade_jogos": 10,
+        "restricoes": {"soma_min": 150, "soma_max": 250},
+        "semente": 42
+    }
+    
+    As restrições são as de /api/combinatoria/contar. Cada jogo volta com
+    as dezenas e o índice colex; 'semente' é opcional.
+    """
+    try:
+        dados = request.get_json() or {}
+        
+        semente = dados.get('semente')
+        if semente is not None and (not isinstance(semente, int) or semente < 0):
+            return jsonify({'erro': 'Semente deve ser um inteiro não negativo'}), 400
+        
+        resultado = combinatoria.amostrar(
+            dados.get('quantidade_numeros', 5),
+            dados.get('quantidade_jogos', 1),
+            dados.get('restricoes'),
+            semente=semente
         )
         
         if 'erro' in resultado:
@@ -115,6 +579,112 @@ def gerar_palpite():
         return jsonify({'erro': str(e)}), 500
 
 
+@api_bp.route('/combinatoria/indice', methods=['GET'])
+def indice_combinacao():
+    """
+    Retorna o índice colex de um jogo entre todos os jogos do mesmo tamanho
+    Query params:
+        dezenas (str): dezenas separadas por vírgula (ex.: 5,17,44,60,78)
+    """
+    try:
+        try:
+            dezenas = sorted({int(d) for d in request.args.get('dezenas', '').split(',') if d.strip()})
+        except ValueError:
+            return jsonify({'erro': 'Dezenas devem ser números separados por vírgula'}), 400
+        
+        erro = combinatoria.validar(len(dezenas), None)
+        if erro or not all(1 <= d <= 80 for d in dezenas):
+            return jsonify({'erro': erro or 'Dezenas devem estar entre 1 e 80'}), 400
+        
+        return jsonify({
+            'dezenas': dezenas,
+            'indice': combinatoria.ranquear(dezenas),
+            'total': combinatoria.total(len(dezenas))
+        }), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/combinatoria/jogo/<int:indice>', methods=['GET'])
+def jogo_por_indice(indice):
+    """
+    Retorna o jogo na posição colex informada (inverso de /combinatoria/indice)
+    Query params:
+        quantidade_numeros (int): dezenas do jogo (padrão 5)
+    """
+    try:
+        quantidade_numeros = request.args.get('quantidade_numeros', 5, type=int)
+        
+        erro = combinatoria.validar(quantidade_numeros, None)
+        if erro:
+            return jsonify({'erro': erro}), 400
+        
+        total = combinatoria.total(quantidade_numeros)
+        if indice >= total:
+            return jsonify({'erro': f'Índice deve ser menor que {total}'}), 400
+        
+        return jsonify({
+            'indice': indice,
+            'dezenas': combinatoria.desranquear(indice, quantidade_numeros),
+            'total': total
+        }), 200
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/backtest', methods=['POST'])
+def executar_backtest():
+    """
+    Enfileira a avaliação de estratégias sobre o histórico: antes de cada
+    concurso gera jogos usando apenas os concursos anteriores e confere os
+    acertos
+    Body: {
+        "estrategias": ["equilibrada", "atrasados"],
+        "quantidade_numeros": 5,
+        "jogos_por_concurso": 1,
+        "sementes": [1, 2, 3],
+        "concursos": 1000
+    }
+    
+    Sem 'estrategias', avalia todas; sem 'sementes', uma é sorteada (e
+    volta no resultado); sem 'concursos', usa todo o histórico. O backtest
+    roda em segundo plano; o cabeçalho Location aponta para o status.
+    """
+    try:
+        dados = request.get_json() or {}
+        
+        job = backtest.enfileirar(
+            estrategias=dados.get('estrategias', list(quina.estrategias())),
+            quantidade_numeros=dados.get('quantidade_numeros', 5),
+            jogos_por_concurso=dados.get('jogos_por_concurso', 1),
+            sementes=dados.get('sementes'),
+            concursos=dados.get('concursos')
+        )
+        
+        if 'id' not in job:
+            return jsonify(job), 400
+        
+        return jsonify(job), 202, {'Location': f"/api/backtest/{job['id']}"}
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
+@api_bp.route('/backtest/<job_id>', methods=['GET'])
+def status_backtest(job_id):
+    """
+    Retorna o andamento de um backtest
+    (status, total_tarefas, tarefas_concluidas e, ao concluir, resultado)
+    """
+    try:
+        job = backtest.obter_job(job_id)
+        if job:
+            return jsonify(job), 200
+        else:
+            return jsonify({'mensagem': 'Job não encontrado'}), 404
+    except Exception as e:
+        return jsonify({'erro': str(e)}), 500
+
+
 @api_bp.route('/conferir', methods=['POST'])
 def conferir():
     """
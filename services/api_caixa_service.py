@@ -1,12 +1,25 @@
 """
 Serviço para integração com a API da Caixa Econômica Federal - QUINA
 """
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import requests
-from typing import Optional, Dict
+from requests.adapters import HTTPAdapter
+from typing import Callable, Optional, Dict, Iterable, Iterator, List, Set, Tuple
 import config
+from models.draw_store import DrawStore
 from models.resultado_model import ResultadoModel
 
 
+# Chave do checkpoint da sincronização na tabela de metadados
+CHAVE_CHECKPOINT = 'sincronizacao_checkpoint'
+
+
 class ApiCaixaService:
     """
     Serviço para buscar dados da API da QUINA
@@ -18,27 +31,76 @@ class ApiCaixaService:
         """
         self.api_url = config.API_QUINA_URL
         self.resultado_model = ResultadoModel()
+        self.draw_store = DrawStore.instancia(self.resultado_model.db_path)
+        
+        # Sessão com pool de conexões keep-alive compartilhada por todas as buscas
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=config.API_POOL_CONEXOES,
+            pool_maxsize=max(config.API_POOL_TAMANHO, config.API_CONCORRENCIA)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Validadores do último concurso para requisições condicionais
+        self._lock = threading.Lock()
+        self._ultimo_cache = None
+        self._contadores = {'requisicoes': 0, 'respostas_304': 0}
+    
+    @staticmethod
+    def validar_resultado(resultado) -> bool:
+        """
+        Verifica se um resultado no formato da API da Caixa tem os campos
+        essenciais com tipos válidos (ver ResultadoModel.validar_resultado)
+        
+        Args:
+            resultado: Objeto decodificado do JSON da API
+            
+        Returns:
+            True se o resultado pode ser gravado no banco de dados
+        """
+        return ResultadoModel.validar_resultado(resultado) is None
     
     def buscar_ultimo_concurso(self) -> Optional[Dict]:
         """
         Busca o último concurso da QUINA na API da Caixa
         
+        Envia If-None-Match/If-Modified-Since com os validadores da última
+        resposta: se o concurso não mudou, a API responde 304 e o resultado
+        em memória é reaproveitado sem decodificar JSON.
+        
         Returns:
             Dicionário com os dados do último concurso ou None em caso de erro
         """
+        cache = self._ultimo_cache
+        headers = {}
+        if cache:
+            etag, last_modified, _ = cache
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        
         try:
-            response = requests.get(self.api_url, timeout=10)
-            response.raise_for_status()
+            response = self._get_com_retentativas(self.api_url, headers=headers)
+            
+            if response.status_code == 304 and cache:
+                with self._lock:
+                    self._contadores['respostas_304'] += 1
+                return cache[2]
             
             resultado = response.json()
             
             # Valida se tem os campos essenciais
-            if 'numero' in resultado and 'listaDezenas' in resultado:
+            if self.validar_resultado(resultado):
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                self._ultimo_cache = (etag, last_modified, resultado) if etag or last_modified else None
                 return resultado
             
-            print("Resposta da API não contém campos essenciais")
+            print("Resposta da API com campos essenciais ausentes ou inválidos")
             return None
-            
+        
         except requests.exceptions.RequestException as e:
             print(f"Erro ao buscar último concurso: {e}")
             return None
@@ -58,18 +120,17 @@ class ApiCaixaService:
         """
         try:
             url = f"{self.api_url}/{numero}"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            response = self._get_com_retentativas(url)
             
             resultado = response.json()
             
             # Valida se tem os campos essenciais
-            if 'numero' in resultado and 'listaDezenas' in resultado:
+            if self.validar_resultado(resultado):
                 return resultado
             
-            print(f"Resposta da API para concurso {numero} não contém campos essenciais")
+            print(f"Resposta da API para concurso {numero} com campos essenciais ausentes ou inválidos")
             return None
-            
+        
         except requests.exceptions.RequestException as e:
             print(f"Erro ao buscar concurso {numero}: {e}")
             return None
@@ -77,14 +138,156 @@ class ApiCaixaService:
             print(f"Erro ao processar JSON da API para concurso {numero}: {e}")
             return None
     
-    def atualizar_base_completa(self, atualizar_apenas_novos: bool = True) -> Dict:
+    def buscar_concursos(self, numeros: Iterable[int]) -> Iterator[Tuple[int, Optional[Dict]]]:
+        """
+        Busca vários concursos em paralelo, entregando-os na ordem pedida
+        
+        No máximo config.API_CONCORRENCIA requisições ficam em andamento e a
+        janela de concursos buscados à frente é limitada, de modo que o
+        consumidor (ex.: gravação no banco) recebe os resultados em ordem
+        crescente e com memória limitada.
+        
+        Args:
+            numeros: Números dos concursos, na ordem de entrega desejada
+            
+        Yields:
+            Tuplas (numero, resultado ou None em caso de erro)
+        """
+        concorrencia = max(1, config.API_CONCORRENCIA)
+        numeros = iter(numeros)
+        pendentes = deque()
+        
+        with ThreadPoolExecutor(max_workers=concorrencia, thread_name_prefix='api-caixa') as executor:
+            try:
+                for numero in islice(numeros, concorrencia * 4):
+                    pendentes.append((numero, executor.submit(self.buscar_concurso_especifico, numero)))
+                
+                while pendentes:
+                    numero, futuro = pendentes.popleft()
+                    resultado = futuro.result()
+                    
+                    for proximo in islice(numeros, 1):
+                        pendentes.append(
+                            (proximo, executor.submit(self.buscar_concurso_especifico, proximo))
+                        )
+                    
+                    yield numero, resultado
+            finally:
+                # Consumidor interrompido: descarta o que ainda não começou
+                for _, futuro in pendentes:
+                    futuro.cancel()
+    
+    def estatisticas_conexoes(self) -> Dict:
+        """
+        Retorna contadores de uso do pool de conexões HTTP
+        
+        Returns:
+            Dicionário com:
+            - requisicoes: Requisições feitas por este serviço (incluindo retentativas)
+            - respostas_304: Consultas ao último concurso respondidas com 304
+            - conexoes_abertas: Conexões TCP/TLS abertas pelo pool
+            - conexoes_reutilizadas: Requisições atendidas por conexões já abertas
+        """
+        conexoes_abertas = 0
+        requisicoes_pool = 0
+        
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for chave in pools.keys():
+                pool = pools.get(chave)
+                if pool is not None:
+                    conexoes_abertas += pool.num_connections
+                    requisicoes_pool += pool.num_requests
+        
+        with self._lock:
+            contadores = dict(self._contadores)
+        
+        contadores['conexoes_abertas'] = conexoes_abertas
+        contadores['conexoes_reutilizadas'] = max(0, requisicoes_pool - conexoes_abertas)
+        return contadores
+    
+    def _get_com_retentativas(self, url: str, headers: Optional[Dict] = None) -> requests.Response:
+        """
+        Faz um GET repetindo em falhas transitórias (429, 5xx, conexão, timeout)
+        
+        Entre as tentativas aguarda um backoff exponencial com jitter
+        (ou o Retry-After informado pelo servidor, se houver).
+        
+        Args:
+            url: URL a buscar
+            headers: Cabeçalhos adicionais da requisição
+            
+        Returns:
+            Resposta bem-sucedida (incluindo 304 Not Modified)
+            
+        Raises:
+            requests.exceptions.RequestException: Se todas as tentativas falharem
+        """
+        tentativas = max(1, config.API_TENTATIVAS)
+        
+        for tentativa in range(tentativas):
+            ultima = tentativa == tentativas - 1
+            
+            with self._lock:
+                self._contadores['requisicoes'] += 1
+            
+            try:
+                response = self.session.get(url, headers=headers, timeout=config.API_TIMEOUT)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if ultima:
+                    raise
+                espera = None
+            else:
+                transitorio = response.status_code == 429 or response.status_code >= 500
+                if not transitorio or ultima:
+                    response.raise_for_status()
+                    return response
+                espera = self._retry_after(response)
+            
+            if espera is None:
+                # Full jitter: espera aleatória até o teto exponencial
+                teto = min(config.API_BACKOFF_MAX, config.API_BACKOFF_BASE * (2 ** tentativa))
+                espera = random.uniform(0, teto)
+            time.sleep(espera)
+    
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        """
+        Lê o cabeçalho Retry-After em segundos, limitado a config.API_BACKOFF_MAX
+        
+        Args:
+            response: Resposta 429 ou 5xx
+            
+        Returns:
+            Segundos a aguardar ou None se o cabeçalho não existir ou não for numérico
+        """
+        try:
+            return min(float(response.headers['Retry-After']), config.API_BACKOFF_MAX)
+        except (KeyError, ValueError):
+            return None
+    
+    def atualizar_base_completa(
+        self,
+        atualizar_apenas_novos: bool = True,
+        progresso: Callable[[Dict], None] = None
+    ) -> Dict:
         """
         Atualiza a base de dados com concursos da API
         
+        No modo padrão a sincronização é ciente de lacunas: busca apenas os
+        concursos que ainda não estão no banco (inclusive os que falharam em
+        execuções anteriores) até o último concurso da API. O progresso é
+        gravado em um checkpoint a cada lote; uma execução interrompida é
+        retomada do ponto em que parou, mesmo se a API estiver indisponível
+        para informar o último concurso.
+        
         Args:
-            atualizar_apenas_novos: Se True, busca apenas concursos novos.
+            atualizar_apenas_novos: Se True, busca apenas concursos ausentes do banco.
                                    Se False, atualiza desde o concurso 1.
-        
+            progresso: Função chamada a cada concurso processado com um
+                       dicionário com total, total_processados,
+                       total_inseridos e total_erros
+                       
         Returns:
             Dicionário com estatísticas da atualização:
             - total_processados: Total de concursos processados
@@ -95,10 +298,21 @@ class ApiCaixaService:
         total_processados = 0
         total_inseridos = 0
         total_erros = 0
+        falhas = []
+        
+        checkpoint = self.carregar_checkpoint()
+        retomando = bool(checkpoint and not checkpoint.get('concluida'))
         
         # Busca o último concurso da API
         ultimo_api = self.buscar_ultimo_concurso()
-        if not ultimo_api:
+        if ultimo_api:
+            numero_ultimo_api = ultimo_api['numero']
+            if retomando:
+                numero_ultimo_api = max(numero_ultimo_api, checkpoint['alvo'])
+        elif retomando:
+            # Sem resposta da API: conclui a execução interrompida
+            numero_ultimo_api = checkpoint['alvo']
+        else:
             return {
                 'total_processados': 0,
                 'total_inseridos': 0,
@@ -107,17 +321,26 @@ class ApiCaixaService:
                 'mensagem': 'Erro ao buscar último concurso da API'
             }
         
-        numero_ultimo_api = ultimo_api['numero']
+        # Concursos que falharam antes da interrupção (no modo padrão já estão
+        # entre os faltantes do banco)
+        falhas_anteriores = set()
         
-        # Define o ponto de início
+        # Define os concursos a buscar
         if atualizar_apenas_novos:
-            ultimo_db = self.resultado_model.buscar_ultimo()
-            numero_inicio = ultimo_db['numero'] + 1 if ultimo_db else 1
+            numeros = self.resultado_model.buscar_concursos_faltantes(numero_ultimo_api)
+        elif retomando and checkpoint.get('completa'):
+            # Atualização completa interrompida: continua após o último lote
+            # gravado e tenta de novo os concursos que falharam antes dele
+            falhas_anteriores = set(checkpoint.get('falhas') or [])
+            numeros = sorted(falhas_anteriores.union(
+                range((checkpoint.get('ultimo_gravado') or 0) + 1, numero_ultimo_api + 1)
+            ))
         else:
-            numero_inicio = 1
+            numeros = list(range(1, numero_ultimo_api + 1))
         
         # Se já está atualizado
-        if numero_inicio > numero_ultimo_api:
+        if not numeros:
+            self._salvar_checkpoint(numero_ultimo_api, None, [], concluida=True)
             return {
                 'total_processados': 0,
                 'total_inseridos': 0,
@@ -127,24 +350,68 @@ class ApiCaixaService:
             }
         
         # Atualiza concursos
-        print(f"Atualizando concursos de {numero_inicio} até {numero_ultimo_api}...")
+        if retomando:
+            print(f"Retomando atualização interrompida: {len(numeros)} concursos pendentes...")
+        print(f"Atualizando {len(numeros)} concursos até {numero_ultimo_api}...")
         
-        for numero in range(numero_inicio, numero_ultimo_api + 1):
-            total_processados += 1
-            
-            # Busca o concurso na API
-            resultado = self.buscar_concurso_especifico(numero)
-            
-            if resultado:
-                # Insere no banco de dados
-                if self.resultado_model.inserir(resultado):
-                    total_inseridos += 1
-                    if total_inseridos % 100 == 0:
-                        print(f"Processados {total_inseridos} concursos...")
+        completa = not atualizar_apenas_novos
+        ultimo_gravado = (checkpoint.get('ultimo_gravado') or 0) if retomando else 0
+        self._salvar_checkpoint(numero_ultimo_api, ultimo_gravado, sorted(falhas_anteriores), completa=completa)
+        
+        # Os resultados são acumulados e gravados em lotes (uma transação por lote)
+        buffer = []
+        
+        try:
+            # Busca os concursos em paralelo, recebendo-os em ordem crescente
+            for numero, resultado in self.buscar_concursos(numeros):
+                total_processados += 1
+                
+                if resultado:
+                    buffer.append((numero, resultado))
                 else:
                     total_erros += 1
-            else:
-                total_erros += 1
+                    falhas.append(numero)
+                
+                if len(buffer) >= config.API_TAMANHO_LOTE:
+                    gravados = self._gravar_lote([resultado for _, resultado in buffer])
+                    total_inseridos += len(gravados)
+                    total_erros += len(buffer) - len(gravados)
+                    falhas.extend(numero for numero, _ in buffer if numero not in gravados)
+                    if gravados:
+                        ultimo_gravado = max(ultimo_gravado, max(gravados))
+                        falhas_anteriores.difference_update(gravados)
+                    buffer = []
+                    self._salvar_checkpoint(
+                        numero_ultimo_api, ultimo_gravado, sorted(falhas_anteriores.union(falhas)), completa=completa
+                    )
+                    print(f"Processados {total_inseridos} concursos...")
+                
+                if progresso:
+                    progresso({
+                        'total': len(numeros),
+                        'total_processados': total_processados,
+                        'total_inseridos': total_inseridos,
+                        'total_erros': total_erros
+                    })
+        finally:
+            # Mesmo se interrompido, grava o que já foi buscado
+            if buffer:
+                gravados = self._gravar_lote([resultado for _, resultado in buffer])
+                total_inseridos += len(gravados)
+                total_erros += len(buffer) - len(gravados)
+                falhas.extend(numero for numero, _ in buffer if numero not in gravados)
+                if gravados:
+                    ultimo_gravado = max(ultimo_gravado, max(gravados))
+                    falhas_anteriores.difference_update(gravados)
+                self._salvar_checkpoint(
+                    numero_ultimo_api, ultimo_gravado, sorted(falhas_anteriores.union(falhas)), completa=completa
+                )
+            
+            # Regrava o snapshot para que outros processos partam do histórico novo
+            if total_inseridos:
+                self.draw_store.salvar_snapshot()
+        
+        self._salvar_checkpoint(numero_ultimo_api, ultimo_gravado, falhas, concluida=True)
         
         return {
             'total_processados': total_processados,
@@ -153,3 +420,65 @@ class ApiCaixaService:
             'ultimo_concurso': numero_ultimo_api,
             'mensagem': f'Atualização concluída com sucesso'
         }
+    
+    def carregar_checkpoint(self) -> Optional[Dict]:
+        """
+        Carrega o checkpoint da última sincronização
+        
+        Returns:
+            Dicionário com alvo, ultimo_gravado, falhas, completa e concluida,
+            ou None se nunca houve sincronização
+        """
+        valor = self.resultado_model.obter_metadado(CHAVE_CHECKPOINT)
+        if not valor:
+            return None
+        try:
+            return json.loads(valor)
+        except ValueError:
+            return None
+    
+    def _salvar_checkpoint(
+        self,
+        alvo: int,
+        ultimo_gravado: Optional[int],
+        falhas: List[int],
+        completa: bool = False,
+        concluida: bool = False
+    ):
+        """
+        Grava o progresso da sincronização na tabela de metadados
+        
+        Args:
+            alvo: Último concurso a sincronizar
+            ultimo_gravado: Último concurso gravado com sucesso
+            falhas: Concursos que falharam e ainda não foram gravados
+                (retentados ao retomar uma atualização completa)
+            completa: Se a execução é uma atualização completa (desde o concurso 1)
+            concluida: Se a execução terminou
+        """
+        self.resultado_model.salvar_metadado(CHAVE_CHECKPOINT, json.dumps({
+            'alvo': alvo,
+            'ultimo_gravado': ultimo_gravado,
+            'falhas': falhas,
+            'completa': completa,
+            'concluida': concluida
+        }))
+    
+    def _gravar_lote(self, resultados: List[Dict]) -> Set[int]:
+        """
+        Grava um lote de resultados no banco de dados
+        
+        Args:
+            resultados: Lista de resultados obtidos da API
+            
+        Returns:
+            Números dos concursos efetivamente gravados
+        """
+        gravados = []
+        self.resultado_model.inserir_lote(resultados, gravados=gravados)
+        
+        # Mantém o histórico em memória sem recarregar do banco
+        if gravados:
+            self.draw_store.adicionar(gravados)
+        
+        return {resultado['numero'] for resultado in gravados}
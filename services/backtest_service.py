@@ -0,0 +1,521 @@
+"""
+Serviço de backtest walk-forward das estratégias de geração de palpites
+"""
+import multiprocessing
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+import config
+from models.draw_store import DEZENAS_POR_CONCURSO
+from services.quina_service import QuinaService
+
+
+# Uma entrada por dezena (índice 0 sem uso)
+COLUNAS = 81
+
+# Nome das faixas premiadas da QUINA por quantidade de acertos
+PREMIOS = {2: 'duque', 3: 'terno', 4: 'quadra', 5: 'quina'}
+
+# Máximo de jogos por estratégia em cada concurso
+MAX_JOGOS_POR_CONCURSO = 100
+
+# Máximo de sementes por backtest
+MAX_SEMENTES = 32
+
+# Rankings de candidatos lidos pelas estratégias
+RANKINGS = ('frequentes', 'atrasados', 'proximos_do_maximo', 'posicoes')
+
+# Jobs aguardando ou em execução aceitos ao mesmo tempo
+MAX_JOBS_PENDENTES = 4
+
+# Quantidade de jobs finalizados mantidos para consulta
+MAX_JOBS_HISTORICO = 50
+
+# Histórico recebido pelo processo do pool (ver _iniciar_processo)
+_historico = {}
+
+
+class AgregadosIncrementais:
+    """
+    Estatísticas usadas pelas estratégias, estendidas concurso a concurso
+    
+    Guarda frequências, última e primeira aparição, maior intervalo e
+    frequências por posição do sorteio. Cada concurso novo atualiza apenas
+    as dezenas sorteadas; as chaves de ordenação são mantidas prontas e o
+    ranking de atrasados é mantido ordenado (quem não saiu apenas soma 1
+    ao atraso e preserva a ordem relativa). Os rankings são os mesmos que
+    o QuinaService monta para o histórico até aquele concurso.
+    """
+    
+    def __init__(self):
+        """
+        Inicializa os contadores para um histórico vazio
+        """
+        self.total = 0
+        self.frequencias = [0] * COLUNAS
+        self.primeira = [-1] * COLUNAS
+        self.ultima = [-1] * COLUNAS
+        self.maior_intervalo = [0] * COLUNAS
+        self.com_ordem = 0
+        
+        # Chaves inteiras (-contagem, número) comparam mais rápido que tuplas
+        self._chaves_frequencia = list(range(COLUNAS))
+        self._chaves_posicoes = [list(range(COLUNAS)) for _ in range(DEZENAS_POR_CONCURSO)]
+        self._posicoes = ()
+        self._atrasados = list(range(1, COLUNAS))
+    
+    def adicionar(self, dezenas, ordem):
+        """
+        Acrescenta um concurso ao final do histórico
+        
+        Args:
+            dezenas: Dezenas do concurso em ordem crescente (zeros ignorados)
+            ordem: Dezenas na ordem do sorteio (zeros se indisponível)
+        """
+        idx = self.total
+        sorteadas = [numero for numero in dezenas if numero]
+        
+        for numero in sorteadas:
+            anterior = self.ultima[numero]
+            if anterior == -1:
+                self.primeira[numero] = idx
+            elif idx - anterior - 1 > self.maior_intervalo[numero]:
+                self.maior_intervalo[numero] = idx - anterior - 1
+            self.ultima[numero] = idx
+            self.frequencias[numero] += 1
+            self._chaves_frequencia[numero] -= COLUNAS
+        
+        # As sorteadas passam a ter atraso 0 e vão para o fim, por número
+        self._atrasados = [numero for numero in self._atrasados if numero not in sorteadas] + sorteadas
+        
+        if ordem[0]:
+            self.com_ordem += 1
+            for posicao, numero in enumerate(ordem):
+                self._chaves_posicoes[posicao][numero] -= COLUNAS
+            self._posicoes = None
+        
+        self.total += 1
+    
+    def candidatos(self) -> Dict:
+        """
+        Rankings de candidatos no formato de QuinaService.obter_candidatos
+        
+        Cada ranking é calculado apenas quando a estratégia o lê; o
+        dicionário vale até o próximo adicionar.
+        
+        Returns:
+            Dicionário com 'frequentes', 'atrasados', 'proximos_do_maximo'
+            e 'posicoes'
+        """
+        if not self.total:
+            return dict.fromkeys(RANKINGS, ())
+        return _Candidatos(self)
+    
+    def frequentes(self) -> tuple:
+        """
+        Dezenas já sorteadas por frequência decrescente e depois por número
+        """
+        frequencias = self.frequencias
+        return tuple(
+            numero
+            for numero in sorted(range(1, COLUNAS), key=self._chaves_frequencia.__getitem__)
+            if frequencias[numero]
+        )
+    
+    def atrasados(self) -> tuple:
+        """
+        Dezenas por atraso atual decrescente e depois por número
+        """
+        return tuple(self._atrasados)
+    
+    def proximos_do_maximo(self) -> tuple:
+        """
+        Dezenas pelo atraso atual em relação ao próprio atraso máximo, com
+        o mesmo critério de IntervalosDezenas.resumo (o atraso máximo inclui
+        o período inicial e o atraso atual)
+        """
+        total = self.total
+        ultima = self.ultima
+        proximos = []
+        
+        for numero in range(1, COLUNAS):
+            if ultima[numero] == -1:
+                atraso = inicial = total
+            else:
+                atraso = total - 1 - ultima[numero]
+                inicial = self.primeira[numero]
+            maximo = max(self.maior_intervalo[numero], inicial, atraso)
+            percentual = round(atraso / maximo * 100, 2) if maximo else 0
+            proximos.append((-percentual, -atraso, numero))
+        
+        proximos.sort()
+        return tuple(numero for _, _, numero in proximos)
+    
+    def posicoes(self) -> tuple:
+        """
+        Ranking de cada posição do sorteio (vazio sem concursos com ordem),
+        refeito apenas quando um concurso com ordem é acrescentado
+        """
+        if self._posicoes is None:
+            self._posicoes = tuple(
+                tuple(sorted(range(1, COLUNAS), key=chaves.__getitem__))
+                for chaves in self._chaves_posicoes
+            )
+        return self._posicoes
+
+
+class _Candidatos(dict):
+    """
+    Dicionário de candidatos que monta cada ranking no primeiro acesso
+    """
+    
+    def __init__(self, agregados: AgregadosIncrementais):
+        super().__init__()
+        self._agregados = agregados
+    
+    def __missing__(self, chave: str):
+        if chave not in RANKINGS:
+            raise KeyError(chave)
+        valor = getattr(self._agregados, chave)()
+        self[chave] = valor
+        return valor
+
+
+class BacktestService:
+    """
+    Reproduz o histórico concurso a concurso: antes de cada concurso gera
+    jogos com cada estratégia usando apenas os concursos anteriores e
+    confere os acertos
+    
+    As estatísticas são estendidas incrementalmente (O(N) no total, em vez
+    de recalcular tudo a cada concurso). Cada par (estratégia, semente) é
+    uma tarefa independente, executada em processos separados quando há
+    mais de uma; a mesma semente reproduz o mesmo resultado.
+    
+    Pela API o backtest roda como job em segundo plano (enfileirar e
+    obter_job), um de cada vez, já que cada um ocupa todos os processos.
+    """
+    
+    def __init__(self, quina_service: QuinaService = None):
+        """
+        Inicializa o serviço
+        
+        Args:
+            quina_service: Serviço que fornece estratégias e o histórico
+        """
+        self.quina_service = quina_service or QuinaService()
+        self._lock = threading.Lock()
+        self._execucao = threading.Lock()
+        self._jobs = OrderedDict()
+    
+    def validar(
+        self,
+        estrategias: List[str],
+        quantidade_numeros: int,
+        jogos_por_concurso: int,
+        sementes: List[int],
+        concursos: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Valida os parâmetros de um backtest
+        
+        Returns:
+            Mensagem de erro ou None se os parâmetros forem válidos
+        """
+        if not isinstance(estrategias, list) or not estrategias:
+            return "'estrategias' deve ser uma lista não vazia"
+        for estrategia in estrategias:
+            erro = self.quina_service.validar_jogo(estrategia, quantidade_numeros)
+            if erro:
+                return erro
+        
+        if not isinstance(jogos_por_concurso, int) or not 1 <= jogos_por_concurso <= MAX_JOGOS_POR_CONCURSO:
+            return f'Jogos por concurso deve ser entre 1 e {MAX_JOGOS_POR_CONCURSO}'
+        
+        if (
+            not isinstance(sementes, list)
+            or not sementes
+            or not all(isinstance(semente, int) and semente >= 0 for semente in sementes)
+        ):
+            return "'sementes' deve ser uma lista de inteiros não negativos"
+        if len(sementes) > MAX_SEMENTES:
+            return f'Máximo de {MAX_SEMENTES} sementes por backtest'
+        if len(estrategias) * len(sementes) > config.BACKTEST_MAX_TAREFAS:
+            return f'Máximo de {config.BACKTEST_MAX_TAREFAS} combinações de estratégia e semente'
+        
+        if concursos is not None and (not isinstance(concursos, int) or concursos < 1):
+            return "'concursos' deve ser maior que zero"
+        
+        return None
+    
+    def executar(
+        self,
+        estrategias: List[str],
+        quantidade_numeros: int = 5,
+        jogos_por_concurso: int = 1,
+        sementes: List[int] = None,
+        concursos: Optional[int] = None,
+        progresso: Optional[Callable[[int, int], None]] = None
+    ) -> Dict:
+        """
+        Executa o backtest de cada estratégia com cada semente
+        
+        Args:
+            estrategias: Nomes das estratégias (ver QuinaService.estrategias)
+            quantidade_numeros: Quantidade de números por jogo
+            jogos_por_concurso: Jogos gerados por estratégia em cada concurso
+            sementes: Sementes do gerador aleatório (uma execução por semente)
+            concursos: Quantidade de concursos avaliados, os mais recentes
+                (padrão: todos a partir do 2º)
+            progresso: Chamado com (tarefas concluídas, total de tarefas)
+            
+        Returns:
+            Dicionário com o período avaliado e um resultado por
+            (estratégia, semente)
+        """
+        sementes = sementes if sementes is not None else [random.getrandbits(63)]
+        erro = self.validar(estrategias, quantidade_numeros, jogos_por_concurso, sementes, concursos)
+        if erro:
+            return {'erro': erro}
+        
+        dados = self.quina_service.estatistica_service.draw_store.obter()
+        total = len(dados)
+        inicio = max(1, total - concursos) if concursos else 1
+        
+        tarefas = [
+            {
+                'inicio': inicio,
+                'estrategia': estrategia,
+                'semente': semente,
+                'quantidade_numeros': quantidade_numeros,
+                'jogos_por_concurso': jogos_por_concurso
+            }
+            for estrategia in estrategias
+            for semente in sementes
+        ]
+        
+        # O histórico vai uma vez para cada processo (initializer), não por
+        # tarefa; forkserver/spawn evitam o fork de um processo com threads
+        ordenadas = bytes(dados.ordenadas)
+        ordem = bytes(dados.ordem)
+        processos = min(config.BACKTEST_PROCESSOS or os.cpu_count() or 1, len(tarefas))
+        resultados = []
+        if processos > 1:
+            with ProcessPoolExecutor(
+                max_workers=processos,
+                mp_context=_contexto_processos(),
+                initializer=_iniciar_processo,
+                initargs=(ordenadas, ordem)
+            ) as executor:
+                for resultado in executor.map(_executar_tarefa, tarefas):
+                    resultados.append(resultado)
+                    if progresso:
+                        progresso(len(resultados), len(tarefas))
+        else:
+            for tarefa in tarefas:
+                resultados.append(_backtest(ordenadas, ordem, tarefa))
+                if progresso:
+                    progresso(len(resultados), len(tarefas))
+        
+        return {
+            'quantidade_numeros': quantidade_numeros,
+            'jogos_por_concurso': jogos_por_concurso,
+            'primeiro_concurso': dados.numeros[inicio] if inicio < total else None,
+            'ultimo_concurso': dados.ultimo,
+            'concursos_avaliados': max(total - inicio, 0),
+            'media_aleatoria': round(quantidade_numeros * DEZENAS_POR_CONCURSO / 80, 4),
+            'resultados': resultados
+        }
+    
+    def enfileirar(
+        self,
+        estrategias: List[str],
+        quantidade_numeros: int = 5,
+        jogos_por_concurso: int = 1,
+        sementes: List[int] = None,
+        concursos: Optional[int] = None
+    ) -> Dict:
+        """
+        Valida os parâmetros e enfileira o backtest em segundo plano
+        
+        Args:
+            Os mesmos de executar
+            
+        Returns:
+            Estado do job criado, ou {'erro': mensagem} se os parâmetros
+            forem inválidos ou a fila estiver cheia
+        """
+        sementes = sementes if sementes is not None else [random.getrandbits(63)]
+        erro = self.validar(estrategias, quantidade_numeros, jogos_por_concurso, sementes, concursos)
+        if erro:
+            return {'erro': erro}
+        
+        parametros = {
+            'estrategias': estrategias,
+            'quantidade_numeros': quantidade_numeros,
+            'jogos_por_concurso': jogos_por_concurso,
+            'sementes': sementes,
+            'concursos': concursos
+        }
+        
+        with self._lock:
+            pendentes = sum(1 for job in self._jobs.values() if job['status'] in ('pendente', 'executando'))
+            if pendentes >= MAX_JOBS_PENDENTES:
+                return {'erro': f'Já existem {pendentes} backtests aguardando; tente mais tarde'}
+            
+            job = {
+                'id': uuid.uuid4().hex,
+                'status': 'pendente',
+                'parametros': parametros,
+                'criado_em': time.time(),
+                'iniciado_em': None,
+                'finalizado_em': None,
+                'total_tarefas': len(estrategias) * len(sementes),
+                'tarefas_concluidas': 0,
+                'resultado': None,
+                'erro': None
+            }
+            self._jobs[job['id']] = job
+            self._descartar_antigos()
+        
+        thread = threading.Thread(
+            target=self._executar_job,
+            args=(job['id'], parametros),
+            name=f"backtest-{job['id'][:8]}",
+            daemon=True
+        )
+        thread.start()
+        
+        return dict(job)
+    
+    def obter_job(self, job_id: str) -> Optional[Dict]:
+        """
+        Retorna o estado de um job
+        
+        Args:
+            job_id: Identificador retornado por enfileirar
+            
+        Returns:
+            Cópia do estado do job ou None se não existir
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+    
+    def _executar_job(self, job_id: str, parametros: Dict):
+        """
+        Executa o job na thread de trabalho, um backtest por vez
+        """
+        with self._execucao:
+            self._atualizar(job_id, status='executando', iniciado_em=time.time())
+            
+            def progresso(concluidas: int, total: int):
+                self._atualizar(job_id, tarefas_concluidas=concluidas)
+            
+            try:
+                resultado = self.executar(progresso=progresso, **parametros)
+            except Exception as e:
+                print(f"Erro no backtest {job_id}: {e}")
+                self._atualizar(job_id, status='erro', erro=str(e), finalizado_em=time.time())
+            else:
+                if 'erro' in resultado:
+                    self._atualizar(job_id, status='erro', erro=resultado['erro'], finalizado_em=time.time())
+                else:
+                    self._atualizar(job_id, status='concluido', resultado=resultado, finalizado_em=time.time())
+    
+    def _atualizar(self, job_id: str, **campos):
+        """
+        Atualiza campos de um job sob o lock
+        """
+        with self._lock:
+            self._jobs[job_id].update(campos)
+    
+    def _descartar_antigos(self):
+        """
+        Remove os jobs finalizados mais antigos além do limite do histórico
+        """
+        excedente = len(self._jobs) - MAX_JOBS_HISTORICO
+        for job_id in list(self._jobs):
+            if excedente <= 0:
+                break
+            if self._jobs[job_id]['status'] not in ('pendente', 'executando'):
+                del self._jobs[job_id]
+                excedente -= 1
+
+def _contexto_processos():
+    """
+    Contexto de multiprocessing do pool: forkserver onde existe, senão spawn
+    (fork copiaria locks de outras threads do Flask e pode travar)
+    """
+    metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(metodo)
+
+
+def _iniciar_processo(ordenadas: bytes, ordem: bytes):
+    """
+    Recebe o histórico uma vez por processo do pool
+    
+    Args:
+        ordenadas: Bloco das dezenas em ordem crescente
+        ordem: Bloco das dezenas na ordem do sorteio
+    """
+    _historico['ordenadas'] = ordenadas
+    _historico['ordem'] = ordem
+
+
+def _executar_tarefa(tarefa: Dict) -> Dict:
+    """
+    Tarefa executada em um processo do pool (por isso em nível de módulo),
+    sobre o histórico recebido em _iniciar_processo
+    """
+    return _backtest(_historico['ordenadas'], _historico['ordem'], tarefa)
+
+
+def _backtest(ordenadas: bytes, ordem: bytes, tarefa: Dict) -> Dict:
+    """
+    Backtest de uma estratégia com uma semente
+    
+    Args:
+        ordenadas: Bloco das dezenas em ordem crescente
+        ordem: Bloco das dezenas na ordem do sorteio
+        tarefa: Parâmetros da tarefa (ver BacktestService.executar)
+        
+    Returns:
+        Distribuição de acertos, média e prêmios da estratégia
+    """
+    inicio = tarefa['inicio']
+    quantidade = tarefa['quantidade_numeros']
+    jogos_por_concurso = tarefa['jogos_por_concurso']
+    metodo = QuinaService.estrategias()[tarefa['estrategia']]
+    rng = random.Random(tarefa['semente'])
+    
+    agregados = AgregadosIncrementais()
+    acertos = [0] * (DEZENAS_POR_CONCURSO + 1)
+    
+    for idx in range(len(ordenadas) // DEZENAS_POR_CONCURSO):
+        base = idx * DEZENAS_POR_CONCURSO
+        dezenas = ordenadas[base:base + DEZENAS_POR_CONCURSO]
+        
+        if idx >= inicio:
+            candidatos = agregados.candidatos()
+            sorteadas = set(dezenas)
+            sorteadas.discard(0)
+            for _ in range(jogos_por_concurso):
+                acertos[len(sorteadas.intersection(metodo(quantidade, candidatos, rng)))] += 1
+        
+        agregados.adicionar(dezenas, ordem[base:base + DEZENAS_POR_CONCURSO])
+    
+    jogos = sum(acertos)
+    return {
+        'estrategia': tarefa['estrategia'],
+        'semente': tarefa['semente'],
+        'jogos': jogos,
+        'media_acertos': round(sum(qtd * n for qtd, n in enumerate(acertos)) / jogos, 4) if jogos else 0,
+        'distribuicao_acertos': {str(qtd): n for qtd, n in enumerate(acertos)},
+        'premios': {nome: acertos[qtd] for qtd, nome in PREMIOS.items()}
+    }
@@ -0,0 +1,108 @@
+"""
+Cache em memória de respostas serializadas, versionado pelos dados do banco
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple
+import config
+
+
+class CacheRespostas:
+    """
+    Guarda o corpo serializado de respostas por nome, junto com a versão
+    dos dados com que foi calculado
+    
+    Uma entrada só é servida enquanto a versão informada for a mesma; uma
+    versão nova invalida a entrada automaticamente. Falhas simultâneas para
+    a mesma versão são agrupadas (single-flight): apenas uma thread calcula
+    e as demais aguardam o resultado.
+    """
+    
+    def __init__(self, max_entradas: int = None):
+        """
+        Inicializa o cache
+        
+        Args:
+            max_entradas: Quantidade máxima de respostas guardadas (LRU)
+        """
+        self.max_entradas = max_entradas or config.CACHE_MAX_ENTRADAS
+        self._lock = threading.Lock()
+        self._entradas = OrderedDict()
+        self._em_calculo = {}
+        self._contadores = {'acertos': 0, 'falhas': 0, 'aguardando': 0}
+    
+    def obter(self, nome: str, versao: Hashable, calcular: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """
+        Retorna a resposta em cache ou calcula uma única vez para a versão
+        
+        Args:
+            nome: Identificação da resposta (ex.: rota e parâmetros)
+            versao: Versão dos dados (ex.: ResultadoModel.buscar_versao_dados)
+            calcular: Função que gera o corpo serializado
+            
+        Returns:
+            Tupla (corpo, etag) com o etag forte derivado do corpo
+        """
+        chave = (nome, versao)
+        
+        with self._lock:
+            entrada = self._entradas.get(nome)
+            if entrada is not None and entrada[0] == versao:
+                self._entradas.move_to_end(nome)
+                self._contadores['acertos'] += 1
+                return entrada[1], entrada[2]
+            
+            evento = self._em_calculo.get(chave)
+            lider = evento is None
+            if lider:
+                evento = threading.Event()
+                self._em_calculo[chave] = evento
+                self._contadores['falhas'] += 1
+            else:
+                self._contadores['aguardando'] += 1
+        
+        if not lider:
+            evento.wait()
+            with self._lock:
+                entrada = self._entradas.get(nome)
+            if entrada is not None and entrada[0] == versao:
+                return entrada[1], entrada[2]
+            # O cálculo da outra thread falhou: calcula sem guardar
+            corpo = calcular()
+            return corpo, self._etag(corpo)
+        
+        try:
+            corpo = calcular()
+            etag = self._etag(corpo)
+            with self._lock:
+                self._entradas[nome] = (versao, corpo, etag)
+                self._entradas.move_to_end(nome)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+            return corpo, etag
+        finally:
+            with self._lock:
+                del self._em_calculo[chave]
+            evento.set()
+    
+    def estatisticas(self) -> dict:
+        """
+        Retorna os contadores de acertos, falhas e threads que aguardaram
+        """
+        with self._lock:
+            return dict(self._contadores, entradas=len(self._entradas))
+    
+    def limpar(self):
+        """
+        Descarta todas as respostas guardadas
+        """
+        with self._lock:
+            self._entradas.clear()
+    
+    @staticmethod
+    def _etag(corpo: bytes) -> str:
+        """
+        ETag forte calculado a partir do corpo da resposta
+        """
+        return hashlib.blake2b(corpo, digest_size=16).hexdigest()
@@ -0,0 +1,535 @@
+"""
+Serviço combinatório: ranqueamento colex e amostragem uniforme com
+restrições sobre o espaço C(80, k) de jogos da QUINA
+"""
+import random
+import threading
+from collections import OrderedDict
+from math import comb
+from typing import Dict, List, Optional, Tuple
+import config
+
+
+# Dezenas da QUINA
+DEZENAS = 80
+
+# Faixas de dezenas das restrições por faixa (mesmas da estratégia por_faixa)
+FAIXAS = ((1, 20), (21, 40), (41, 60), (61, 80))
+TAMANHO_FAIXA = 20
+
+# Marca de uma dimensão que não restringe mais nenhum complemento do jogo
+LIVRE = -1
+
+# Binomiais C(n, k) para n <= 80 e k <= MAX_JOGO
+BINOMIAIS = [
+    [comb(n, k) for k in range(config.MAX_JOGO + 1)]
+    for n in range(DEZENAS + 1)
+]
+
+
+class EspacoRestrito:
+    """
+    Conjunto dos jogos de k dezenas que atendem a um conjunto de restrições
+    
+    As dezenas são decididas de 1 a 80 (entra ou não no jogo) e cada estado
+    guarda apenas o que as restrições ativas exigem: quantidade escolhida,
+    soma, quantidade de pares, tamanho da sequência de consecutivos atual
+    e quantidade na faixa atual. O número de complementos válidos de cada
+    estado é contado por programação dinâmica memorizada, visitando só os
+    estados alcançáveis e viáveis (limites de soma e de pares podados). Soma
+    e pares viram LIVRE quando qualquer complemento os atende, o que junta
+    os estados equivalentes; filtros largos ficam com poucos estados.
+    
+    Com as contagens, um jogo uniforme sai em uma única passada pelas 80
+    dezenas, escolhendo cada decisão com probabilidade proporcional aos
+    complementos válidos: o custo por jogo não depende de quão apertadas
+    são as restrições.
+    
+    Attributes:
+        quantidade: Quantidade de dezenas por jogo
+        restricoes: Restrições normalizadas (ver CombinatoriaService)
+        total: Quantidade de jogos válidos
+    """
+    
+    def __init__(self, quantidade: int, restricoes: Dict):
+        """
+        Conta os jogos válidos
+        
+        Args:
+            quantidade: Quantidade de dezenas por jogo
+            restricoes: Restrições normalizadas
+            
+        Raises:
+            ValueError: Se a contagem exigir mais de COMBINATORIA_MAX_ESTADOS
+        """
+        self.quantidade = quantidade
+        self.restricoes = restricoes
+        
+        soma = restricoes.get('soma')
+        pares = restricoes.get('pares')
+        self._usa_soma = soma is not None
+        self._soma_min, self._soma_max = soma or (0, 0)
+        self._usa_pares = pares is not None
+        self._pares_min, self._pares_max = pares or (0, 0)
+        self._faixas = restricoes.get('faixas')
+        self._consecutivos = restricoes.get('max_consecutivos')
+        
+        # Pares ainda disponíveis da dezena i até 80
+        self._pares_restantes = [0] * (DEZENAS + 2)
+        for dezena in range(DEZENAS, 0, -1):
+            self._pares_restantes[dezena] = self._pares_restantes[dezena + 1] + (dezena % 2 == 0)
+        
+        self._contagens = {}
+        self._inicial = self._canonico(
+            1, 0, 0 if self._usa_soma else LIVRE, 0 if self._usa_pares else LIVRE, 0, 0
+        )
+        self.total = self._contar(self._inicial) if self._inicial is not None else 0
+    
+    @property
+    def estados(self) -> int:
+        """
+        Quantidade de estados guardados na tabela de contagens
+        """
+        return len(self._contagens)
+    
+    def amostrar(self, rng) -> List[int]:
+        """
+        Sorteia um jogo uniformemente entre os jogos válidos
+        
+        Args:
+            rng: Gerador aleatório (módulo random ou random.Random)
+            
+        Returns:
+            Dezenas do jogo em ordem crescente
+        """
+        contagens = self._contagens
+        estado = self._inicial
+        restante = contagens[estado]
+        dezenas = []
+        
+        # restante é a quantidade de jogos válidos a partir do estado atual;
+        # a dezena entra com probabilidade (jogos que a incluem) / restante
+        while estado[0] <= DEZENAS:
+            sem, com = self._transicoes(estado)
+            total_com = contagens[com] if com is not None else 0
+            
+            if total_com and rng.randrange(restante) < total_com:
+                dezenas.append(estado[0])
+                estado, restante = com, total_com
+            else:
+                estado = sem
+                restante -= total_com
+        
+        return dezenas
+    
+    def _contar(self, estado: tuple) -> int:
+        """
+        Quantidade de complementos válidos a partir do estado (memorizada)
+        """
+        contagens = self._contagens
+        total = contagens.get(estado)
+        if total is not None:
+            return total
+        
+        if estado[0] > DEZENAS:
+            total = 1 if self._final_valido(estado) else 0
+        else:
+            total = 0
+            for proximo in self._transicoes(estado):
+                if proximo is not None:
+                    total += self._contar(proximo)
+        
+        if len(contagens) >= config.COMBINATORIA_MAX_ESTADOS:
+            raise ValueError(
+                'Restrições exigem estados demais para a contagem exata '
+                f'(limite {config.COMBINATORIA_MAX_ESTADOS})'
+            )
+        contagens[estado] = total
+        return total
+    
+    def _transicoes(self, estado: tuple) -> Tuple[Optional[tuple], Optional[tuple]]:
+        """
+        Estados seguintes sem e com a dezena atual (None se inviável)
+        
+        Args:
+            estado: Tupla (dezena, escolhidas, soma, pares, sequência, na faixa)
+            
+        Returns:
+            Tupla (estado sem a dezena, estado com a dezena)
+        """
+        dezena, escolhidas, soma, pares, sequencia, na_faixa = estado
+        fim_faixa = self._faixas is not None and dezena % TAMANHO_FAIXA == 0
+        minimo, maximo = self._faixas[(dezena - 1) // TAMANHO_FAIXA] if self._faixas else (0, 0)
+        
+        sem = None
+        if not fim_faixa or minimo <= na_faixa <= maximo:
+            sem = self._canonico(dezena + 1, escolhidas, soma, pares, 0, 0 if fim_faixa else na_faixa)
+        
+        com = None
+        if (
+            escolhidas < self.quantidade
+            and (self._consecutivos is None or sequencia < self._consecutivos)
+            and (self._faixas is None or (na_faixa < maximo and (not fim_faixa or na_faixa + 1 >= minimo)))
+        ):
+            com = self._canonico(
+                dezena + 1,
+                escolhidas + 1,
+                soma + dezena if soma != LIVRE else LIVRE,
+                pares + (dezena % 2 == 0) if pares != LIVRE else LIVRE,
+                sequencia + 1 if self._consecutivos is not None else 0,
+                0 if fim_faixa or self._faixas is None else na_faixa + 1
+            )
+        
+        return sem, com
+    
+    def _canonico(
+        self,
+        dezena: int,
+        escolhidas: int,
+        soma: int,
+        pares: int,
+        sequencia: int,
+        na_faixa: int
+    ) -> Optional[tuple]:
+        """
+        Monta o estado antes da dezena informada, ou None se nenhum
+        complemento pode atender às restrições
+        
+        Soma e pares passam a LIVRE quando todo complemento possível os
+        atende, para que estados equivalentes compartilhem a contagem.
+        """
+        falta = self.quantidade - escolhidas
+        if falta > DEZENAS + 1 - dezena:
+            return None
+        
+        if soma != LIVRE:
+            # Menor e maior soma de 'falta' dezenas distintas entre dezena e 80
+            menor = soma + falta * dezena + falta * (falta - 1) // 2
+            maior = soma + falta * DEZENAS - falta * (falta - 1) // 2
+            if menor > self._soma_max or maior < self._soma_min:
+                return None
+            if menor >= self._soma_min and maior <= self._soma_max:
+                soma = LIVRE
+        
+        if pares != LIVRE:
+            disponiveis = self._pares_restantes[dezena]
+            impares = DEZENAS + 1 - dezena - disponiveis
+            menor = pares + max(0, falta - impares)
+            maior = pares + min(falta, disponiveis)
+            if menor > self._pares_max or maior < self._pares_min:
+                return None
+            if menor >= self._pares_min and maior <= self._pares_max:
+                pares = LIVRE
+        
+        return dezena, escolhidas, soma, pares, sequencia, na_faixa
+    
+    def _final_valido(self, estado: tuple) -> bool:
+        """
+        Indica se o estado após a dezena 80 corresponde a um jogo válido
+        """
+        _, escolhidas, soma, pares, _, _ = estado
+        return (
+            escolhidas == self.quantidade
+            and (soma == LIVRE or self._soma_min <= soma <= self._soma_max)
+            and (pares == LIVRE or self._pares_min <= pares <= self._pares_max)
+        )
+
+
+class CombinatoriaService:
+    """
+    Ranqueamento colex, contagem e amostragem uniforme de jogos com
+    restrições
+    
+    Restrições aceitas (todas opcionais):
+        soma_min, soma_max: Faixa da soma das dezenas
+        pares_min, pares_max: Faixa da quantidade de dezenas pares
+        faixas: Lista com 4 itens (01-20, 21-40, 41-60, 61-80), cada um
+            null, uma quantidade exata ou [mínimo, máximo]
+        max_consecutivos: Maior sequência de dezenas consecutivas
+        
+    Cada conjunto de restrições é contado uma vez e mantido em memória para
+    as amostragens seguintes, com os menos usados descartados quando a soma
+    dos estados passa de COMBINATORIA_MAX_ESTADOS_CACHE. A contagem roda
+    fora do lock e só uma vez por chave (quem chega durante a montagem
+    espera por ela); contagens grandes demais também ficam em memória,
+    como erro, para não serem refeitas.
+    """
+    
+    def __init__(self):
+        """
+        Inicializa o serviço
+        """
+        self._espacos = OrderedDict()
+        self._estados_em_cache = 0
+        self._montando = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def total(quantidade: int) -> int:
+        """
+        Quantidade de jogos de 'quantidade' dezenas sem restrições, C(80, k)
+        """
+        return BINOMIAIS[DEZENAS][quantidade]
+    
+    @staticmethod
+    def ranquear(dezenas: List[int]) -> int:
+        """
+        Posição colex do jogo entre todos os jogos com a mesma quantidade
+        de dezenas: soma de C(d_i - 1, i) com as dezenas em ordem crescente
+        
+        Args:
+            dezenas: Dezenas distintas entre 1 e 80
+            
+        Returns:
+            Índice entre 0 e C(80, k) - 1
+        """
+        return sum(
+            BINOMIAIS[dezena - 1][posicao]
+            for posicao, dezena in enumerate(sorted(dezenas), start=1)
+        )
+    
+    @staticmethod
+    def desranquear(indice: int, quantidade: int) -> List[int]:
+        """
+        Inverso de ranquear: jogo na posição colex informada
+        
+        Args:
+            indice: Índice entre 0 e C(80, k) - 1
+            quantidade: Quantidade de dezenas do jogo
+            
+        Returns:
+            Dezenas em ordem crescente
+        """
+        dezenas = []
+        candidato = DEZENAS
+        for posicao in range(quantidade, 0, -1):
+            # Maior c com C(c, posicao) <= indice
+            candidato -= 1
+            while BINOMIAIS[candidato][posicao] > indice:
+                candidato -= 1
+            indice -= BINOMIAIS[candidato][posicao]
+            dezenas.append(candidato + 1)
+        return dezenas[::-1]
+    
+    def validar(self, quantidade: int, restricoes: Optional[Dict]) -> Optional[str]:
+        """
+        Valida a quantidade de dezenas e as restrições
+        
+        Returns:
+            Mensagem de erro ou None se os parâmetros forem válidos
+        """
+        if not isinstance(quantidade, int) or not config.MIN_JOGO <= quantidade <= config.MAX_JOGO:
+            return f'Quantidade de números deve ser entre {config.MIN_JOGO} e {config.MAX_JOGO}'
+        
+        restricoes = restricoes or {}
+        if not isinstance(restricoes, dict):
+            return "'restricoes' deve ser um objeto"
+        
+        conhecidas = ('soma_min', 'soma_max', 'pares_min', 'pares_max', 'faixas', 'max_consecutivos')
+        for nome, valor in restricoes.items():
+            if nome not in conhecidas:
+                return f'Restrição inválida: {nome}. Opções: {", ".join(conhecidas)}'
+            if nome != 'faixas' and valor is not None and (not isinstance(valor, int) or valor < 0):
+                return f"'{nome}' deve ser um inteiro não negativo"
+        
+        if restricoes.get('max_consecutivos') == 0:
+            return "'max_consecutivos' deve ser maior que zero"
+        
+        faixas = restricoes.get('faixas')
+        if faixas is not None:
+            if not isinstance(faixas, list) or len(faixas) != len(FAIXAS):
+                return f"'faixas' deve ser uma lista com {len(FAIXAS)} itens (01-20, 21-40, 41-60, 61-80)"
+            for faixa in faixas:
+                if faixa is None or (isinstance(faixa, int) and faixa >= 0):
+                    continue
+                if (
+                    not isinstance(faixa, list)
+                    or len(faixa) != 2
+                    or not all(isinstance(limite, int) and limite >= 0 for limite in faixa)
+                ):
+                    return "Cada faixa deve ser null, uma quantidade ou [mínimo, máximo]"
+        
+        return None
+    
+    def contar(self, quantidade: int, restricoes: Optional[Dict] = None) -> Dict:
+        """
+        Conta os jogos que atendem às restrições
+        
+        Args:
+            quantidade: Quantidade de dezenas por jogo
+            restricoes: Restrições (ver a documentação da classe)
+            
+        Returns:
+            Dicionário com total, total sem restrições e percentual
+        """
+        erro = self.validar(quantidade, restricoes)
+        if erro:
+            return {'erro': erro}
+        
+        try:
+            espaco = self._espaco(quantidade, restricoes)
+        except ValueError as e:
+            return {'erro': str(e)}
+        
+        total = espaco.total if espaco is not None else self.total(quantidade)
+        sem_restricoes = self.total(quantidade)
+        
+        return {
+            'quantidade_numeros': quantidade,
+            'restricoes': restricoes or {},
+            'total': total,
+            'total_sem_restricoes': sem_restricoes,
+            'percentual': round(total / sem_restricoes * 100, 6)
+        }
+    
+    def amostrar(
+        self,
+        quantidade: int,
+        quantidade_jogos: int,
+        restricoes: Optional[Dict] = None,
+        semente: Optional[int] = None
+    ) -> Dict:
+        """
+        Sorteia jogos uniformemente entre os que atendem às restrições,
+        sem rejeição
+        
+        Args:
+            quantidade: Quantidade de dezenas por jogo
+            quantidade_jogos: Quantidade de jogos
+            restricoes: Restrições (ver a documentação da classe)
+            semente: Semente opcional para jogos reproduzíveis
+            
+        Returns:
+            Dicionário com o total de jogos válidos e os jogos sorteados,
+            cada um com as dezenas e o índice colex
+        """
+        erro = self.validar(quantidade, restricoes)
+        if erro:
+            return {'erro': erro}
+        if quantidade_jogos < 1 or quantidade_jogos > config.COMBINATORIA_MAX_JOGOS:
+            return {'erro': f'Quantidade de jogos deve ser entre 1 e {config.COMBINATORIA_MAX_JOGOS}'}
+        
+        try:
+            espaco = self._espaco(quantidade, restricoes)
+        except ValueError as e:
+            return {'erro': str(e)}
+        
+        rng = random.Random(semente) if semente is not None else random
+        
+        if espaco is None:
+            # Sem restrições: índice uniforme em C(80, k) desranqueado
+            total = self.total(quantidade)
+            jogos = [self.desranquear(rng.randrange(total), quantidade) for _ in range(quantidade_jogos)]
+        elif espaco.total:
+            total = espaco.total
+            jogos = [espaco.amostrar(rng) for _ in range(quantidade_jogos)]
+        else:
+            total = 0
+            jogos = []
+        
+        return {
+            'quantidade_numeros': quantidade,
+            'restricoes': restricoes or {},
+            'total': total,
+            'jogos': [{'dezenas': jogo, 'indice': self.ranquear(jogo)} for jogo in jogos]
+        }
+    
+    def _espaco(self, quantidade: int, restricoes: Optional[Dict]) -> Optional[EspacoRestrito]:
+        """
+        Espaço restrito das restrições informadas, montado uma única vez
+        (None quando não há restrição ativa)
+        
+        Raises:
+            ValueError: Se a contagem exigir mais de COMBINATORIA_MAX_ESTADOS
+        """
+        normalizadas = self._normalizar(quantidade, restricoes or {})
+        if not normalizadas:
+            return None
+        
+        chave = (quantidade, tuple(sorted(normalizadas.items())))
+        while True:
+            with self._lock:
+                if chave in self._espacos:
+                    self._espacos.move_to_end(chave)
+                    espaco = self._espacos[chave]
+                    if isinstance(espaco, str):
+                        raise ValueError(espaco)
+                    return espaco
+                
+                montagem = self._montando.get(chave)
+                if montagem is None:
+                    montagem = self._montando[chave] = threading.Event()
+                    break
+            
+            # Outra requisição está montando a mesma chave
+            montagem.wait()
+        
+        try:
+            try:
+                espaco = EspacoRestrito(quantidade, normalizadas)
+            except ValueError as e:
+                espaco = str(e)
+            
+            with self._lock:
+                self._guardar(chave, espaco)
+        finally:
+            with self._lock:
+                del self._montando[chave]
+            montagem.set()
+        
+        if isinstance(espaco, str):
+            raise ValueError(espaco)
+        return espaco
+    
+    def _guardar(self, chave: Tuple, espaco):
+        """
+        Guarda um espaço (ou a mensagem de erro da contagem) e descarta os
+        menos usados além de COMBINATORIA_MAX_ESTADOS_CACHE estados; o
+        recém-montado sempre fica (chamado sob o lock)
+        """
+        self._espacos[chave] = espaco
+        self._estados_em_cache += self._custo(espaco)
+        
+        while self._estados_em_cache > config.COMBINATORIA_MAX_ESTADOS_CACHE and len(self._espacos) > 1:
+            _, antigo = self._espacos.popitem(last=False)
+            self._estados_em_cache -= self._custo(antigo)
+    
+    @staticmethod
+    def _custo(espaco) -> int:
+        """
+        Estados que uma entrada do cache ocupa (erros contam como 1)
+        """
+        return 1 if isinstance(espaco, str) else max(espaco.estados, 1)
+    
+    @staticmethod
+    def _normalizar(quantidade: int, restricoes: Dict) -> Dict:
+        """
+        Converte restrições validadas em faixas (mínimo, máximo), omitindo
+        as que não restringem nada
+        """
+        normalizadas = {}
+        
+        soma_min = restricoes.get('soma_min')
+        soma_max = restricoes.get('soma_max')
+        if soma_min is not None or soma_max is not None:
+            normalizadas['soma'] = (soma_min or 0, soma_max if soma_max is not None else DEZENAS * quantidade)
+        
+        pares_min = restricoes.get('pares_min')
+        pares_max = restricoes.get('pares_max')
+        if pares_min is not None or pares_max is not None:
+            normalizadas['pares'] = (pares_min or 0, pares_max if pares_max is not None else quantidade)
+        
+        faixas = restricoes.get('faixas')
+        if faixas is not None and any(faixa is not None for faixa in faixas):
+            normalizadas['faixas'] = tuple(
+                (0, TAMANHO_FAIXA) if faixa is None
+                else (faixa, faixa) if isinstance(faixa, int)
+                else tuple(faixa)
+                for faixa in faixas
+            )
+        
+        consecutivos = restricoes.get('max_consecutivos')
+        if consecutivos is not None and consecutivos < quantidade:
+            normalizadas['max_consecutivos'] = consecutivos
+        
+        return normalizadas
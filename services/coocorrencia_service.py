@@ -0,0 +1,240 @@
+"""
+Serviço de coocorrência de dezenas (pares, trincas e quadras) da QUINA
+"""
+import heapq
+import threading
+from array import array
+from collections import Counter
+from itertools import combinations
+from typing import Dict, Iterable, List
+from models.draw_store import BYTES_MASCARA, DEZENAS_POR_CONCURSO, DrawStore, HistoricoCompacto
+from models.resultado_model import ResultadoModel
+
+
+# Base usada para empacotar combinações de dezenas em um único inteiro
+BASE = 81
+
+# Máximo de parceiros de uma dezena (as outras 79) e de trincas/quadras por consulta
+MAX_PARCEIROS = 79
+MAX_COMBINACOES = 1000
+
+
+class CoocorrenciaService:
+    """
+    Conta quantas vezes dezenas saíram juntas no mesmo concurso
+    
+    Mantém uma matriz 81×81 de pares e tabelas esparsas (dicionários com a
+    combinação empacotada em um inteiro) de trincas e quadras, de modo que a
+    memória cresce com as combinações efetivamente sorteadas e não com o
+    cubo 80³. As estruturas são estendidas a cada concurso novo no DrawStore.
+    """
+    
+    def __init__(self):
+        """
+        Inicializa o serviço (as contagens são montadas sob demanda)
+        """
+        self.resultado_model = ResultadoModel()
+        self.draw_store = DrawStore.instancia(self.resultado_model.db_path)
+        self._lock = threading.Lock()
+        self._limpar()
+    
+    def parceiros(self, dezena: int, limite: int = 10) -> List[Dict]:
+        """
+        Dezenas que mais saíram junto com a dezena informada
+        
+        Args:
+            dezena: Dezena de referência (1-80)
+            limite: Quantidade de parceiros retornados
+            
+        Returns:
+            Lista de dicionários com número e frequência, por frequência
+            decrescente e depois por número
+        """
+        with self._lock:
+            self._atualizar()
+            linha = self._pares[dezena * BASE:(dezena + 1) * BASE]
+        
+        parceiros = [
+            {'numero': numero, 'frequencia': freq}
+            for numero, freq in enumerate(linha)
+            if freq
+        ]
+        parceiros.sort(key=lambda x: (-x['frequencia'], x['numero']))
+        return parceiros[:limite]
+    
+    def contar_juntos(self, dezenas: Iterable[int]) -> int:
+        """
+        Quantidade de concursos em que todas as dezenas informadas saíram
+        
+        Pares, trincas e quadras são lidos das tabelas; as cinco dezenas de
+        um concurso completo são contadas pelas máscaras de bits.
+        
+        Args:
+            dezenas: De 1 a 5 dezenas distintas
+            
+        Returns:
+            Quantidade de concursos
+        """
+        dezenas = sorted(set(dezenas))
+        
+        with self._lock:
+            self._atualizar()
+            
+            if len(dezenas) == 1:
+                return self._frequencias[dezenas[0]]
+            if len(dezenas) == 2:
+                return self._pares[dezenas[0] * BASE + dezenas[1]]
+            if len(dezenas) == 3:
+                return self._trincas.get(self._empacotar(dezenas), 0)
+            if len(dezenas) == 4:
+                return self._quadras.get(self._empacotar(dezenas), 0)
+            
+            alvo = 0
+            for dezena in dezenas:
+                alvo |= 1 << (dezena - 1)
+            return sum(1 for mascara in self._mascaras if mascara & alvo == alvo)
+    
+    def matriz_pares(self) -> List[List[int]]:
+        """
+        Matriz 80×80 de pares (linha i, coluna j = dezenas i+1 e j+1)
+        
+        Returns:
+            Lista de 80 listas com 80 contagens
+        """
+        with self._lock:
+            self._atualizar()
+            return [
+                self._pares[linha * BASE + 1:(linha + 1) * BASE].tolist()
+                for linha in range(1, BASE)
+            ]
+    
+    def top_trincas(self, limite: int = 20) -> List[Dict]:
+        """
+        Trincas que mais saíram juntas
+        
+        Args:
+            limite: Quantidade de trincas retornadas
+            
+        Returns:
+            Lista de dicionários com dezenas e frequência
+        """
+        with self._lock:
+            self._atualizar()
+            return self._top(self._trincas, 3, limite)
+    
+    def top_quadras(self, limite: int = 20) -> List[Dict]:
+        """
+        Quadras que mais saíram juntas
+        
+        Args:
+            limite: Quantidade de quadras retornadas
+            
+        Returns:
+            Lista de dicionários com dezenas e frequência
+        """
+        with self._lock:
+            self._atualizar()
+            return self._top(self._quadras, 4, limite)
+    
+    def _atualizar(self):
+        """
+        Sincroniza as contagens com o histórico atual do DrawStore,
+        processando apenas os concursos novos quando possível
+        (deve ser chamado com o lock adquirido)
+        """
+        dados = self.draw_store.obter()
+        if dados is self._dados:
+            return
+        
+        inicio = len(self._dados)
+        if not dados.contem_prefixo(self._dados):
+            self._limpar()
+            inicio = 0
+        
+        frequencias = self._frequencias
+        pares = self._pares
+        trincas = self._trincas
+        quadras = self._quadras
+        ordenadas = dados.ordenadas
+        mascaras = dados.mascaras
+        
+        chaves_trincas = []
+        chaves_quadras = []
+        
+        for idx in range(inicio, len(dados)):
+            base = idx * DEZENAS_POR_CONCURSO
+            dezenas = [d for d in ordenadas[base:base + DEZENAS_POR_CONCURSO] if d]
+            
+            for dezena in dezenas:
+                frequencias[dezena] += 1
+            for a, b in combinations(dezenas, 2):
+                pares[a * BASE + b] += 1
+                pares[b * BASE + a] += 1
+            
+            # As chaves são acumuladas e contadas em bloco pelo Counter
+            chaves_trincas.extend(
+                (a * BASE + b) * BASE + c for a, b, c in combinations(dezenas, 3)
+            )
+            chaves_quadras.extend(
+                ((a * BASE + b) * BASE + c) * BASE + d for a, b, c, d in combinations(dezenas, 4)
+            )
+            
+            inicio_mascara = idx * BYTES_MASCARA
+            self._mascaras.append(
+                int.from_bytes(mascaras[inicio_mascara:inicio_mascara + BYTES_MASCARA], 'little')
+            )
+        
+        trincas.update(chaves_trincas)
+        quadras.update(chaves_quadras)
+        self._dados = dados
+    
+    def _limpar(self):
+        """
+        Zera todas as contagens
+        """
+        self._frequencias = [0] * BASE
+        self._pares = array('I', bytes(4 * BASE * BASE))
+        self._trincas = Counter()
+        self._quadras = Counter()
+        self._mascaras = []
+        self._dados = HistoricoCompacto()
+    
+    @staticmethod
+    def _empacotar(dezenas: Iterable[int]) -> int:
+        """
+        Empacota dezenas em ordem crescente em um inteiro (base 81)
+        """
+        chave = 0
+        for dezena in dezenas:
+            chave = chave * BASE + dezena
+        return chave
+    
+    @staticmethod
+    def _desempacotar(chave: int, tamanho: int) -> List[int]:
+        """
+        Inverso de _empacotar
+        """
+        dezenas = []
+        for _ in range(tamanho):
+            chave, dezena = divmod(chave, BASE)
+            dezenas.append(dezena)
+        return dezenas[::-1]
+    
+    def _top(self, tabela: Counter, tamanho: int, limite: int) -> List[Dict]:
+        """
+        Maiores contagens de uma tabela esparsa, desempatando pelas dezenas
+        
+        Args:
+            tabela: Contagens por combinação empacotada
+            tamanho: Quantidade de dezenas por combinação
+            limite: Quantidade de combinações retornadas
+            
+        Returns:
+            Lista de dicionários com dezenas e frequência
+        """
+        # A chave empacotada preserva a ordem lexicográfica das combinações
+        maiores = heapq.nsmallest(limite, tabela.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            {'dezenas': self._desempacotar(chave, tamanho), 'frequencia': freq}
+            for chave, freq in maiores
+        ]
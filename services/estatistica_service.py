@@ -1,10 +1,21 @@
 """
 Serviço para cálculos estatísticos dos resultados da QUINA
 """
-from typing import Dict, List, Tuple
+import threading
+from typing import Dict, List, Optional, Tuple
 from collections import Counter, defaultdict
 import config
+from models.draw_store import DEZENAS_POR_CONCURSO, DrawStore, HistoricoCompacto
 from models.resultado_model import ResultadoModel
+from services.indice_cumulativo import IndiceCumulativo
+from services.intervalos_dezenas import IntervalosDezenas
+from services.matrizes_posicionais import ORDENS, MatrizesPosicionais
+from services.posicao_ordenada import PosicaoOrdenada
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele os agregados usam Python puro
+    np = None
 
 
 class EstatisticaService:
@@ -17,23 +28,306 @@ class EstatisticaService:
         Inicializa o serviço
         """
         self.resultado_model = ResultadoModel()
+        self.draw_store = DrawStore.instancia(self.resultado_model.db_path)
+        self._indice = None
+        self._lock_indice = threading.Lock()
+        self._matrizes = None
+        self._lock_matrizes = threading.Lock()
+        self._intervalos = None
+        self._lock_intervalos = threading.Lock()
+        self._posicao_ordenada = None
+        self._lock_posicao_ordenada = threading.Lock()
     
     def calcular_estatisticas_completas(self) -> Dict:
         """
         Calcula todas as estatísticas disponíveis
         
+        Lê os agregados uma única vez e formata todas as estatísticas
+        a partir deles.
+        
         Returns:
             Dicionário com todas as estatísticas
         """
+        agregados = self._agregados()
+        
+        return {
+            'total_concursos': agregados['total_concursos'],
+            'frequencia_numeros': self._formatar_frequencia(agregados),
+            'atrasos': self._formatar_atrasos(agregados),
+            'pares_impares': self._formatar_pares_impares(agregados),
+            'por_faixa': self._formatar_por_faixa(agregados),
+            'por_digito': self._formatar_por_digito(agregados),
+            'por_posicao_sorteio': self._formatar_por_posicao_sorteio(agregados)
+        }
+    
+    def calcular_estatisticas_janela(
+        self,
+        de: Optional[int] = None,
+        ate: Optional[int] = None,
+        ultimos: Optional[int] = None
+    ) -> Dict:
+        """
+        Calcula as estatísticas de uma janela contígua de concursos
+        
+        Usa o índice de contagens acumuladas: cada consulta custa uma
+        subtração de linhas, independentemente do tamanho do histórico.
+        Como o índice não guarda a ordem das aparições, empates no ranking
+        por posição são desempatados pelo número.
+        
+        Args:
+            de: Primeiro concurso da janela (inclusive)
+            ate: Último concurso da janela (inclusive)
+            ultimos: Quantidade de concursos mais recentes (exclusivo com de/ate)
+            
+        Returns:
+            Dicionário com as estatísticas da janela ou com a chave 'erro'
+        """
+        erro = self.validar_janela(de=de, ate=ate, ultimos=ultimos)
+        if erro:
+            return {'erro': erro}
+        
+        indice = self._indice_cumulativo()
+        inicio, fim = indice.localizar(de=de, ate=ate, ultimos=ultimos)
+        
+        frequencias = Counter({
+            numero: freq
+            for numero, freq in enumerate(indice.frequencias(inicio, fim))
+            if numero and freq
+        })
+        posicoes = {
+            posicao: Counter({
+                numero: freq
+                for numero, freq in enumerate(contagens)
+                if numero and freq
+            })
+            for posicao, contagens in enumerate(indice.frequencias_posicao(inicio, fim), start=1)
+        }
+        pares, impares, faixas, digitos = self._totais_por_numero(frequencias)
+        
+        agregados = {
+            'total_concursos': fim - inicio,
+            'frequencias': frequencias,
+            'pares': pares,
+            'impares': impares,
+            'faixas': faixas,
+            'digitos': digitos,
+            'posicoes': posicoes
+        }
+        numeros = indice.dados.numeros
+        
+        return {
+            'de': numeros[inicio] if fim > inicio else None,
+            'ate': numeros[fim - 1] if fim > inicio else None,
+            'total_concursos': fim - inicio,
+            'frequencia_numeros': self._formatar_frequencia(agregados),
+            'pares_impares': self._formatar_pares_impares(agregados),
+            'por_faixa': self._formatar_por_faixa(agregados),
+            'por_digito': self._formatar_por_digito(agregados),
+            'por_posicao_sorteio': self._formatar_por_posicao_sorteio(agregados)
+        }
+    
+    @staticmethod
+    def validar_janela(
+        de: Optional[int] = None,
+        ate: Optional[int] = None,
+        ultimos: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Valida os parâmetros de uma janela de concursos
+        
+        Returns:
+            Mensagem de erro ou None se a janela for válida
+        """
+        if ultimos is not None and (de is not None or ate is not None):
+            return "Use 'ultimos' ou 'de'/'ate', não ambos"
+        if ultimos is not None and ultimos < 1:
+            return "'ultimos' deve ser maior que zero"
+        if de is not None and ate is not None and de > ate:
+            return "'de' deve ser menor ou igual a 'ate'"
+        return None
+    
+    def _indice_cumulativo(self) -> IndiceCumulativo:
+        """
+        Retorna o índice de contagens acumuladas do histórico atual,
+        estendendo-o quando chegam concursos novos
+        
+        Returns:
+            Índice correspondente ao histórico do DrawStore
+        """
+        dados = self.draw_store.obter()
+        with self._lock_indice:
+            if self._indice is None:
+                self._indice = IndiceCumulativo(dados)
+            else:
+                self._indice = self._indice.atualizar(dados)
+            return self._indice
+    
+    def calcular_matrizes_posicionais(self) -> Dict:
+        """
+        Distribuição completa 5×80 das dezenas por posição, na ordem do
+        sorteio e na ordem crescente
+        
+        Returns:
+            Dicionário com o total de concursos considerados e as matrizes
+            (linha = posição, coluna j = dezena j+1) de cada ordem
+        """
+        matrizes = self._matrizes_posicionais()
+        
+        return {
+            'total_concursos': len(matrizes.dados),
+            'concursos_com_ordem': matrizes.validos['sorteio'],
+            'concursos_completos': matrizes.validos['ordenada'],
+            'sorteio': matrizes.distribuicao('sorteio'),
+            'ordenada': matrizes.distribuicao('ordenada')
+        }
+    
+    def calcular_transicoes_posicionais(self, ordem: str = 'sorteio') -> Dict:
+        """
+        Matrizes de transição por posição entre concursos consecutivos
+        
+        Args:
+            ordem: 'sorteio' ou 'ordenada'
+            
+        Returns:
+            Dicionário com as cinco matrizes 80×80 (linha = dezena no
+            concurso t, coluna = dezena no concurso t+1) ou com a chave 'erro'
+        """
+        if ordem not in ORDENS:
+            return {'erro': f'Ordem inválida. Opções: {", ".join(ORDENS)}'}
+        
+        matrizes = self._matrizes_posicionais()
+        
         return {
-            'total_concursos': self._contar_concursos(),
-            'frequencia_numeros': self.calcular_frequencia_numeros(),
-            'atrasos': self.calcular_atrasos(),
-            'pares_impares': self.calcular_pares_impares(),
-            'por_faixa': self.calcular_por_faixa(),
-            'por_digito': self.calcular_por_digito(),
-            'por_posicao_sorteio': self.calcular_por_posicao_sorteio()
+            'ordem': ordem,
+            'total_concursos': matrizes.validos[ordem],
+            'transicoes': {
+                f'posicao_{posicao}': matriz
+                for posicao, matriz in enumerate(matrizes.transicao(ordem), start=1)
+            }
+        }
+    
+    def calcular_posicao_ordenada(
+        self,
+        janela: int = 20,
+        ultimos: int = 100,
+        dado_posicao: Optional[int] = None,
+        dado_valor: Optional[int] = None
+    ) -> Dict:
+        """
+        Análise posicional pela ordem crescente (k-ésima menor dezena)
+        
+        Considera apenas concursos com as cinco dezenas.
+        
+        Args:
+            janela: Quantidade de concursos de cada média móvel
+            ultimos: Quantidade de pontos da média móvel (os mais recentes)
+            dado_posicao: Posição conhecida (1-5) da distribuição condicional
+            dado_valor: Dezena na posição conhecida
+            
+        Returns:
+            Dicionário com distribuição e média de cada posição, médias
+            móveis e, se pedida, a distribuição condicional das demais
+            posições; ou com a chave 'erro'
+        """
+        erro = self.validar_posicao_ordenada(
+            janela=janela,
+            ultimos=ultimos,
+            dado_posicao=dado_posicao,
+            dado_valor=dado_valor
+        )
+        if erro:
+            return {'erro': erro}
+        
+        analise = self._analise_posicao_ordenada()
+        distribuicoes = self._matrizes_posicionais().distribuicao('ordenada')
+        medias = analise.medias()
+        
+        posicoes = []
+        for posicao, (frequencias, media) in enumerate(zip(distribuicoes, medias), start=1):
+            posicoes.append({
+                'posicao': posicao,
+                'media': media,
+                'mais_frequente': max(range(80), key=lambda i: frequencias[i]) + 1 if any(frequencias) else None,
+                'frequencias': frequencias
+            })
+        
+        concursos, moveis = analise.medias_moveis(janela, ultimos)
+        medias_moveis = {'janela': janela, 'concursos': concursos}
+        for posicao, valores in enumerate(moveis, start=1):
+            medias_moveis[f'posicao_{posicao}'] = valores
+        
+        resultado = {
+            'total_concursos': len(analise),
+            'posicoes': posicoes,
+            'medias_moveis': medias_moveis
         }
+        
+        if dado_posicao is not None:
+            total, condicionais = analise.condicional(dado_posicao - 1, dado_valor)
+            condicional = {
+                'posicao': dado_posicao,
+                'valor': dado_valor,
+                'total_concursos': total
+            }
+            for posicao, frequencias in enumerate(condicionais, start=1):
+                if posicao != dado_posicao:
+                    condicional[f'posicao_{posicao}'] = frequencias
+            resultado['condicional'] = condicional
+        
+        return resultado
+    
+    @staticmethod
+    def validar_posicao_ordenada(
+        janela: int = 20,
+        ultimos: int = 100,
+        dado_posicao: Optional[int] = None,
+        dado_valor: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Valida os parâmetros de calcular_posicao_ordenada
+        
+        Returns:
+            Mensagem de erro ou None se os parâmetros forem válidos
+        """
+        if janela < 1:
+            return "'janela' deve ser maior que zero"
+        if ultimos < 1:
+            return "'ultimos' deve ser maior que zero"
+        if (dado_posicao is None) != (dado_valor is None):
+            return "Informe 'dado_posicao' e 'dado_valor' juntos"
+        if dado_posicao is not None and not 1 <= dado_posicao <= DEZENAS_POR_CONCURSO:
+            return "'dado_posicao' deve estar entre 1 e 5"
+        if dado_valor is not None and not 1 <= dado_valor <= 80:
+            return "'dado_valor' deve estar entre 1 e 80"
+        return None
+    
+    def _analise_posicao_ordenada(self) -> PosicaoOrdenada:
+        """
+        Retorna a análise pela ordem crescente do histórico atual, montando-a
+        apenas quando o DrawStore entrega uma versão nova dos dados
+        
+        Returns:
+            Análise correspondente ao histórico do DrawStore
+        """
+        dados = self.draw_store.obter()
+        with self._lock_posicao_ordenada:
+            if self._posicao_ordenada is None or self._posicao_ordenada.dados is not dados:
+                self._posicao_ordenada = PosicaoOrdenada(dados)
+            return self._posicao_ordenada
+    
+    def _matrizes_posicionais(self) -> MatrizesPosicionais:
+        """
+        Retorna as matrizes posicionais do histórico atual, montando-as
+        apenas quando o DrawStore entrega uma versão nova dos dados
+        
+        Returns:
+            Matrizes correspondentes ao histórico do DrawStore
+        """
+        dados = self.draw_store.obter()
+        with self._lock_matrizes:
+            if self._matrizes is None or self._matrizes.dados is not dados:
+                self._matrizes = MatrizesPosicionais(dados)
+            return self._matrizes
     
     def calcular_frequencia_numeros(self) -> List[Dict]:
         """
@@ -42,26 +336,326 @@ class EstatisticaService:
         Returns:
             Lista de dicionários com número e frequência, ordenados por frequência
         """
-        resultados = self.resultado_model.buscar_todos()
+        return self._formatar_frequencia(self._agregados())
+    
+    def calcular_atrasos(self) -> List[Dict]:
+        """
+        Calcula o atraso de cada número (concursos desde última aparição)
+        
+        Returns:
+            Lista de dicionários com número e atraso, ordenados por atraso
+        """
+        return self._formatar_atrasos(self._agregados())
+    
+    def calcular_intervalos(self) -> List[Dict]:
+        """
+        Calcula, para cada número, o atraso atual, o atraso máximo histórico
+        e a média e os percentis dos intervalos entre aparições
         
-        if not resultados:
+        Os intervalos são mantidos em memória e estendidos apenas com os
+        concursos novos; o resumo é calculado uma vez por versão dos dados.
+        
+        Returns:
+            Lista de dicionários por número, ordenados por atraso atual
+        """
+        dados = self.draw_store.obter()
+        with self._lock_intervalos:
+            if self._intervalos is None:
+                self._intervalos = IntervalosDezenas(dados)
+            else:
+                self._intervalos = self._intervalos.atualizar(dados)
+            resumo = self._intervalos.resumo()
+        
+        if not len(dados):
             return []
         
-        # Conta frequência de cada número
+        return sorted(resumo, key=lambda x: (-x['atraso_atual'], x['numero']))
+    
+    def calcular_pares_impares(self) -> Dict:
+        """
+        Calcula a distribuição de números pares e ímpares
+        
+        Returns:
+            Dicionário com estatísticas de pares e ímpares
+        """
+        return self._formatar_pares_impares(self._agregados())
+    
+    def calcular_por_faixa(self) -> List[Dict]:
+        """
+        Calcula a frequência de números por faixa de dezenas
+        Faixas: 01-20, 21-40, 41-60, 61-80
+        
+        Returns:
+            Lista de dicionários com informações de cada faixa
+        """
+        return self._formatar_por_faixa(self._agregados())
+    
+    def calcular_por_digito(self) -> List[Dict]:
+        """
+        Calcula a frequência por dígito final (0-9)
+        
+        Returns:
+            Lista de dicionários com frequência de cada dígito
+        """
+        return self._formatar_por_digito(self._agregados())
+    
+    def calcular_por_posicao_sorteio(self) -> Dict:
+        """
+        Calcula quais números aparecem mais em cada posição do sorteio (1ª a 5ª)
+        
+        Returns:
+            Dicionário com estatísticas por posição
+        """
+        return self._formatar_por_posicao_sorteio(self._agregados())
+    
+    def _agregados(self) -> Dict:
+        """
+        Obtém os agregados usados pelos formatadores
+        
+        Por padrão lê as tabelas de agregados materializados (custo constante,
+        independente do tamanho do histórico); se desabilitado ou em caso de
+        erro, percorre o histórico do DrawStore.
+        
+        Returns:
+            Dicionário com os contadores brutos usados pelos formatadores
+        """
+        if config.ESTATISTICA_AGREGADOS:
+            agregados = self.resultado_model.buscar_agregados()
+            if agregados is not None:
+                return self._agregar_tabelas(agregados)
+        
+        return self._agregar(self.draw_store.obter())
+    
+    def _agregar_tabelas(self, agregados: Dict) -> Dict:
+        """
+        Monta os agregados a partir das tabelas materializadas
+        
+        Args:
+            agregados: Linhas retornadas por ResultadoModel.buscar_agregados
+            
+        Returns:
+            Dicionário com os contadores brutos usados pelos formatadores
+        """
+        frequencias = Counter()
+        ultima_aparicao = {num: -1 for num in range(1, 81)}
+        for dezena, frequencia, atraso in agregados['dezenas']:
+            frequencias[dezena] = frequencia
+            ultima_aparicao[dezena] = atraso
+        
+        # As linhas de cada posição vêm da dezena vista mais recentemente para
+        # a mais antiga, a mesma ordem de inserção da passada sobre o histórico
+        # (que define o desempate de most_common)
+        posicoes = {posicao: Counter() for posicao in range(1, 6)}
+        for posicao, dezena, frequencia in agregados['posicoes']:
+            posicoes.setdefault(posicao, Counter())[dezena] = frequencia
+        
+        pares, impares, faixas, digitos = self._totais_por_numero(frequencias)
+        
+        return {
+            'total_concursos': agregados['total_concursos'],
+            'frequencias': frequencias,
+            'ultima_aparicao': ultima_aparicao,
+            'pares': pares,
+            'impares': impares,
+            'faixas': faixas,
+            'digitos': digitos,
+            'posicoes': posicoes
+        }
+    
+    def _agregar(self, dados: HistoricoCompacto) -> Dict:
+        """
+        Percorre o histórico uma única vez acumulando todos os agregados
+        
+        Args:
+            dados: Histórico compacto obtido do DrawStore
+            
+        Returns:
+            Dicionário com os contadores brutos usados pelos formatadores
+        """
+        if np is not None and config.ESTATISTICA_NUMPY:
+            return self._agregar_numpy(dados)
+        
         frequencias = Counter()
-        for resultado in resultados:
-            if resultado.get('listaDezenas'):
-                for numero in resultado['listaDezenas']:
-                    frequencias[int(numero)] += 1
+        ultima_aparicao = {num: -1 for num in range(1, 81)}
+        posicoes = {
+            1: Counter(),
+            2: Counter(),
+            3: Counter(),
+            4: Counter(),
+            5: Counter()
+        }
+        
+        total_concursos = len(dados)
+        ordenadas = dados.ordenadas
+        ordem = dados.ordem
+        
+        # Percorre resultados do mais recente ao mais antigo
+        for idx in range(total_concursos):
+            inicio = (total_concursos - 1 - idx) * DEZENAS_POR_CONCURSO
+            fim = inicio + DEZENAS_POR_CONCURSO
+            
+            for numero in ordenadas[inicio:fim]:
+                if numero:
+                    frequencias[numero] += 1
+                    if ultima_aparicao[numero] == -1:
+                        ultima_aparicao[numero] = idx
+            
+            # Ordem do sorteio disponível (bloco não preenchido com zeros)
+            if ordem[inicio]:
+                for posicao, numero in enumerate(ordem[inicio:fim], start=1):
+                    posicoes[posicao][numero] += 1
+        
+        pares, impares, faixas, digitos = self._totais_por_numero(frequencias)
+        
+        return {
+            'total_concursos': total_concursos,
+            'frequencias': frequencias,
+            'ultima_aparicao': ultima_aparicao,
+            'pares': pares,
+            'impares': impares,
+            'faixas': faixas,
+            'digitos': digitos,
+            'posicoes': posicoes
+        }
+    
+    @staticmethod
+    def _totais_por_numero(frequencias: Counter) -> Tuple[int, int, Dict, Counter]:
+        """
+        Deriva pares/ímpares, faixas e dígitos das 80 frequências
+        
+        Args:
+            frequencias: Frequência de cada número sorteado
+            
+        Returns:
+            Tupla (pares, ímpares, faixas, dígitos)
+        """
+        pares = 0
+        impares = 0
+        faixas = {
+            '01-20': 0,
+            '21-40': 0,
+            '41-60': 0,
+            '61-80': 0
+        }
+        digitos = Counter()
+        
+        for numero, freq in frequencias.items():
+            if numero % 2 == 0:
+                pares += freq
+            else:
+                impares += freq
+            
+            if 1 <= numero <= 20:
+                faixas['01-20'] += freq
+            elif 21 <= numero <= 40:
+                faixas['21-40'] += freq
+            elif 41 <= numero <= 60:
+                faixas['41-60'] += freq
+            elif 61 <= numero <= 80:
+                faixas['61-80'] += freq
+            
+            digitos[numero % 10] += freq
+        
+        return pares, impares, faixas, digitos
+    
+    def _agregar_numpy(self, dados: HistoricoCompacto) -> Dict:
+        """
+        Versão vetorizada de _agregar sobre a matriz N×5 do histórico
+        
+        Produz exatamente os mesmos agregados da versão em Python puro,
+        inclusive a ordem de inserção dos contadores por posição, que define
+        o desempate de most_common (número visto mais recentemente na posição
+        vem primeiro).
+        
+        Args:
+            dados: Histórico compacto obtido do DrawStore
+            
+        Returns:
+            Dicionário com os contadores brutos usados pelos formatadores
+        """
+        total_concursos = len(dados)
+        
+        # Matrizes do mais recente ao mais antigo, sem copiar os blocos
+        ordenadas = np.frombuffer(dados.ordenadas, dtype=np.uint8).reshape(-1, DEZENAS_POR_CONCURSO)[::-1]
+        ordem = np.frombuffer(dados.ordem, dtype=np.uint8).reshape(-1, DEZENAS_POR_CONCURSO)[::-1]
+        
+        contagem = np.bincount(ordenadas.ravel(), minlength=81)
+        contagem[0] = 0
+        
+        # Primeira ocorrência no histórico invertido = concurso mais recente
+        numeros_vistos, primeira = np.unique(ordenadas.ravel(), return_index=True)
+        ultima_aparicao = {num: -1 for num in range(1, 81)}
+        for numero, posicao in zip(numeros_vistos.tolist(), (primeira // DEZENAS_POR_CONCURSO).tolist()):
+            if numero:
+                ultima_aparicao[numero] = posicao
+        
+        frequencias = Counter({
+            numero: freq
+            for numero, freq in enumerate(contagem.tolist())
+            if freq
+        })
+        
+        # Posições: apenas concursos com ordem do sorteio disponível
+        com_ordem = ordem[ordem[:, 0] != 0]
+        posicoes = {}
+        for posicao in range(1, DEZENAS_POR_CONCURSO + 1):
+            coluna = com_ordem[:, posicao - 1]
+            contagem_posicao = np.bincount(coluna, minlength=81)
+            numeros_posicao, primeira_posicao = np.unique(coluna, return_index=True)
+            
+            # Insere na ordem em que a versão em Python puro encontraria cada número
+            ordem_insercao = np.argsort(primeira_posicao, kind='stable')
+            posicoes[posicao] = Counter({
+                numero: int(contagem_posicao[numero])
+                for numero in numeros_posicao[ordem_insercao].tolist()
+            })
+        
+        faixas = {
+            '01-20': int(contagem[1:21].sum()),
+            '21-40': int(contagem[21:41].sum()),
+            '41-60': int(contagem[41:61].sum()),
+            '61-80': int(contagem[61:81].sum())
+        }
+        por_digito = np.bincount(np.arange(81) % 10, weights=contagem, minlength=10)
+        digitos = Counter({
+            digito: int(freq)
+            for digito, freq in enumerate(por_digito.tolist())
+            if freq
+        })
+        
+        return {
+            'total_concursos': total_concursos,
+            'frequencias': frequencias,
+            'ultima_aparicao': ultima_aparicao,
+            'pares': int(contagem[0::2].sum()),
+            'impares': int(contagem[1::2].sum()),
+            'faixas': faixas,
+            'digitos': digitos,
+            'posicoes': posicoes
+        }
+    
+    def _formatar_frequencia(self, agregados: Dict) -> List[Dict]:
+        """
+        Formata a frequência de cada número a partir dos agregados
+        
+        Args:
+            agregados: Contadores retornados por _agregar
+            
+        Returns:
+            Lista de dicionários com número e frequência, ordenados por frequência
+        """
+        total_concursos = agregados['total_concursos']
+        
+        if not total_concursos:
+            return []
         
-        # Formata resultado
         frequencia_list = [
             {
                 'numero': numero,
                 'frequencia': freq,
-                'percentual': round((freq / len(resultados)) * 100, 2)
+                'percentual': round((freq / total_concursos) * 100, 2)
             }
-            for numero, freq in frequencias.items()
+            for numero, freq in agregados['frequencias'].items()
         ]
         
         # Ordena por frequência (decrescente) e depois por número
@@ -69,31 +663,23 @@ class EstatisticaService:
         
         return frequencia_list
     
-    def calcular_atrasos(self) -> List[Dict]:
+    def _formatar_atrasos(self, agregados: Dict) -> List[Dict]:
         """
-        Calcula o atraso de cada número (concursos desde última aparição)
+        Formata o atraso de cada número a partir dos agregados
         
+        Args:
+            agregados: Contadores retornados por _agregar
+            
         Returns:
             Lista de dicionários com número e atraso, ordenados por atraso
         """
-        resultados = self.resultado_model.buscar_todos()
+        total_concursos = agregados['total_concursos']
         
-        if not resultados:
+        if not total_concursos:
             return []
         
-        # Inicializa atrasos para todos os números (1-80)
-        ultima_aparicao = {num: -1 for num in range(1, 81)}
-        
-        # Percorre resultados do mais recente ao mais antigo
-        for idx, resultado in enumerate(resultados):
-            if resultado.get('listaDezenas'):
-                for numero in resultado['listaDezenas']:
-                    num_int = int(numero)
-                    if ultima_aparicao[num_int] == -1:
-                        ultima_aparicao[num_int] = idx
-        
-        # Calcula atraso (números que nunca apareceram terão atraso = total de concursos)
-        total_concursos = len(resultados)
+        # Números que nunca apareceram terão atraso = total de concursos
+        ultima_aparicao = agregados['ultima_aparicao']
         atrasos = [
             {
                 'numero': numero,
@@ -107,29 +693,21 @@ class EstatisticaService:
         
         return atrasos
     
-    def calcular_pares_impares(self) -> Dict:
+    def _formatar_pares_impares(self, agregados: Dict) -> Dict:
         """
-        Calcula a distribuição de números pares e ímpares
+        Formata a distribuição de pares e ímpares a partir dos agregados
         
+        Args:
+            agregados: Contadores retornados por _agregar
+            
         Returns:
             Dicionário com estatísticas de pares e ímpares
         """
-        resultados = self.resultado_model.buscar_todos()
-        
-        if not resultados:
+        if not agregados['total_concursos']:
             return {'pares': 0, 'impares': 0, 'total': 0}
         
-        total_pares = 0
-        total_impares = 0
-        
-        for resultado in resultados:
-            if resultado.get('listaDezenas'):
-                for numero in resultado['listaDezenas']:
-                    if int(numero) % 2 == 0:
-                        total_pares += 1
-                    else:
-                        total_impares += 1
-        
+        total_pares = agregados['pares']
+        total_impares = agregados['impares']
         total = total_pares + total_impares
         
         return {
@@ -140,39 +718,20 @@ class EstatisticaService:
             'percentual_impares': round((total_impares / total) * 100, 2) if total > 0 else 0
         }
     
-    def calcular_por_faixa(self) -> List[Dict]:
+    def _formatar_por_faixa(self, agregados: Dict) -> List[Dict]:
         """
-        Calcula a frequência de números por faixa de dezenas
-        Faixas: 01-20, 21-40, 41-60, 61-80
+        Formata a frequência por faixa de dezenas a partir dos agregados
         
+        Args:
+            agregados: Contadores retornados por _agregar
+            
         Returns:
             Lista de dicionários com informações de cada faixa
         """
-        resultados = self.resultado_model.buscar_todos()
-        
-        if not resultados:
+        if not agregados['total_concursos']:
             return []
         
-        faixas = {
-            '01-20': 0,
-            '21-40': 0,
-            '41-60': 0,
-            '61-80': 0
-        }
-        
-        for resultado in resultados:
-            if resultado.get('listaDezenas'):
-                for numero in resultado['listaDezenas']:
-                    num_int = int(numero)
-                    if 1 <= num_int <= 20:
-                        faixas['01-20'] += 1
-                    elif 21 <= num_int <= 40:
-                        faixas['21-40'] += 1
-                    elif 41 <= num_int <= 60:
-                        faixas['41-60'] += 1
-                    elif 61 <= num_int <= 80:
-                        faixas['61-80'] += 1
-        
+        faixas = agregados['faixas']
         total = sum(faixas.values())
         
         return [
@@ -184,26 +743,20 @@ class EstatisticaService:
             for faixa, qtd in faixas.items()
         ]
     
-    def calcular_por_digito(self) -> List[Dict]:
+    def _formatar_por_digito(self, agregados: Dict) -> List[Dict]:
         """
-        Calcula a frequência por dígito final (0-9)
+        Formata a frequência por dígito final a partir dos agregados
         
+        Args:
+            agregados: Contadores retornados por _agregar
+            
         Returns:
             Lista de dicionários com frequência de cada dígito
         """
-        resultados = self.resultado_model.buscar_todos()
-        
-        if not resultados:
+        if not agregados['total_concursos']:
             return []
         
-        digitos = Counter()
-        
-        for resultado in resultados:
-            if resultado.get('listaDezenas'):
-                for numero in resultado['listaDezenas']:
-                    digito = int(numero) % 10
-                    digitos[digito] += 1
-        
+        digitos = agregados['digitos']
         total = sum(digitos.values())
         
         return [
@@ -215,37 +768,21 @@ class EstatisticaService:
             for digito in range(10)
         ]
     
-    def calcular_por_posicao_sorteio(self) -> Dict:
+    def _formatar_por_posicao_sorteio(self, agregados: Dict) -> Dict:
         """
-        Calcula quais números aparecem mais em cada posição do sorteio (1ª a 5ª)
+        Formata as estatísticas por posição do sorteio a partir dos agregados
         
+        Args:
+            agregados: Contadores retornados por _agregar
+            
         Returns:
             Dicionário com estatísticas por posição
         """
-        resultados = self.resultado_model.buscar_todos()
-        
-        if not resultados:
+        if not agregados['total_concursos']:
             return {}
         
-        # Inicializa contadores para cada posição
-        posicoes = {
-            1: Counter(),
-            2: Counter(),
-            3: Counter(),
-            4: Counter(),
-            5: Counter()
-        }
-        
-        # Conta frequência por posição
-        for resultado in resultados:
-            ordem_sorteio = resultado.get('dezenasSorteadasOrdemSorteio')
-            if ordem_sorteio and len(ordem_sorteio) == 5:
-                for idx, numero in enumerate(ordem_sorteio, start=1):
-                    posicoes[idx][int(numero)] += 1
-        
-        # Formata resultado
         resultado_formatado = {}
-        for posicao, counter in posicoes.items():
+        for posicao, counter in agregados['posicoes'].items():
             # Top 10 números mais frequentes nesta posição
             top_numeros = [
                 {
@@ -262,13 +799,3 @@ class EstatisticaService:
             }
         
         return resultado_formatado
-    
-    def _contar_concursos(self) -> int:
-        """
-        Conta o total de concursos cadastrados
-        
-        Returns:
-            Total de concursos
-        """
-        resultados = self.resultado_model.buscar_todos()
-        return len(resultados)
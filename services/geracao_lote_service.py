@@ -0,0 +1,326 @@
+"""
+Serviço de geração de palpites em lote (10⁵–10⁶ jogos por chamada)
+"""
+import random
+from typing import Dict, Iterator, List, Optional
+import config
+from services.quina_service import QuinaService
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele o lote usa as estratégias jogo a jogo
+    np = None
+
+
+# Jogos gerados por bloco (limita a memória usada durante a transmissão)
+JOGOS_POR_BLOCO = 20000
+
+# Formatos de saída aceitos
+FORMATOS = ('ndjson', 'csv')
+
+# Faixas de dezenas usadas pela estratégia por_faixa
+FAIXAS = ((1, 20), (21, 40), (41, 60), (61, 80))
+
+
+class GeracaoLoteService:
+    """
+    Gera grandes quantidades de jogos para todas as estratégias do
+    QuinaService
+    
+    Com NumPy, cada estratégia é descrita como uma sequência de etapas;
+    cada etapa sorteia, sem reposição e de uma vez para todo o bloco, um
+    número de dezenas entre os candidatos da etapa ainda não escolhidos no
+    jogo. O sorteio é um Gumbel top-k sobre a matriz de pesos N×C das
+    dezenas candidatas, o que equivale a sortear sequencialmente
+    proporcional aos pesos. Sem NumPy, as mesmas
+    estratégias do QuinaService são chamadas jogo a jogo.
+    
+    A mesma semente reproduz o mesmo lote no mesmo backend (NumPy ou
+    Python puro).
+    """
+    
+    def __init__(self, quina_service: QuinaService = None):
+        """
+        Inicializa o serviço
+        
+        Args:
+            quina_service: Serviço que fornece estratégias e candidatos
+        """
+        self.quina_service = quina_service or QuinaService()
+    
+    def validar(self, estrategia: str, quantidade_numeros: int, quantidade_jogos: int) -> Optional[str]:
+        """
+        Valida os parâmetros de um lote
+        
+        Returns:
+            Mensagem de erro ou None se os parâmetros forem válidos
+        """
+        erro = self.quina_service.validar_jogo(estrategia, quantidade_numeros)
+        if erro:
+            return erro
+        if quantidade_jogos < 1 or quantidade_jogos > config.LOTE_MAX_JOGOS:
+            return f'Quantidade de jogos deve ser entre 1 e {config.LOTE_MAX_JOGOS}'
+        return None
+    
+    def gerar(
+        self,
+        estrategia: str,
+        quantidade_numeros: int,
+        quantidade_jogos: int,
+        semente: int
+    ) -> Iterator[List[List[int]]]:
+        """
+        Gera os jogos em blocos de até JOGOS_POR_BLOCO
+        
+        Args:
+            estrategia: Nome da estratégia (ver QuinaService.estrategias)
+            quantidade_numeros: Quantidade de números por jogo
+            quantidade_jogos: Quantidade total de jogos
+            semente: Semente do gerador aleatório
+            
+        Returns:
+            Iterador de blocos; cada jogo vem em ordem crescente
+        """
+        for bloco in self._blocos(estrategia, quantidade_numeros, quantidade_jogos, semente):
+            yield bloco if np is None else bloco.tolist()
+    
+    def transmitir(
+        self,
+        estrategia: str,
+        quantidade_numeros: int,
+        quantidade_jogos: int,
+        semente: int,
+        formato: str = 'ndjson'
+    ) -> Iterator[bytes]:
+        """
+        Gera o lote já serializado, bloco a bloco
+        
+        Args:
+            estrategia: Nome da estratégia
+            quantidade_numeros: Quantidade de números por jogo
+            quantidade_jogos: Quantidade total de jogos
+            semente: Semente do gerador aleatório
+            formato: 'ndjson' (um array JSON por linha) ou 'csv'
+            
+        Returns:
+            Iterador de trechos de texto (UTF-8)
+        """
+        if formato == 'csv':
+            abertura, separador, fechamento = '', ',', '\n'
+            yield (','.join(f'n{i}' for i in range(1, quantidade_numeros + 1)) + '\n').encode()
+        else:
+            abertura, separador, fechamento = '[', ',', ']\n'
+        
+        blocos = self._blocos(estrategia, quantidade_numeros, quantidade_jogos, semente)
+        
+        if np is None:
+            for bloco in blocos:
+                yield ''.join(
+                    abertura + separador.join(map(str, jogo)) + fechamento
+                    for jogo in bloco
+                ).encode()
+            return
+        
+        # Texto de cada dezena já com o separador, em colunas de largura fixa;
+        # o preenchimento (bytes nulos) é removido depois de juntar o bloco
+        meio = np.array([f'{n}{separador}' for n in range(81)], dtype='S4')
+        primeira = np.array([f'{abertura}{n}{separador}' for n in range(81)], dtype='S4')
+        ultima = np.array([f'{n}{fechamento}' for n in range(81)], dtype='S4')
+        
+        for bloco in blocos:
+            celulas = meio[bloco]
+            celulas[:, 0] = primeira[bloco[:, 0]]
+            celulas[:, -1] = ultima[bloco[:, -1]]
+            yield celulas.tobytes().replace(b'\x00', b'')
+    
+    def _blocos(
+        self,
+        estrategia: str,
+        quantidade_numeros: int,
+        quantidade_jogos: int,
+        semente: int
+    ) -> Iterator:
+        """
+        Gera os blocos de jogos: matrizes NumPy ou, sem NumPy, listas
+        """
+        candidatos = self.quina_service.obter_candidatos()
+        
+        if np is None:
+            yield from self._gerar_python(estrategia, quantidade_numeros, quantidade_jogos, semente, candidatos)
+            return
+        
+        rng = np.random.default_rng(semente)
+        etapas = self._etapas(estrategia, quantidade_numeros, candidatos)
+        
+        for inicio in range(0, quantidade_jogos, JOGOS_POR_BLOCO):
+            tamanho = min(JOGOS_POR_BLOCO, quantidade_jogos - inicio)
+            yield self._gerar_bloco(etapas, quantidade_numeros, tamanho, rng)
+    
+    def _gerar_python(
+        self,
+        estrategia: str,
+        quantidade_numeros: int,
+        quantidade_jogos: int,
+        semente: int,
+        candidatos: Dict
+    ) -> Iterator[List[List[int]]]:
+        """
+        Gera os blocos chamando a estratégia do QuinaService jogo a jogo
+        """
+        metodo = self.quina_service.estrategias()[estrategia]
+        rng = random.Random(semente)
+        
+        for inicio in range(0, quantidade_jogos, JOGOS_POR_BLOCO):
+            tamanho = min(JOGOS_POR_BLOCO, quantidade_jogos - inicio)
+            yield [sorted(metodo(quantidade_numeros, candidatos, rng)) for _ in range(tamanho)]
+    
+    def _etapas(self, estrategia: str, quantidade: int, candidatos: Dict) -> List[tuple]:
+        """
+        Descreve a estratégia como etapas de sorteio, espelhando os métodos
+        _estrategia_* do QuinaService
+        
+        Cada etapa é ('conjunto', pesos 81, quantidade), um sorteio entre as
+        dezenas de peso positivo, ou ('ranking', ordem, limite, quantidade),
+        um sorteio entre as primeiras `limite` dezenas da ordem que ainda não
+        estão no jogo. Uma etapa final completa o jogo com qualquer dezena.
+        
+        Returns:
+            Lista de etapas
+        """
+        frequentes = candidatos['frequentes']
+        atrasados = candidatos['atrasados']
+        etapas = []
+        
+        if estrategia == 'equilibrada' and frequentes and atrasados:
+            metade = quantidade // 2
+            etapas.append(('conjunto', self._pesos(frequentes[:20]), metade))
+            etapas.append(('conjunto', self._pesos(atrasados[:20]), quantidade - metade))
+        elif estrategia == 'agressiva' and frequentes:
+            etapas.append(('conjunto', self._pesos(frequentes[:30]), quantidade))
+        elif estrategia == 'conservadora' and candidatos['proximos_do_maximo']:
+            etapas.append(('conjunto', self._pesos(candidatos['proximos_do_maximo'][:30]), quantidade))
+        elif estrategia == 'mista' and frequentes and atrasados:
+            grupo = quantidade // 3
+            etapas.append(('conjunto', self._pesos(frequentes[:15]), grupo))
+            etapas.append(('conjunto', self._pesos(atrasados[:15]), grupo))
+            etapas.append(('conjunto', self._pesos(frequentes[15:45]), quantidade - 2 * grupo))
+        elif estrategia == 'atrasados' and atrasados:
+            # Determinística: os mais atrasados, sem sorteio
+            etapas.append(('ranking', np.array(atrasados), quantidade, quantidade))
+        elif estrategia == 'por_faixa':
+            for idx, (menor, maior) in enumerate(FAIXAS):
+                qtd = quantidade // 4 + (1 if idx < quantidade % 4 else 0)
+                etapas.append(('conjunto', self._pesos(range(menor, maior + 1)), qtd))
+        elif estrategia == 'por_posicao' and candidatos['posicoes']:
+            tamanho_top = 5 if quantidade == 5 else 10
+            for i, ranking in enumerate(candidatos['posicoes'], start=1):
+                qtd = quantidade // 5 + (1 if i <= quantidade % 5 else 0)
+                etapas.append(('ranking', np.array(ranking), max(tamanho_top, qtd), qtd))
+        
+        # Completa com qualquer dezena (também o caso sem dados suficientes)
+        etapas.append(('conjunto', self._pesos(range(1, 81)), quantidade))
+        return etapas
+    
+    @staticmethod
+    def _pesos(numeros) -> 'np.ndarray':
+        """
+        Vetor de 81 pesos com 1 para as dezenas informadas
+        """
+        pesos = np.zeros(81, dtype=np.float32)
+        pesos[list(numeros)] = 1.0
+        return pesos
+    
+    def _gerar_bloco(self, etapas: List[tuple], quantidade: int, tamanho: int, rng) -> 'np.ndarray':
+        """
+        Executa as etapas para um bloco de jogos
+        
+        Cada etapa trabalha só com as colunas das suas dezenas candidatas,
+        de modo que o custo do sorteio é proporcional ao tamanho do conjunto
+        e não às 80 dezenas.
+        
+        Args:
+            etapas: Etapas retornadas por _etapas
+            quantidade: Quantidade de números por jogo
+            tamanho: Quantidade de jogos do bloco
+            rng: numpy.random.Generator
+            
+        Returns:
+            Matriz tamanho×quantidade com os jogos em ordem crescente
+        """
+        escolhidos = np.zeros((tamanho, 81), dtype=bool)
+        jogos = np.zeros((tamanho, quantidade), dtype=np.int64)
+        preenchidos = np.zeros(tamanho, dtype=np.int64)
+        
+        for etapa in etapas:
+            faltam = quantidade - preenchidos
+            if not faltam.any():
+                break
+            
+            if etapa[0] == 'conjunto':
+                _, pesos, qtd = etapa
+                colunas = np.flatnonzero(pesos)
+                disponiveis = np.where(escolhidos[:, colunas], np.float32(0), pesos[colunas])
+            else:
+                _, ordem, limite, qtd = etapa
+                # As `limite` primeiras dezenas livres estão entre as
+                # limite + preenchidos primeiras posições da ordem
+                colunas = ordem[:limite + int(preenchidos.max())]
+                livres = ~escolhidos[:, colunas]
+                disponiveis = (livres & (np.cumsum(livres, axis=1) <= limite)).astype(np.float32)
+            
+            # Como na estratégia jogo a jogo, cada jogo sorteia o que a etapa
+            # pede limitado às suas dezenas disponíveis; o que faltar fica
+            # para a etapa final
+            qtds = np.minimum(np.minimum(faltam, qtd), np.count_nonzero(disponiveis, axis=1))
+            k = int(qtds.max())
+            if k <= 0:
+                continue
+            
+            if (qtds == k).all():
+                sorteadas = colunas[self._top_k_gumbel(disponiveis, k, rng)]
+                if (preenchidos == preenchidos[0]).all():
+                    jogos[:, preenchidos[0]:preenchidos[0] + k] = sorteadas
+                else:
+                    np.put_along_axis(jogos, preenchidos[:, None] + np.arange(k), sorteadas, axis=1)
+                np.put_along_axis(escolhidos, sorteadas, True, axis=1)
+            else:
+                # Cada linha usa as qtds primeiras na ordem do sorteio (todas
+                # com peso positivo)
+                linhas, indices = np.nonzero(np.arange(k) < qtds[:, None])
+                sorteadas = colunas[self._top_k_gumbel(disponiveis, k, rng, ordenado=True)][linhas, indices]
+                jogos[linhas, preenchidos[linhas] + indices] = sorteadas
+                escolhidos[linhas, sorteadas] = True
+            preenchidos += qtds
+        
+        jogos.sort(axis=1)
+        return jogos
+    
+    @staticmethod
+    def _top_k_gumbel(pesos: 'np.ndarray', k: int, rng, ordenado: bool = False) -> 'np.ndarray':
+        """
+        Sorteia k colunas distintas por linha, proporcional aos pesos
+        
+        Gumbel top-k na forma de corrida de exponenciais: as k menores chaves
+        E/peso (E ~ Exp(1)) são as k maiores log(peso) + Gumbel, já que
+        -log(E) tem distribuição de Gumbel. O resultado é uma amostra sem
+        reposição com a mesma distribuição do sorteio sequencial proporcional
+        aos pesos; pesos zero (chave infinita) nunca são escolhidos. Gerar
+        exponenciais em float32 é bem mais barato que gerar Gumbel.
+        
+        Args:
+            pesos: Matriz N×C de pesos não negativos
+            k: Quantidade de colunas por linha
+            rng: numpy.random.Generator
+            ordenado: Se True, as colunas de cada linha vêm na ordem do
+                sorteio sequencial (as de peso zero, se houver, por último)
+                
+        Returns:
+            Matriz N×k de índices de coluna (0 a C-1)
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            chaves = rng.standard_exponential(pesos.shape, dtype=np.float32) / pesos
+        indices = np.argpartition(chaves, k - 1, axis=1)[:, :k]
+        if ordenado:
+            ordem = np.argsort(np.take_along_axis(chaves, indices, axis=1), axis=1)
+            indices = np.take_along_axis(indices, ordem, axis=1)
+        return indices
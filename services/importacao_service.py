@@ -0,0 +1,265 @@
+"""
+Serviço para popular a base a partir de um arquivo local com o histórico da QUINA
+"""
+import gzip
+import json
+from typing import Dict, Iterator, List, TextIO
+import config
+from models.draw_store import DrawStore
+from models.resultado_model import ResultadoModel
+from services.api_caixa_service import ApiCaixaService
+
+
+# Tamanho dos blocos lidos do arquivo durante a decodificação incremental
+TAMANHO_BLOCO_LEITURA = 1 << 16
+
+
+class ImportacaoService:
+    """
+    Serviço para importar resultados no formato da API da Caixa sem acesso à rede
+    """
+    
+    def __init__(self):
+        """
+        Inicializa o serviço
+        """
+        self.resultado_model = ResultadoModel()
+        self.draw_store = DrawStore.instancia(self.resultado_model.db_path)
+    
+    def importar_arquivo(self, caminho: str, tamanho_lote: int = None) -> Dict:
+        """
+        Importa um arquivo com resultados no formato da API da Caixa
+        
+        Formatos aceitos: array JSON, NDJSON (um resultado por linha) ou
+        qualquer um dos dois compactado com gzip. O arquivo é lido de forma
+        incremental e gravado em lotes. Registros com campos essenciais
+        ausentes ou de tipo inválido (número não inteiro, dezenas que não
+        são 5 números) contam como erro e não entram nos lotes.
+        
+        Args:
+            caminho: Caminho do arquivo
+            tamanho_lote: Quantidade de resultados por transação
+            
+        Returns:
+            Dicionário com estatísticas da importação:
+            - total_processados: Total de registros lidos
+            - total_inseridos: Total de concursos inseridos/atualizados
+            - total_erros: Total de registros inválidos ou não gravados
+            - ultimo_concurso: Maior número de concurso importado
+        """
+        tamanho_lote = tamanho_lote or config.DATABASE_TAMANHO_LOTE
+        
+        total_processados = 0
+        total_inseridos = 0
+        total_erros = 0
+        ultimo_concurso = None
+        buffer = []
+        
+        try:
+            with self._abrir(caminho) as arquivo:
+                for resultado in self._iterar_resultados(arquivo):
+                    total_processados += 1
+                    
+                    if not ApiCaixaService.validar_resultado(resultado):
+                        total_erros += 1
+                        continue
+                    
+                    buffer.append(resultado)
+                    if ultimo_concurso is None or resultado['numero'] > ultimo_concurso:
+                        ultimo_concurso = resultado['numero']
+                    
+                    if len(buffer) >= tamanho_lote:
+                        inseridos = self._gravar_lote(buffer)
+                        total_inseridos += inseridos
+                        total_erros += len(buffer) - inseridos
+                        buffer = []
+        except (OSError, ValueError) as e:
+            print(f"Erro ao ler arquivo {caminho}: {e}")
+            total_erros += 1
+            mensagem = f'Importação interrompida: {e}'
+        else:
+            mensagem = 'Importação concluída com sucesso'
+        
+        if buffer:
+            inseridos = self._gravar_lote(buffer)
+            total_inseridos += inseridos
+            total_erros += len(buffer) - inseridos
+        
+        if total_inseridos:
+            self.draw_store.salvar_snapshot()
+        
+        return {
+            'total_processados': total_processados,
+            'total_inseridos': total_inseridos,
+            'total_erros': total_erros,
+            'ultimo_concurso': ultimo_concurso,
+            'mensagem': mensagem
+        }
+    
+    def _gravar_lote(self, resultados: List[Dict]) -> int:
+        """
+        Grava um lote de resultados no banco de dados
+        
+        Args:
+            resultados: Lista de resultados validados
+            
+        Returns:
+            Quantidade de resultados gravados
+        """
+        gravados = []
+        inseridos = self.resultado_model.inserir_lote(resultados, gravados=gravados)
+        if gravados:
+            self.draw_store.adicionar(gravados)
+        return inseridos
+    
+    @staticmethod
+    def _abrir(caminho: str) -> TextIO:
+        """
+        Abre o arquivo em modo texto, descompactando se for gzip
+        
+        Args:
+            caminho: Caminho do arquivo
+            
+        Returns:
+            Arquivo texto aberto
+        """
+        with open(caminho, 'rb') as arquivo:
+            compactado = arquivo.read(2) == b'\x1f\x8b'
+        
+        if compactado:
+            return gzip.open(caminho, 'rt', encoding='utf-8')
+        return open(caminho, 'r', encoding='utf-8')
+    
+    def _iterar_resultados(self, arquivo: TextIO) -> Iterator:
+        """
+        Detecta o formato pelo primeiro caractere e itera os registros
+        
+        Args:
+            arquivo: Arquivo texto aberto
+            
+        Yields:
+            Objetos decodificados (ainda não validados)
+        """
+        inicio = arquivo.read(TAMANHO_BLOCO_LEITURA)
+        conteudo = inicio.lstrip()
+        
+        if conteudo.startswith('['):
+            yield from self._iterar_array_json(arquivo, conteudo)
+        else:
+            yield from self._iterar_ndjson(arquivo, inicio)
+    
+    @staticmethod
+    def _iterar_array_json(arquivo: TextIO, buffer: str) -> Iterator:
+        """
+        Decodifica um array JSON elemento a elemento, sem carregar o arquivo inteiro
+        
+        Args:
+            arquivo: Arquivo texto aberto, posicionado após o conteúdo de buffer
+            buffer: Conteúdo já lido, começando em '['
+            
+        Yields:
+            Elementos do array
+        """
+        decoder = json.JSONDecoder()
+        pos = 1
+        fim_arquivo = False
+        esperando_valor = True
+        primeiro = True
+        
+        while True:
+            # Pula espaços, lendo mais conteúdo quando o buffer acaba
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer) or fim_arquivo:
+                    break
+                buffer = arquivo.read(TAMANHO_BLOCO_LEITURA)
+                pos = 0
+                fim_arquivo = not buffer
+            
+            if pos >= len(buffer):
+                raise ValueError('Array JSON não terminado')
+            
+            caractere = buffer[pos]
+            
+            if caractere == ']' and (primeiro or not esperando_valor):
+                return
+            
+            if not esperando_valor:
+                if caractere != ',':
+                    raise ValueError(f"Esperado ',' ou ']' e encontrado {caractere!r}")
+                pos += 1
+                esperando_valor = True
+                continue
+            
+            try:
+                valor, fim = decoder.raw_decode(buffer, pos)
+                completo = fim < len(buffer) or fim_arquivo
+            except json.JSONDecodeError:
+                if fim_arquivo:
+                    raise
+                completo = False
+            
+            if not completo:
+                # Elemento cortado no fim do bloco: lê mais e tenta de novo
+                bloco = arquivo.read(TAMANHO_BLOCO_LEITURA)
+                fim_arquivo = not bloco
+                buffer = buffer[pos:] + bloco
+                pos = 0
+                continue
+            
+            yield valor
+            pos = fim
+            esperando_valor = False
+            primeiro = False
+    
+    @staticmethod
+    def _iterar_ndjson(arquivo: TextIO, inicio: str) -> Iterator:
+        """
+        Decodifica um arquivo NDJSON linha a linha
+        
+        Linhas que não são JSON válido são reportadas como None, para serem
+        contabilizadas como erro sem interromper a importação.
+        
+        Args:
+            arquivo: Arquivo texto aberto, posicionado após o conteúdo de inicio
+            inicio: Conteúdo já lido do arquivo
+            
+        Yields:
+            Objetos decodificados de cada linha não vazia
+        """
+        pendente = ''
+        numero_linha = 0
+        
+        for bloco in _concatenar(inicio, arquivo):
+            linhas = (pendente + bloco).split('\n')
+            pendente = linhas.pop()
+            
+            for linha in linhas:
+                numero_linha += 1
+                if not linha.strip():
+                    continue
+                try:
+                    yield json.loads(linha)
+                except json.JSONDecodeError as e:
+                    print(f"Linha {numero_linha} inválida: {e}")
+                    yield None
+        
+        if pendente.strip():
+            try:
+                yield json.loads(pendente)
+            except json.JSONDecodeError as e:
+                print(f"Linha {numero_linha + 1} inválida: {e}")
+                yield None
+
+
+def _concatenar(inicio: str, arquivo: TextIO) -> Iterator[str]:
+    """
+    Itera o conteúdo já lido seguido dos blocos restantes do arquivo
+    """
+    yield inicio
+    while True:
+        bloco = arquivo.read(TAMANHO_BLOCO_LEITURA)
+        if not bloco:
+            return
+        yield bloco
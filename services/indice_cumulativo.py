@@ -0,0 +1,150 @@
+"""
+Índice de contagens acumuladas para estatísticas por janela de concursos
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+from models.draw_store import DEZENAS_POR_CONCURSO, HistoricoCompacto
+
+
+# Largura de uma linha do índice: uma coluna por dezena (índice 0 sem uso)
+COLUNAS = 81
+
+
+class IndiceCumulativo:
+    """
+    Somas de prefixo das ocorrências de cada dezena, no total e por posição
+    do sorteio
+    
+    A linha i guarda as contagens dos i concursos mais antigos, de modo que
+    qualquer janela contígua [inicio, fim) é respondida com uma subtração
+    de linhas, em O(80) independentemente do tamanho do histórico.
+    
+    Attributes:
+        dados: Histórico a partir do qual o índice foi montado
+        totais: (N+1)×81 contagens acumuladas por dezena
+        posicoes: (N+1)×5×81 contagens acumuladas por posição e dezena
+    """
+    
+    def __init__(self, dados: HistoricoCompacto):
+        """
+        Monta o índice para o histórico informado
+        
+        Args:
+            dados: Histórico compacto obtido do DrawStore
+        """
+        self.dados = HistoricoCompacto()
+        self.totais = array('I', bytes(4 * COLUNAS))
+        self.posicoes = array('I', bytes(4 * COLUNAS * DEZENAS_POR_CONCURSO))
+        self._acumular(dados, 0)
+        self.dados = dados
+    
+    def __len__(self) -> int:
+        return len(self.dados)
+    
+    def atualizar(self, dados: HistoricoCompacto) -> 'IndiceCumulativo':
+        """
+        Retorna um índice para o histórico informado, estendendo este quando
+        o histórico novo apenas acrescenta concursos ao final
+        
+        Args:
+            dados: Histórico atual do DrawStore
+            
+        Returns:
+            Este índice (estendido) ou um índice novo
+        """
+        if dados is self.dados:
+            return self
+        
+        if dados.contem_prefixo(self.dados):
+            self._acumular(dados, len(self.dados))
+            self.dados = dados
+            return self
+        
+        return IndiceCumulativo(dados)
+    
+    def localizar(
+        self,
+        de: Optional[int] = None,
+        ate: Optional[int] = None,
+        ultimos: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """
+        Converte a janela pedida em índices [inicio, fim) do histórico
+        
+        Args:
+            de: Primeiro concurso da janela (inclusive)
+            ate: Último concurso da janela (inclusive)
+            ultimos: Quantidade de concursos mais recentes
+            
+        Returns:
+            Tupla (inicio, fim)
+        """
+        total = len(self.dados)
+        if ultimos is not None:
+            return max(total - ultimos, 0), total
+        
+        numeros = self.dados.numeros
+        inicio = bisect_left(numeros, de) if de is not None else 0
+        fim = bisect_right(numeros, ate) if ate is not None else total
+        return inicio, max(fim, inicio)
+    
+    def frequencias(self, inicio: int, fim: int) -> List[int]:
+        """
+        Ocorrências de cada dezena na janela (posição 0 sem uso)
+        """
+        return self._diferenca(self.totais, COLUNAS, inicio, fim)
+    
+    def frequencias_posicao(self, inicio: int, fim: int) -> List[List[int]]:
+        """
+        Ocorrências de cada dezena em cada posição do sorteio na janela
+        """
+        largura = COLUNAS * DEZENAS_POR_CONCURSO
+        linha = self._diferenca(self.posicoes, largura, inicio, fim)
+        return [
+            linha[posicao * COLUNAS:(posicao + 1) * COLUNAS]
+            for posicao in range(DEZENAS_POR_CONCURSO)
+        ]
+    
+    @staticmethod
+    def _diferenca(tabela: array, largura: int, inicio: int, fim: int) -> List[int]:
+        """
+        Subtrai a linha inicio da linha fim
+        """
+        final = tabela[fim * largura:(fim + 1) * largura]
+        inicial = tabela[inicio * largura:(inicio + 1) * largura]
+        return [a - b for a, b in zip(final, inicial)]
+    
+    def _acumular(self, dados: HistoricoCompacto, inicio: int):
+        """
+        Acrescenta ao índice as linhas dos concursos de inicio em diante
+        
+        Args:
+            dados: Histórico com os concursos a indexar
+            inicio: Índice do primeiro concurso ainda não indexado
+        """
+        if inicio >= len(dados):
+            return
+        
+        largura = COLUNAS * DEZENAS_POR_CONCURSO
+        ordenadas = dados.ordenadas
+        ordem = dados.ordem
+        totais = self.totais
+        posicoes = self.posicoes
+        
+        linha = totais[-COLUNAS:]
+        linha_posicoes = posicoes[-largura:]
+        
+        for idx in range(inicio, len(dados)):
+            base = idx * DEZENAS_POR_CONCURSO
+            
+            for numero in ordenadas[base:base + DEZENAS_POR_CONCURSO]:
+                if numero:
+                    linha[numero] += 1
+            
+            if ordem[base]:
+                for posicao, numero in enumerate(ordem[base:base + DEZENAS_POR_CONCURSO]):
+                    linha_posicoes[posicao * COLUNAS + numero] += 1
+            
+            totais.extend(linha)
+            posicoes.extend(linha_posicoes)
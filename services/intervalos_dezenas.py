@@ -0,0 +1,147 @@
+"""
+Histórico de intervalos entre aparições de cada dezena da QUINA
+"""
+from array import array
+from typing import Dict, List
+from models.draw_store import DEZENAS_POR_CONCURSO, HistoricoCompacto
+
+
+# Uma entrada por dezena (índice 0 sem uso)
+COLUNAS = 81
+
+
+class IntervalosDezenas:
+    """
+    Guarda todos os intervalos entre aparições consecutivas de cada dezena
+    
+    O intervalo é a quantidade de concursos entre duas aparições em que a
+    dezena não saiu (0 = saiu em concursos seguidos), a mesma contagem do
+    atraso atual. Os intervalos ficam em um array('I') por dezena e são
+    estendidos apenas com os concursos novos quando o histórico cresce.
+    
+    Attributes:
+        dados: Histórico a partir do qual os intervalos foram montados
+        intervalos: Intervalos de cada dezena, do mais antigo ao mais recente
+        frequencias: Quantidade de aparições de cada dezena
+        primeira: Índice da primeira aparição de cada dezena (-1 = nunca)
+        ultima: Índice da última aparição de cada dezena (-1 = nunca)
+    """
+    
+    def __init__(self, dados: HistoricoCompacto):
+        """
+        Monta os intervalos para o histórico informado
+        
+        Args:
+            dados: Histórico compacto obtido do DrawStore
+        """
+        self.dados = HistoricoCompacto()
+        self.intervalos = [array('I') for _ in range(COLUNAS)]
+        self.frequencias = [0] * COLUNAS
+        self.primeira = [-1] * COLUNAS
+        self.ultima = [-1] * COLUNAS
+        self._resumo = None
+        self._acumular(dados, 0)
+        self.dados = dados
+    
+    def atualizar(self, dados: HistoricoCompacto) -> 'IntervalosDezenas':
+        """
+        Retorna os intervalos do histórico informado, estendendo estes quando
+        o histórico novo apenas acrescenta concursos ao final
+        
+        Args:
+            dados: Histórico atual do DrawStore
+            
+        Returns:
+            Esta instância (estendida) ou uma instância nova
+        """
+        if dados is self.dados:
+            return self
+        
+        if dados.contem_prefixo(self.dados):
+            self._acumular(dados, len(self.dados))
+            self.dados = dados
+            return self
+        
+        return IntervalosDezenas(dados)
+    
+    def resumo(self) -> List[Dict]:
+        """
+        Resumo dos intervalos de cada dezena, calculado uma vez por histórico
+        
+        O atraso máximo considera também o período antes da primeira
+        aparição e o atraso atual; média e percentis usam apenas os
+        intervalos completos entre duas aparições.
+        
+        Returns:
+            Lista com um dicionário por dezena (1 a 80), em ordem de dezena
+        """
+        if self._resumo is not None:
+            return self._resumo
+        
+        total = len(self.dados)
+        resumo = []
+        
+        for numero in range(1, COLUNAS):
+            intervalos = sorted(self.intervalos[numero])
+            ultima = self.ultima[numero]
+            atraso_atual = total - 1 - ultima if ultima != -1 else total
+            atraso_inicial = self.primeira[numero] if ultima != -1 else total
+            atraso_maximo = max(intervalos[-1] if intervalos else 0, atraso_inicial, atraso_atual)
+            
+            resumo.append({
+                'numero': numero,
+                'frequencia': self.frequencias[numero],
+                'atraso_atual': atraso_atual,
+                'atraso_maximo': atraso_maximo,
+                'intervalo_medio': round(sum(intervalos) / len(intervalos), 2) if intervalos else None,
+                'intervalo_mediano': self._percentil(intervalos, 50),
+                'intervalo_p90': self._percentil(intervalos, 90),
+                'percentual_do_maximo': round(atraso_atual / atraso_maximo * 100, 2) if atraso_maximo else 0
+            })
+        
+        self._resumo = resumo
+        return resumo
+    
+    @staticmethod
+    def _percentil(ordenados: List[int], percentual: int):
+        """
+        Percentil pelo método do posto mais próximo (None se vazio)
+        """
+        if not ordenados:
+            return None
+        posto = -(-len(ordenados) * percentual // 100)
+        return ordenados[max(posto - 1, 0)]
+    
+    def _acumular(self, dados: HistoricoCompacto, inicio: int):
+        """
+        Registra os intervalos dos concursos de inicio em diante
+        
+        Args:
+            dados: Histórico com os concursos a processar
+            inicio: Índice do primeiro concurso ainda não processado
+        """
+        if inicio >= len(dados):
+            return
+        
+        ordenadas = dados.ordenadas
+        intervalos = self.intervalos
+        frequencias = self.frequencias
+        primeira = self.primeira
+        ultima = self.ultima
+        
+        for idx in range(inicio, len(dados)):
+            base = idx * DEZENAS_POR_CONCURSO
+            
+            for numero in ordenadas[base:base + DEZENAS_POR_CONCURSO]:
+                if not numero:
+                    continue
+                
+                anterior = ultima[numero]
+                if anterior == -1:
+                    primeira[numero] = idx
+                else:
+                    intervalos[numero].append(idx - anterior - 1)
+                ultima[numero] = idx
+                frequencias[numero] += 1
+        
+        self._resumo = None
@@ -0,0 +1,146 @@
+"""
+Matrizes posicionais completas (distribuição e transições) da QUINA
+"""
+from typing import List
+import config
+from models.draw_store import DEZENAS_POR_CONCURSO, HistoricoCompacto
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele as matrizes usam Python puro
+    np = None
+
+
+# Largura de uma linha das matrizes: uma coluna por dezena (índice 0 sem uso)
+COLUNAS = 81
+
+# Ordens analisadas: ordem do sorteio e ordem crescente (k-ésima menor dezena)
+ORDENS = ('sorteio', 'ordenada')
+
+
+class MatrizesPosicionais:
+    """
+    Distribuição completa 5×80 das dezenas por posição e matrizes de
+    transição entre concursos consecutivos, nas duas ordens
+    
+    A transição da posição k conta, para cada par (a, b), quantas vezes a
+    dezena a ocupou a posição k em um concurso e a dezena b ocupou a mesma
+    posição no concurso seguinte. Na ordem do sorteio só entram concursos
+    com a ordem disponível; na ordem crescente, só concursos com as cinco
+    dezenas. As matrizes são montadas uma única vez por histórico (o
+    DrawStore entrega um histórico novo a cada versão dos dados).
+    
+    Attributes:
+        dados: Histórico a partir do qual as matrizes foram montadas
+        validos: Concursos considerados em cada ordem
+        distribuicoes: 5×81 contagens por ordem (linha = posição)
+        transicoes: 5×81×81 contagens por ordem
+    """
+    
+    def __init__(self, dados: HistoricoCompacto):
+        """
+        Monta as matrizes para o histórico informado
+        
+        Args:
+            dados: Histórico compacto obtido do DrawStore
+        """
+        self.dados = dados
+        self.validos = {}
+        self.distribuicoes = {}
+        self.transicoes = {}
+        
+        blocos = {'sorteio': dados.ordem, 'ordenada': dados.ordenadas}
+        montar = self._montar_numpy if np is not None and config.ESTATISTICA_NUMPY else self._montar
+        
+        for nome in ORDENS:
+            # A ordem do sorteio indisponível é preenchida com zeros a partir
+            # da 1ª posição; dezenas ausentes ficam nas últimas posições
+            coluna = 0 if nome == 'sorteio' else DEZENAS_POR_CONCURSO - 1
+            validos, distribuicao, transicao = montar(blocos[nome], len(dados), coluna)
+            self.validos[nome] = validos
+            self.distribuicoes[nome] = distribuicao
+            self.transicoes[nome] = transicao
+    
+    def distribuicao(self, ordem: str = 'sorteio') -> List[List[int]]:
+        """
+        Matriz 5×80 de frequências (linha = posição, coluna j = dezena j+1)
+        """
+        matriz = self.distribuicoes[ordem]
+        return [
+            matriz[posicao * COLUNAS + 1:(posicao + 1) * COLUNAS]
+            for posicao in range(DEZENAS_POR_CONCURSO)
+        ]
+    
+    def transicao(self, ordem: str = 'sorteio') -> List[List[List[int]]]:
+        """
+        Cinco matrizes 80×80 de transição (linha = dezena no concurso t,
+        coluna = dezena no concurso t+1, na mesma posição)
+        """
+        matriz = self.transicoes[ordem]
+        area = COLUNAS * COLUNAS
+        return [
+            [
+                matriz[posicao * area + linha * COLUNAS + 1:posicao * area + (linha + 1) * COLUNAS]
+                for linha in range(1, COLUNAS)
+            ]
+            for posicao in range(DEZENAS_POR_CONCURSO)
+        ]
+    
+    @staticmethod
+    def _montar(bloco, total: int, coluna: int) -> tuple:
+        """
+        Monta distribuição e transições de um bloco N×5 em Python puro
+        
+        Args:
+            bloco: Bloco N×5 (uint8) de dezenas
+            total: Quantidade de concursos
+            coluna: Posição que precisa ser não nula para o concurso valer
+            
+        Returns:
+            Tupla (concursos válidos, distribuição, transições) com listas planas
+        """
+        area = COLUNAS * COLUNAS
+        distribuicao = [0] * (DEZENAS_POR_CONCURSO * COLUNAS)
+        transicao = [0] * (DEZENAS_POR_CONCURSO * area)
+        validos = 0
+        anterior = None
+        
+        for idx in range(total):
+            inicio = idx * DEZENAS_POR_CONCURSO
+            atual = bloco[inicio:inicio + DEZENAS_POR_CONCURSO]
+            if not atual[coluna]:
+                anterior = None
+                continue
+            
+            validos += 1
+            for posicao, numero in enumerate(atual):
+                distribuicao[posicao * COLUNAS + numero] += 1
+            
+            if anterior is not None:
+                for posicao, (de, para) in enumerate(zip(anterior, atual)):
+                    transicao[posicao * area + de * COLUNAS + para] += 1
+            anterior = atual
+        
+        return validos, distribuicao, transicao
+    
+    @staticmethod
+    def _montar_numpy(bloco, total: int, coluna: int) -> tuple:
+        """
+        Versão vetorizada de _montar: uma única contagem (bincount) para
+        cada matriz sobre o bloco N×5 inteiro
+        """
+        area = COLUNAS * COLUNAS
+        matriz = np.frombuffer(bloco, dtype=np.uint8).reshape(-1, DEZENAS_POR_CONCURSO).astype(np.intp)
+        validos = matriz[:, coluna] != 0
+        deslocamento = np.arange(DEZENAS_POR_CONCURSO)
+        
+        distribuicao = np.bincount(
+            (matriz[validos] + deslocamento * COLUNAS).ravel(),
+            minlength=DEZENAS_POR_CONCURSO * COLUNAS
+        )
+        
+        consecutivos = validos[:-1] & validos[1:]
+        chaves = matriz[:-1][consecutivos] * COLUNAS + matriz[1:][consecutivos] + deslocamento * area
+        transicao = np.bincount(chaves.ravel(), minlength=DEZENAS_POR_CONCURSO * area)
+        
+        return int(validos.sum()), distribuicao.tolist(), transicao.tolist()
@@ -0,0 +1,178 @@
+"""
+Análise posicional pela ordem crescente (k-ésima menor dezena) da QUINA
+"""
+from itertools import accumulate, combinations
+from typing import List, Tuple
+import config
+from models.draw_store import DEZENAS_POR_CONCURSO, HistoricoCompacto
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional: sem ele a análise usa Python puro
+    np = None
+
+
+# Uma coluna por dezena (índice 0 sem uso)
+COLUNAS = 81
+
+# Pares de posições (i < j) com distribuição conjunta
+PARES_POSICOES = list(combinations(range(DEZENAS_POR_CONCURSO), 2))
+
+
+class PosicaoOrdenada:
+    """
+    Distribuições conjuntas e somas acumuladas da k-ésima menor dezena
+    
+    Considera apenas concursos com as cinco dezenas. Para cada par de
+    posições (i, j) guarda a contagem conjunta 81×81, de onde saem as
+    distribuições condicionais ("dado que a 1ª menor é 3, como fica a
+    2ª"); as somas acumuladas por posição respondem qualquer média móvel
+    com uma subtração. Montada uma única vez por histórico.
+    
+    Attributes:
+        dados: Histórico a partir do qual a análise foi montada
+        concursos: Número de cada concurso considerado, em ordem
+        somas: (M+1)×5 somas acumuladas das dezenas por posição
+        conjuntas: 10×81×81 contagens conjuntas por par de posições
+    """
+    
+    def __init__(self, dados: HistoricoCompacto):
+        """
+        Monta a análise para o histórico informado
+        
+        Args:
+            dados: Histórico compacto obtido do DrawStore
+        """
+        self.dados = dados
+        
+        if np is not None and config.ESTATISTICA_NUMPY:
+            self.concursos, self.somas, self.conjuntas = self._montar_numpy(dados)
+        else:
+            self.concursos, self.somas, self.conjuntas = self._montar(dados)
+    
+    def __len__(self) -> int:
+        return len(self.concursos)
+    
+    def medias(self) -> List[float]:
+        """
+        Média da k-ésima menor dezena em todo o histórico, para k = 1..5
+        """
+        total = len(self.concursos)
+        if not total:
+            return [0.0] * DEZENAS_POR_CONCURSO
+        return [
+            round(soma / total, 2)
+            for soma in self.somas[total * DEZENAS_POR_CONCURSO:]
+        ]
+    
+    def medias_moveis(self, janela: int, ultimos: int) -> Tuple[List[int], List[List[float]]]:
+        """
+        Médias móveis de cada posição sobre os últimos concursos
+        
+        Args:
+            janela: Quantidade de concursos de cada média
+            ultimos: Quantidade de pontos retornados (os mais recentes)
+            
+        Returns:
+            Tupla (números dos concursos, uma lista de médias por posição);
+            só há pontos a partir do concurso que completa a primeira janela
+        """
+        total = len(self.concursos)
+        somas = self.somas
+        inicio = max(total - ultimos, janela - 1, 0)
+        
+        medias = [[] for _ in range(DEZENAS_POR_CONCURSO)]
+        for fim in range(inicio + 1, total + 1):
+            atual = fim * DEZENAS_POR_CONCURSO
+            anterior = (fim - janela) * DEZENAS_POR_CONCURSO
+            for posicao in range(DEZENAS_POR_CONCURSO):
+                medias[posicao].append(
+                    round((somas[atual + posicao] - somas[anterior + posicao]) / janela, 2)
+                )
+        
+        return list(self.concursos[inicio:total]), medias
+    
+    def condicional(self, posicao: int, valor: int) -> Tuple[int, List[List[int]]]:
+        """
+        Distribuição das demais posições dado o valor de uma posição
+        
+        Args:
+            posicao: Posição conhecida (0 a 4)
+            valor: Dezena na posição conhecida
+            
+        Returns:
+            Tupla (concursos com a condição, 5 listas de 80 contagens); a
+            lista da própria posição conhecida fica vazia
+        """
+        area = COLUNAS * COLUNAS
+        distribuicoes = []
+        
+        for outra in range(DEZENAS_POR_CONCURSO):
+            if outra == posicao:
+                distribuicoes.append([])
+                continue
+            
+            par = PARES_POSICOES.index((min(posicao, outra), max(posicao, outra)))
+            base = par * area
+            if posicao < outra:
+                linha = self.conjuntas[base + valor * COLUNAS + 1:base + (valor + 1) * COLUNAS]
+            else:
+                linha = self.conjuntas[base + COLUNAS + valor:base + area:COLUNAS]
+            distribuicoes.append(list(linha))
+        
+        total = sum(distribuicoes[1 if posicao == 0 else 0])
+        return total, distribuicoes
+    
+    @staticmethod
+    def _montar(dados: HistoricoCompacto) -> tuple:
+        """
+        Monta concursos, somas acumuladas e contagens conjuntas em Python puro
+        """
+        area = COLUNAS * COLUNAS
+        ordenadas = dados.ordenadas
+        numeros = dados.numeros
+        concursos = []
+        linhas = []
+        conjuntas = [0] * (len(PARES_POSICOES) * area)
+        
+        for idx in range(len(dados)):
+            inicio = idx * DEZENAS_POR_CONCURSO
+            dezenas = ordenadas[inicio:inicio + DEZENAS_POR_CONCURSO]
+            if not dezenas[-1]:
+                continue
+            
+            concursos.append(numeros[idx])
+            linhas.append(dezenas)
+            for par, (i, j) in enumerate(PARES_POSICOES):
+                conjuntas[par * area + dezenas[i] * COLUNAS + dezenas[j]] += 1
+        
+        # Intercala as somas acumuladas de cada posição em linhas de 5
+        colunas = [
+            list(accumulate(linha[posicao] for linha in linhas))
+            for posicao in range(DEZENAS_POR_CONCURSO)
+        ]
+        somas = [0] * DEZENAS_POR_CONCURSO
+        for linha in zip(*colunas):
+            somas.extend(linha)
+        
+        return concursos, somas, conjuntas
+    
+    @staticmethod
+    def _montar_numpy(dados: HistoricoCompacto) -> tuple:
+        """
+        Versão vetorizada de _montar sobre o bloco N×5 inteiro
+        """
+        area = COLUNAS * COLUNAS
+        matriz = np.frombuffer(dados.ordenadas, dtype=np.uint8).reshape(-1, DEZENAS_POR_CONCURSO)
+        validos = matriz[:, -1] != 0
+        matriz = matriz[validos].astype(np.intp)
+        concursos = np.frombuffer(dados.numeros, dtype=np.uint32)[validos]
+        
+        somas = np.zeros((len(matriz) + 1, DEZENAS_POR_CONCURSO), dtype=np.int64)
+        np.cumsum(matriz, axis=0, out=somas[1:])
+        
+        primeiras, segundas = (np.array(indices) for indices in zip(*PARES_POSICOES))
+        chaves = np.arange(len(PARES_POSICOES)) * area + matriz[:, primeiras] * COLUNAS + matriz[:, segundas]
+        conjuntas = np.bincount(chaves.ravel(), minlength=len(PARES_POSICOES) * area)
+        
+        return concursos.tolist(), somas.ravel().tolist(), conjuntas.tolist()
@@ -2,7 +2,8 @@
 Serviço para geração de palpites para a QUINA
 """
 import random
-from typing import List, Dict
+import threading
+from typing import List, Dict, Optional
 import config
 from services.estatistica_service import EstatisticaService
 
@@ -17,12 +18,15 @@ class QuinaService:
         Inicializa o serviço
         """
         self.estatistica_service = EstatisticaService()
+        self._candidatos = None
+        self._lock_candidatos = threading.Lock()
     
     def gerar_palpite(
         self,
         estrategia: str = 'equilibrada',
         quantidade_numeros: int = 5,
-        quantidade_jogos: int = 1
+        quantidade_jogos: int = 1,
+        semente: Optional[int] = None
     ) -> Dict:
         """
         Gera palpites usando a estratégia especificada
@@ -32,43 +36,30 @@ class QuinaService:
                        mista, atrasados, por_faixa, por_posicao)
             quantidade_numeros: Quantidade de números por jogo (5-15)
             quantidade_jogos: Quantidade de jogos a gerar (1-100)
+            semente: Semente do gerador aleatório, para reproduzir os jogos
             
         Returns:
             Dicionário com os palpites gerados e informações da estratégia
         """
         # Validações
-        if quantidade_numeros < config.MIN_JOGO or quantidade_numeros > config.MAX_JOGO:
-            return {
-                'erro': f'Quantidade de números deve ser entre {config.MIN_JOGO} e {config.MAX_JOGO}'
-            }
+        erro = self.validar_jogo(estrategia, quantidade_numeros)
+        if erro:
+            return {'erro': erro}
         
         if quantidade_jogos < 1 or quantidade_jogos > 100:
             return {
                 'erro': 'Quantidade de jogos deve ser entre 1 e 100'
             }
         
-        # Mapeia estratégias para métodos
-        estrategias = {
-            'equilibrada': self._estrategia_equilibrada,
-            'agressiva': self._estrategia_agressiva,
-            'conservadora': self._estrategia_conservadora,
-            'mista': self._estrategia_mista,
-            'atrasados': self._estrategia_atrasados,
-            'por_faixa': self._estrategia_por_faixa,
-            'por_posicao': self._estrategia_por_posicao
-        }
-        
-        if estrategia not in estrategias:
-            return {
-                'erro': f'Estratégia inválida. Opções: {", ".join(estrategias.keys())}'
-            }
-        
-        # Gera os jogos
-        metodo = estrategias[estrategia]
+        # Gera os jogos: as estatísticas são lidas uma única vez e cada
+        # jogo apenas sorteia a partir dos candidatos
+        metodo = self.estrategias()[estrategia]
+        candidatos = self.obter_candidatos()
+        rng = random.Random(semente) if semente is not None else random
         jogos = []
         
         for _ in range(quantidade_jogos):
-            numeros = metodo(quantidade_numeros)
+            numeros = metodo(quantidade_numeros, candidatos, rng)
             jogos.append(sorted(numeros))
         
         return {
@@ -78,160 +69,271 @@ class QuinaService:
             'jogos': jogos
         }
     
-    def _estrategia_equilibrada(self, quantidade: int) -> List[int]:
+    @classmethod
+    def estrategias(cls) -> Dict:
+        """
+        Mapeia o nome de cada estratégia para o método que gera um jogo
+        
+        Returns:
+            Dicionário nome -> método(quantidade, candidatos, rng)
+        """
+        return {
+            'equilibrada': cls._estrategia_equilibrada,
+            'agressiva': cls._estrategia_agressiva,
+            'conservadora': cls._estrategia_conservadora,
+            'mista': cls._estrategia_mista,
+            'atrasados': cls._estrategia_atrasados,
+            'por_faixa': cls._estrategia_por_faixa,
+            'por_posicao': cls._estrategia_por_posicao
+        }
+    
+    def validar_jogo(self, estrategia: str, quantidade_numeros: int) -> Optional[str]:
+        """
+        Valida a estratégia e a quantidade de números por jogo
+        
+        Returns:
+            Mensagem de erro ou None se os parâmetros forem válidos
+        """
+        if quantidade_numeros < config.MIN_JOGO or quantidade_numeros > config.MAX_JOGO:
+            return f'Quantidade de números deve ser entre {config.MIN_JOGO} e {config.MAX_JOGO}'
+        
+        estrategias = self.estrategias()
+        if estrategia not in estrategias:
+            return f'Estratégia inválida. Opções: {", ".join(estrategias.keys())}'
+        
+        return None
+    
+    def obter_candidatos(self) -> Dict:
+        """
+        Retorna os rankings de candidatos usados pelas estratégias
+        
+        O snapshot é montado uma única vez por versão dos dados e
+        compartilhado entre jogos, requisições e threads; por ser imutável
+        (tuplas), pode ser lido sem lock.
+        
+        Returns:
+            Dicionário com os rankings 'frequentes', 'atrasados',
+            'proximos_do_maximo' e 'posicoes' (um ranking por posição)
+        """
+        dados = self.estatistica_service.draw_store.obter()
+        candidatos = self._candidatos
+        if candidatos is not None and candidatos['dados'] is dados:
+            return candidatos
+        
+        with self._lock_candidatos:
+            if self._candidatos is None or self._candidatos['dados'] is not dados:
+                self._candidatos = self._montar_candidatos(dados)
+            return self._candidatos
+    
+    def _montar_candidatos(self, dados) -> Dict:
+        """
+        Calcula os rankings de candidatos a partir das estatísticas
+        
+        Args:
+            dados: Histórico do DrawStore a que o snapshot corresponde
+            
+        Returns:
+            Snapshot de candidatos (ver obter_candidatos)
+        """
+        frequencias = self.estatistica_service.calcular_frequencia_numeros()
+        intervalos = self.estatistica_service.calcular_intervalos()
+        matriz = self.estatistica_service.calcular_matrizes_posicionais()['sorteio']
+        
+        # Números com atraso atual mais próximo do próprio atraso máximo
+        proximos_do_maximo = sorted(
+            intervalos,
+            key=lambda x: (-x['percentual_do_maximo'], -x['atraso_atual'], x['numero'])
+        )
+        
+        # Ranking de cada posição: frequência decrescente e depois número
+        posicoes = ()
+        if any(any(linha) for linha in matriz):
+            posicoes = tuple(
+                tuple(sorted(range(1, 81), key=lambda numero: (-linha[numero - 1], numero)))
+                for linha in matriz
+            )
+        
+        return {
+            'dados': dados,
+            'frequentes': tuple(f['numero'] for f in frequencias),
+            'atrasados': tuple(i['numero'] for i in intervalos),
+            'proximos_do_maximo': tuple(i['numero'] for i in proximos_do_maximo),
+            'posicoes': posicoes
+        }
+    
+    @staticmethod
+    def _estrategia_equilibrada(quantidade: int, candidatos: Dict, rng=random) -> List[int]:
         """
         Estratégia equilibrada: mix de números frequentes e atrasados
         
         Args:
             quantidade: Quantidade de números a gerar
+            candidatos: Rankings retornados por obter_candidatos
+            rng: Gerador aleatório (módulo random ou random.Random)
             
         Returns:
             Lista de números
         """
-        frequencias = self.estatistica_service.calcular_frequencia_numeros()
-        atrasos = self.estatistica_service.calcular_atrasos()
+        frequentes = candidatos['frequentes']
+        atrasados = candidatos['atrasados']
         
-        if not frequencias or not atrasos:
+        if not frequentes or not atrasados:
             # Fallback: números aleatórios
-            return random.sample(range(1, 81), quantidade)
+            return rng.sample(range(1, 81), quantidade)
         
         # Pega metade dos mais frequentes e metade dos mais atrasados
         metade = quantidade // 2
         outra_metade = quantidade - metade
         
-        frequentes = [f['numero'] for f in frequencias[:20]]
-        atrasados_list = [a['numero'] for a in atrasos[:20]]
+        frequentes = list(frequentes[:20])
+        atrasados_list = list(atrasados[:20])
         
         numeros = []
-        numeros.extend(random.sample(frequentes, min(metade, len(frequentes))))
+        numeros.extend(rng.sample(frequentes, min(metade, len(frequentes))))
         
         # Pega atrasados que não estão nos frequentes
         atrasados_disponiveis = [n for n in atrasados_list if n not in numeros]
-        numeros.extend(random.sample(
+        numeros.extend(rng.sample(
             atrasados_disponiveis,
             min(outra_metade, len(atrasados_disponiveis))
         ))
         
         # Completa se necessário
         while len(numeros) < quantidade:
-            num = random.randint(1, 80)
+            num = rng.randint(1, 80)
             if num not in numeros:
                 numeros.append(num)
         
         return numeros[:quantidade]
     
-    def _estrategia_agressiva(self, quantidade: int) -> List[int]:
+    @staticmethod
+    def _estrategia_agressiva(quantidade: int, candidatos: Dict, rng=random) -> List[int]:
         """
         Estratégia agressiva: prioriza números mais frequentes
         
         Args:
             quantidade: Quantidade de números a gerar
+            candidatos: Rankings retornados por obter_candidatos
+            rng: Gerador aleatório (módulo random ou random.Random)
             
         Returns:
             Lista de números
         """
-        frequencias = self.estatistica_service.calcular_frequencia_numeros()
+        frequentes = candidatos['frequentes']
         
-        if not frequencias:
-            return random.sample(range(1, 81), quantidade)
+        if not frequentes:
+            return rng.sample(range(1, 81), quantidade)
         
         # Pega dos 30 mais frequentes
-        top_frequentes = [f['numero'] for f in frequencias[:30]]
-        return random.sample(top_frequentes, min(quantidade, len(top_frequentes)))
+        top_frequentes = frequentes[:30]
+        return rng.sample(top_frequentes, min(quantidade, len(top_frequentes)))
     
-    def _estrategia_conservadora(self, quantidade: int) -> List[int]:
+    @staticmethod
+    def _estrategia_conservadora(quantidade: int, candidatos: Dict, rng=random) -> List[int]:
         """
-        Estratégia conservadora: prioriza números mais atrasados
+        Estratégia conservadora: prioriza números mais atrasados em relação
+        ao próprio atraso máximo histórico
         
         Args:
             quantidade: Quantidade de números a gerar
+            candidatos: Rankings retornados por obter_candidatos
+            rng: Gerador aleatório (módulo random ou random.Random)
             
         Returns:
             Lista de números
         """
-        atrasos = self.estatistica_service.calcular_atrasos()
+        proximos_do_maximo = candidatos['proximos_do_maximo']
         
-        if not atrasos:
-            return random.sample(range(1, 81), quantidade)
+        if not proximos_do_maximo:
+            return rng.sample(range(1, 81), quantidade)
         
-        # Pega dos 30 mais atrasados
-        top_atrasados = [a['numero'] for a in atrasos[:30]]
-        return random.sample(top_atrasados, min(quantidade, len(top_atrasados)))
+        # Pega dos 30 com atraso atual mais próximo do atraso máximo
+        top_atrasados = proximos_do_maximo[:30]
+        return rng.sample(top_atrasados, min(quantidade, len(top_atrasados)))
     
-    def _estrategia_mista(self, quantidade: int) -> List[int]:
+    @staticmethod
+    def _estrategia_mista(quantidade: int, candidatos: Dict, rng=random) -> List[int]:
         """
         Estratégia mista: combina múltiplas estratégias
         
         Args:
             quantidade: Quantidade de números a gerar
+            candidatos: Rankings retornados por obter_candidatos
+            rng: Gerador aleatório (módulo random ou random.Random)
             
         Returns:
             Lista de números
         """
-        frequencias = self.estatistica_service.calcular_frequencia_numeros()
-        atrasos = self.estatistica_service.calcular_atrasos()
+        frequentes = candidatos['frequentes']
+        atrasados = candidatos['atrasados']
         
-        if not frequencias or not atrasos:
-            return random.sample(range(1, 81), quantidade)
+        if not frequentes or not atrasados:
+            return rng.sample(range(1, 81), quantidade)
         
         # Divide em 3 grupos
         grupo1 = quantidade // 3
         grupo2 = quantidade // 3
         grupo3 = quantidade - grupo1 - grupo2
         
-        frequentes = [f['numero'] for f in frequencias[:15]]
-        atrasados_list = [a['numero'] for a in atrasos[:15]]
-        medios = [f['numero'] for f in frequencias[15:45]]
+        medios = list(frequentes[15:45])
+        frequentes = list(frequentes[:15])
+        atrasados_list = list(atrasados[:15])
         
         numeros = []
-        numeros.extend(random.sample(frequentes, min(grupo1, len(frequentes))))
+        numeros.extend(rng.sample(frequentes, min(grupo1, len(frequentes))))
         
         atrasados_disponiveis = [n for n in atrasados_list if n not in numeros]
-        numeros.extend(random.sample(
+        numeros.extend(rng.sample(
             atrasados_disponiveis,
             min(grupo2, len(atrasados_disponiveis))
         ))
         
         medios_disponiveis = [n for n in medios if n not in numeros]
-        numeros.extend(random.sample(
+        numeros.extend(rng.sample(
             medios_disponiveis,
             min(grupo3, len(medios_disponiveis))
         ))
         
         # Completa se necessário
         while len(numeros) < quantidade:
-            num = random.randint(1, 80)
+            num = rng.randint(1, 80)
             if num not in numeros:
                 numeros.append(num)
         
         return numeros[:quantidade]
     
-    def _estrategia_atrasados(self, quantidade: int) -> List[int]:
+    @staticmethod
+    def _estrategia_atrasados(quantidade: int, candidatos: Dict, rng=random) -> List[int]:
         """
         Estratégia focada em números com maior atraso
         
         Args:
             quantidade: Quantidade de números a gerar
+            candidatos: Rankings retornados por obter_candidatos
+            rng: Gerador aleatório (módulo random ou random.Random)
             
         Returns:
             Lista de números
         """
-        atrasos = self.estatistica_service.calcular_atrasos()
+        atrasados = candidatos['atrasados']
         
-        if not atrasos:
-            return random.sample(range(1, 81), quantidade)
+        if not atrasados:
+            return rng.sample(range(1, 81), quantidade)
         
         # Pega os mais atrasados
-        mais_atrasados = [a['numero'] for a in atrasos[:quantidade]]
+        mais_atrasados = list(atrasados[:quantidade])
         return mais_atrasados
     
-    def _estrategia_por_faixa(self, quantidade: int) -> List[int]:
+    @staticmethod
+    def _estrategia_por_faixa(quantidade: int, candidatos: Dict, rng=random) -> List[int]:
         """
         Estratégia que distribui números por faixas de dezenas
         Faixas: 01-20, 21-40, 41-60, 61-80
         
         Args:
             quantidade: Quantidade de números a gerar
+            candidatos: Rankings retornados por obter_candidatos
+            rng: Gerador aleatório (módulo random ou random.Random)
             
         Returns:
             Lista de números
@@ -250,63 +352,49 @@ class QuinaService:
         
         for idx, faixa in enumerate(faixas):
             qtd = por_faixa + (1 if idx < resto else 0)
-            numeros.extend(random.sample(faixa, min(qtd, len(faixa))))
+            numeros.extend(rng.sample(faixa, min(qtd, len(faixa))))
         
         # Se não conseguiu preencher, completa aleatoriamente
         while len(numeros) < quantidade:
-            num = random.randint(1, 80)
+            num = rng.randint(1, 80)
             if num not in numeros:
                 numeros.append(num)
         
         return numeros[:quantidade]
     
-    def _estrategia_por_posicao(self, quantidade: int) -> List[int]:
+    @staticmethod
+    def _estrategia_por_posicao(quantidade: int, candidatos: Dict, rng=random) -> List[int]:
         """
         Estratégia baseada na análise posicional do sorteio
         
+        Usa a distribuição completa de cada posição (todas as 80 dezenas),
+        de modo que uma dezena já escolhida em outra posição é substituída
+        pela próxima do ranking da posição.
+        
         Args:
             quantidade: Quantidade de números a gerar
+            candidatos: Rankings retornados por obter_candidatos
+            rng: Gerador aleatório (módulo random ou random.Random)
             
         Returns:
             Lista de números
         """
-        posicoes = self.estatistica_service.calcular_por_posicao_sorteio()
+        rankings = candidatos['posicoes']
         
-        if not posicoes or len(posicoes) < 5:
-            return random.sample(range(1, 81), quantidade)
+        if not rankings:
+            return rng.sample(range(1, 81), quantidade)
         
         numeros = []
         
-        # Para jogos de 5 números, pega 1 de cada posição
-        if quantidade == 5:
-            for i in range(1, 6):
-                pos_key = f'posicao_{i}'
-                if pos_key in posicoes and posicoes[pos_key]['top_numeros']:
-                    top = posicoes[pos_key]['top_numeros']
-                    # Escolhe aleatoriamente entre os top 5 desta posição
-                    candidatos = [n['numero'] for n in top[:5]]
-                    num = random.choice(candidatos)
-                    if num not in numeros:
-                        numeros.append(num)
-        else:
-            # Para outros tamanhos, distribui proporcionalmente
-            por_posicao = quantidade // 5
-            resto = quantidade % 5
-            
-            for i in range(1, 6):
-                pos_key = f'posicao_{i}'
-                if pos_key in posicoes and posicoes[pos_key]['top_numeros']:
-                    qtd = por_posicao + (1 if i <= resto else 0)
-                    top = posicoes[pos_key]['top_numeros']
-                    candidatos = [n['numero'] for n in top[:10] if n['numero'] not in numeros]
-                    
-                    qtd_disponivel = min(qtd, len(candidatos))
-                    numeros.extend(random.sample(candidatos, qtd_disponivel))
+        # Para jogos de 5 números, pega 1 de cada posição entre os top 5;
+        # para outros tamanhos, distribui proporcionalmente entre os top 10
+        por_posicao = quantidade // 5
+        resto = quantidade % 5
+        tamanho_top = 5 if quantidade == 5 else 10
         
-        # Completa se necessário
-        while len(numeros) < quantidade:
-            num = random.randint(1, 80)
-            if num not in numeros:
-                numeros.append(num)
+        for i, ranking in enumerate(rankings, start=1):
+            qtd = por_posicao + (1 if i <= resto else 0)
+            disponiveis = [n for n in ranking if n not in numeros]
+            numeros.extend(rng.sample(disponiveis[:max(tamanho_top, qtd)], qtd))
         
         return numeros[:quantidade]
@@ -0,0 +1,227 @@
+"""
+Serviço de sincronização em segundo plano com a API da Caixa
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+import config
+from services.api_caixa_service import ApiCaixaService
+
+
+# Quantidade de jobs finalizados mantidos para consulta
+MAX_JOBS_HISTORICO = 50
+
+
+class SincronizacaoService:
+    """
+    Executa a sincronização com a API da Caixa fora da requisição HTTP
+    
+    Apenas um job fica ativo por vez: enfileirar enquanto um job está
+    pendente ou em execução retorna o job existente, e a execução é
+    protegida por um lock para que duas sincronizações nunca corram juntas.
+    Um agendador opcional enfileira uma sincronização a cada
+    config.SYNC_INTERVALO_MINUTOS.
+    """
+    
+    _instancia = None
+    _lock_instancia = threading.Lock()
+    
+    def __init__(self, api_caixa: ApiCaixaService = None):
+        """
+        Inicializa o serviço (as threads são criadas sob demanda)
+        
+        Args:
+            api_caixa: Serviço usado para sincronizar
+        """
+        self.api_caixa = api_caixa or ApiCaixaService()
+        self._lock = threading.Lock()
+        self._execucao = threading.Lock()
+        self._jobs = OrderedDict()
+        self._job_ativo = None
+        self._agendador = None
+        self._parar_agendador = threading.Event()
+    
+    @classmethod
+    def instancia(cls) -> 'SincronizacaoService':
+        """
+        Retorna a instância compartilhada do processo
+        
+        Returns:
+            SincronizacaoService do processo
+        """
+        if cls._instancia is None:
+            with cls._lock_instancia:
+                if cls._instancia is None:
+                    cls._instancia = cls()
+        return cls._instancia
+    
+    def enfileirar(self, atualizar_apenas_novos: bool = True, origem: str = 'manual') -> Dict:
+        """
+        Enfileira uma sincronização, reaproveitando o job ativo se houver
+        
+        Args:
+            atualizar_apenas_novos: Repassado para atualizar_base_completa
+            origem: Quem solicitou ('manual' ou 'agendador')
+            
+        Returns:
+            Estado do job (novo ou já em andamento)
+        """
+        with self._lock:
+            if self._job_ativo is not None:
+                return self._copiar(self._jobs[self._job_ativo])
+            
+            job = {
+                'id': uuid.uuid4().hex,
+                'status': 'pendente',
+                'origem': origem,
+                'criado_em': time.time(),
+                'iniciado_em': None,
+                'finalizado_em': None,
+                'total': None,
+                'total_processados': 0,
+                'total_inseridos': 0,
+                'total_erros': 0,
+                'taxa': None,
+                'eta_segundos': None,
+                'resultado': None,
+                'erro': None
+            }
+            self._jobs[job['id']] = job
+            self._job_ativo = job['id']
+            self._descartar_antigos()
+        
+        thread = threading.Thread(
+            target=self._executar,
+            args=(job['id'], atualizar_apenas_novos),
+            name=f"sincronizacao-{job['id'][:8]}",
+            daemon=True
+        )
+        thread.start()
+        
+        return self._copiar(job)
+    
+    def obter_job(self, job_id: str) -> Optional[Dict]:
+        """
+        Retorna o estado de um job
+        
+        Args:
+            job_id: Identificador retornado por enfileirar
+            
+        Returns:
+            Cópia do estado do job ou None se não existir
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._copiar(job) if job else None
+    
+    def iniciar_agendador(self, intervalo_minutos: float = None) -> bool:
+        """
+        Inicia a thread que enfileira sincronizações periodicamente
+        
+        Args:
+            intervalo_minutos: Intervalo entre execuções (padrão: config)
+            
+        Returns:
+            True se o agendador foi iniciado, False se desabilitado ou já ativo
+        """
+        intervalo = intervalo_minutos if intervalo_minutos is not None else config.SYNC_INTERVALO_MINUTOS
+        if intervalo <= 0 or self._agendador is not None:
+            return False
+        
+        self._parar_agendador.clear()
+        self._agendador = threading.Thread(
+            target=self._agendar,
+            args=(intervalo * 60,),
+            name='sincronizacao-agendador',
+            daemon=True
+        )
+        self._agendador.start()
+        print(f"Agendador de sincronização ativo a cada {intervalo} minutos")
+        return True
+    
+    def parar_agendador(self):
+        """
+        Interrompe o agendador (o job em execução, se houver, continua)
+        """
+        self._parar_agendador.set()
+        if self._agendador is not None:
+            self._agendador.join()
+            self._agendador = None
+    
+    def _agendar(self, intervalo_segundos: float):
+        """
+        Laço do agendador
+        """
+        while not self._parar_agendador.wait(intervalo_segundos):
+            self.enfileirar(origem='agendador')
+    
+    def _executar(self, job_id: str, atualizar_apenas_novos: bool):
+        """
+        Executa o job na thread de trabalho, uma sincronização por vez
+        """
+        with self._execucao:
+            inicio = time.time()
+            self._atualizar(job_id, status='executando', iniciado_em=inicio)
+            
+            def progresso(dados: Dict):
+                decorrido = time.time() - inicio
+                taxa = dados['total_processados'] / decorrido if decorrido > 0 else None
+                restantes = dados['total'] - dados['total_processados']
+                self._atualizar(
+                    job_id,
+                    taxa=round(taxa, 2) if taxa else None,
+                    eta_segundos=round(restantes / taxa, 1) if taxa else None,
+                    **dados
+                )
+            
+            try:
+                resultado = self.api_caixa.atualizar_base_completa(
+                    atualizar_apenas_novos,
+                    progresso=progresso
+                )
+            except Exception as e:
+                print(f"Erro na sincronização {job_id}: {e}")
+                self._atualizar(job_id, status='erro', erro=str(e), finalizado_em=time.time())
+            else:
+                self._atualizar(
+                    job_id,
+                    status='concluido',
+                    resultado=resultado,
+                    total_processados=resultado['total_processados'],
+                    total_inseridos=resultado['total_inseridos'],
+                    total_erros=resultado['total_erros'],
+                    eta_segundos=0,
+                    finalizado_em=time.time()
+                )
+            finally:
+                with self._lock:
+                    if self._job_ativo == job_id:
+                        self._job_ativo = None
+    
+    def _atualizar(self, job_id: str, **campos):
+        """
+        Atualiza campos de um job sob o lock
+        """
+        with self._lock:
+            self._jobs[job_id].update(campos)
+    
+    def _descartar_antigos(self):
+        """
+        Remove os jobs finalizados mais antigos além do limite do histórico
+        """
+        excedente = len(self._jobs) - MAX_JOBS_HISTORICO
+        for job_id in list(self._jobs):
+            if excedente <= 0:
+                break
+            if job_id != self._job_ativo:
+                del self._jobs[job_id]
+                excedente -= 1
+    
+    @staticmethod
+    def _copiar(job: Dict) -> Dict:
+        """
+        Cópia do estado do job para uso fora do lock
+        """
+        return dict(job)
@@ -250,16 +250,40 @@ async function atualizarDados() {
             method: 'POST'
         });
         
-        const data = await response.json();
+        let job = await response.json();
         
-        if (response.ok) {
+        if (!response.ok) {
+            alert('❌ Erro ao atualizar dados: ' + (job.erro || job.mensagem));
+            return;
+        }
+        
+        // A sincronização roda em segundo plano: acompanha o progresso do job
+        while (job.status === 'pendente' || job.status === 'executando') {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            
+            const status = await fetch(`/api/atualizar/${job.id}`);
+            job = await status.json();
+            
+            if (!status.ok) {
+                alert('❌ Erro ao consultar atualização: ' + (job.erro || job.mensagem));
+                return;
+            }
+            
+            if (job.total) {
+                const eta = job.eta_segundos !== null ? ` (~${Math.ceil(job.eta_segundos)}s)` : '';
+                btn.innerHTML = `⏳ ${job.total_processados}/${job.total}${eta}`;
+            }
+        }
+        
+        if (job.status === 'concluido') {
+            const data = job.resultado;
             alert(`✅ Atualização concluída!\n\nProcessados: ${data.total_processados}\nInseridos: ${data.total_inseridos}\nErros: ${data.total_erros}\nÚltimo concurso: ${data.ultimo_concurso}`);
             
             // Recarrega os dados
             carregarUltimoResultado();
             carregarEstatisticas();
         } else {
-            alert('❌ Erro ao atualizar dados: ' + (data.erro || data.mensagem));
+            alert('❌ Erro ao atualizar dados: ' + job.erro);
         }
     } catch (error) {
         console.error('Erro ao atualizar:', error);
@@ -0,0 +1,157 @@
+"""
+Busca concorrente da API da Caixa contra um servidor HTTP local
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import config
+from services.api_caixa_service import ApiCaixaService
+
+
+def concurso(numero):
+    """
+    Resultado mínimo no formato da API
+    """
+    return {'numero': numero, 'listaDezenas': ['01', '02', '03', '04', '05']}
+
+
+class ApiFalsa(ThreadingHTTPServer):
+    """
+    Servidor local que responde /quina/<numero>
+    
+    Attributes:
+        roteiro: Status devolvidos em sequência por concurso antes do 200
+        atrasos: Segundos de espera antes de responder, por concurso
+        requisicoes: Requisições recebidas por concurso
+    """
+    
+    daemon_threads = True
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), ManipuladorApiFalsa)
+        self.roteiro = {}
+        self.atrasos = {}
+        self.requisicoes = Counter()
+        self.lock = threading.Lock()
+    
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}/quina'
+
+
+class ManipuladorApiFalsa(BaseHTTPRequestHandler):
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_GET(self):
+        numero = int(self.path.rsplit('/', 1)[-1])
+        servidor = self.server
+        with servidor.lock:
+            servidor.requisicoes[numero] += 1
+            roteiro = servidor.roteiro.get(numero)
+            status = roteiro.pop(0) if roteiro else 200
+        
+        time.sleep(servidor.atrasos.get(numero, 0))
+        
+        corpo = json.dumps(concurso(numero) if status == 200 else {}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+class TestBuscaConcorrente(unittest.TestCase):
+    
+    def setUp(self):
+        self.servidor = ApiFalsa()
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.config = mock.patch.multiple(
+            config,
+            DATABASE_PATH=os.path.join(self.diretorio.name, 'teste.db'),
+            API_QUINA_URL=self.servidor.url,
+            API_CONCORRENCIA=4,
+            API_TENTATIVAS=3,
+            API_BACKOFF_BASE=0.001,
+            API_BACKOFF_MAX=0.01,
+            API_TIMEOUT=5
+        )
+        self.config.start()
+        self.api = ApiCaixaService()
+    
+    def tearDown(self):
+        self.api.session.close()
+        self.config.stop()
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        self.diretorio.cleanup()
+    
+    def test_retenta_429_e_5xx(self):
+        self.servidor.roteiro[7] = [429, 503]
+        
+        self.assertEqual(self.api.buscar_concurso_especifico(7), concurso(7))
+        self.assertEqual(self.servidor.requisicoes[7], 3)
+    
+    def test_desiste_apos_todas_as_tentativas(self):
+        self.servidor.roteiro[7] = [500, 502, 503, 504]
+        
+        with mock.patch('builtins.print'):
+            self.assertIsNone(self.api.buscar_concurso_especifico(7))
+        self.assertEqual(self.servidor.requisicoes[7], config.API_TENTATIVAS)
+    
+    def test_erro_permanente_nao_retenta(self):
+        self.servidor.roteiro[7] = [404]
+        
+        with mock.patch('builtins.print'):
+            self.assertIsNone(self.api.buscar_concurso_especifico(7))
+        self.assertEqual(self.servidor.requisicoes[7], 1)
+    
+    def test_entrega_na_ordem_pedida(self):
+        # Os primeiros concursos demoram mais: terminam depois dos seguintes
+        numeros = list(range(1, 31))
+        for numero in numeros:
+            self.servidor.atrasos[numero] = 0.002 * (31 - numero)
+        self.servidor.roteiro[3] = [503]
+        self.servidor.roteiro[10] = [429]
+        self.servidor.roteiro[20] = [500, 500, 500]
+        
+        with mock.patch('builtins.print'):
+            recebidos = list(self.api.buscar_concursos(numeros))
+        
+        self.assertEqual([numero for numero, _ in recebidos], numeros)
+        for numero, resultado in recebidos:
+            self.assertEqual(resultado, None if numero == 20 else concurso(numero))
+    
+    def test_cancelamento_descarta_pendentes(self):
+        numeros = range(1, 201)
+        for numero in numeros:
+            self.servidor.atrasos[numero] = 0.05
+        
+        busca = self.api.buscar_concursos(numeros)
+        recebidos = [next(busca) for _ in range(3)]
+        busca.close()
+        
+        # A janela tem 4 × concorrência concursos submetidos; ao fechar, só
+        # os que já estavam em andamento chegam ao servidor
+        total = sum(self.servidor.requisicoes.values())
+        time.sleep(0.1)
+        self.assertEqual(sum(self.servidor.requisicoes.values()), total)
+        self.assertEqual([numero for numero, _ in recebidos], [1, 2, 3])
+        self.assertLessEqual(total, 3 + 2 * config.API_CONCORRENCIA)
+        self.assertLess(total, config.API_CONCORRENCIA * 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Paridade entre os agregados em Python puro e a versão vetorizada com NumPy
+"""
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+import config
+from models.draw_store import HistoricoCompacto
+from models.resultado_model import DezenasConcurso
+from services.estatistica_service import EstatisticaService, np
+
+
+FORMATADORES = (
+    '_formatar_frequencia',
+    '_formatar_atrasos',
+    '_formatar_pares_impares',
+    '_formatar_por_faixa',
+    '_formatar_por_digito',
+    '_formatar_por_posicao_sorteio'
+)
+
+
+def historico(sorteios):
+    """
+    Monta um histórico a partir de (dezenas na ordem do sorteio ou None)
+    
+    Concursos com None ficam sem a ordem do sorteio.
+    """
+    registros = []
+    for numero, dezenas in enumerate(sorteios, start=1):
+        if dezenas is None:
+            dezenas = random.Random(numero).sample(range(1, 81), 5)
+            ordem = ()
+        else:
+            ordem = tuple(dezenas)
+        registros.append(DezenasConcurso(numero, tuple(sorted(dezenas)), ordem))
+    return HistoricoCompacto.de_registros(registros)
+
+
+def aleatorio(total, semente, proporcao_sem_ordem=0.0):
+    """
+    Histórico aleatório reproduzível
+    """
+    rng = random.Random(semente)
+    return historico([
+        None if rng.random() < proporcao_sem_ordem else rng.sample(range(1, 81), 5)
+        for _ in range(total)
+    ])
+
+
+@unittest.skipIf(np is None, 'NumPy não instalado')
+class TestParidadeNumpy(unittest.TestCase):
+    """
+    _agregar com e sem NumPy deve produzir os mesmos agregados, inclusive a
+    ordem de inserção dos contadores por posição (desempate de most_common)
+    """
+    
+    @classmethod
+    def setUpClass(cls):
+        cls._diretorio = tempfile.TemporaryDirectory()
+        caminho = os.path.join(cls._diretorio.name, 'teste.db')
+        with mock.patch.object(config, 'DATABASE_PATH', caminho):
+            cls.service = EstatisticaService()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls._diretorio.cleanup()
+    
+    def agregar(self, dados, usar_numpy):
+        with mock.patch.object(config, 'ESTATISTICA_NUMPY', usar_numpy):
+            return self.service._agregar(dados)
+    
+    def assertParidade(self, dados):
+        python = self.agregar(dados, False)
+        vetorizado = self.agregar(dados, True)
+        
+        self.assertEqual(python['total_concursos'], vetorizado['total_concursos'])
+        self.assertEqual(python['frequencias'], vetorizado['frequencias'])
+        self.assertEqual(python['ultima_aparicao'], vetorizado['ultima_aparicao'])
+        self.assertEqual(python['pares'], vetorizado['pares'])
+        self.assertEqual(python['impares'], vetorizado['impares'])
+        self.assertEqual(python['faixas'], vetorizado['faixas'])
+        self.assertEqual(python['digitos'], vetorizado['digitos'])
+        self.assertEqual(list(python['posicoes']), list(vetorizado['posicoes']))
+        for posicao, contador in python['posicoes'].items():
+            self.assertEqual(list(contador.items()), list(vetorizado['posicoes'][posicao].items()), posicao)
+        
+        for nome in FORMATADORES:
+            formatar = getattr(self.service, nome)
+            self.assertEqual(formatar(python), formatar(vetorizado), nome)
+        
+        return python
+    
+    def test_historico_vazio(self):
+        agregados = self.assertParidade(HistoricoCompacto())
+        self.assertEqual(agregados['total_concursos'], 0)
+        self.assertEqual(set(agregados['ultima_aparicao'].values()), {-1})
+    
+    def test_um_concurso(self):
+        self.assertParidade(historico([[80, 1, 41, 2, 79]]))
+    
+    def test_historicos_aleatorios(self):
+        for semente in range(5):
+            with self.subTest(semente=semente):
+                self.assertParidade(aleatorio(500 + semente * 137, semente))
+    
+    def test_concursos_sem_ordem_do_sorteio(self):
+        self.assertParidade(aleatorio(300, 7, proporcao_sem_ordem=0.4))
+        agregados = self.assertParidade(historico([None, None, None]))
+        self.assertTrue(all(not contador for contador in agregados['posicoes'].values()))
+    
+    def test_desempate_por_posicao(self):
+        # Todas as dezenas aparecem uma vez em cada posição: o top 10 de
+        # most_common depende apenas da ordem de inserção (mais recente antes)
+        sorteios = [[base + deslocamento * 16 for deslocamento in range(5)] for base in range(1, 17)]
+        agregados = self.assertParidade(historico(sorteios))
+        top = self.service._formatar_por_posicao_sorteio(agregados)['posicao_1']['top_numeros']
+        self.assertEqual([item['numero'] for item in top], list(range(16, 6, -1)))
+    
+    def test_empates_de_frequencia_e_atraso(self):
+        # Dois blocos repetidos: frequências e atrasos empatados aos pares
+        sorteios = [[1, 2, 3, 4, 5], [6, 7, 8, 9, 10]] * 4 + [[5, 4, 3, 2, 1]]
+        self.assertParidade(historico(sorteios))
+
+
+if __name__ == '__main__':
+    unittest.main()